@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot WalletHoldingHistory / Token queries against a local Postgres.
+
+Seeds the same synthetic data into two scratch tables, one with the legacy
+single-column indexes and one with the composite covering indexes from
+migration 0002, then times the queries monitor_wallets, calculate_wallet_pnl
+and the token symbol lookups run. Everything lives in a throwaway schema, so
+it is safe to point DATABASE_URL at a dev database.
+
+    python -m benchmarks.bench_holding_queries --wallets 200 --mints 2000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from database.database import engine
+
+SCHEMA = "bench_holdings"
+
+LAYOUTS = {
+    "legacy": [
+        "CREATE INDEX ON {schema}.history_legacy (wallet_address)",
+        "CREATE INDEX ON {schema}.history_legacy (token_mint)",
+        "CREATE UNIQUE INDEX ON {schema}.tokens_legacy (ca)",
+    ],
+    "covering": [
+        "CREATE UNIQUE INDEX ON {schema}.history_covering (wallet_address, token_mint)",
+        "CREATE INDEX ON {schema}.history_covering (wallet_address, last_seen) INCLUDE (token_mint)",
+        "CREATE INDEX ON {schema}.history_covering (wallet_address, first_seen) INCLUDE (token_mint)",
+        "CREATE INDEX ON {schema}.history_covering (token_mint)",
+        "CREATE UNIQUE INDEX ON {schema}.tokens_covering (ca) INCLUDE (symbol)",
+    ],
+}
+
+QUERIES = {
+    # monitor_wallets: recent holdings of every tracked wallet
+    "recent_all_wallets": (
+        "SELECT wallet_address, token_mint FROM {schema}.history_{layout} "
+        "WHERE wallet_address = ANY(:wallets) AND last_seen >= now() - interval '24 hours'"
+    ),
+    # calculate_wallet_pnl: distinct mints first seen in the period
+    "pnl_distinct_mints": (
+        "SELECT DISTINCT token_mint FROM {schema}.history_{layout} "
+        "WHERE wallet_address = :wallet AND first_seen >= now() - interval '7 days'"
+    ),
+    # monitor_wallets / pnl_command: symbol for a mint
+    "token_symbol": "SELECT symbol FROM {schema}.tokens_{layout} WHERE ca = :mint",
+}
+
+
+async def seed(conn, wallets: int, mints: int, rows_per_wallet: int, days: int):
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    for layout in LAYOUTS:
+        await conn.execute(text(f"""
+            CREATE TABLE {SCHEMA}.history_{layout} (
+                id serial PRIMARY KEY,
+                wallet_address varchar NOT NULL,
+                token_mint varchar NOT NULL,
+                first_seen timestamptz NOT NULL,
+                last_seen timestamptz NOT NULL
+            )
+        """))
+        await conn.execute(text(f"""
+            CREATE TABLE {SCHEMA}.tokens_{layout} (
+                id serial PRIMARY KEY,
+                ca varchar NOT NULL,
+                symbol varchar,
+                holders integer,
+                twitter varchar,
+                website varchar
+            )
+        """))
+
+    # Same rows in both layouts: each wallet touches rows_per_wallet distinct mints over `days`
+    await conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.history_legacy (wallet_address, token_mint, first_seen, last_seen)
+        SELECT 'wallet_' || w, 'mint_' || h.mint, t.ts, t.ts + random() * interval '2 days'
+        FROM generate_series(1, :wallets) AS w
+        -- The outer references keep both subqueries correlated, so they are re-run per row
+        CROSS JOIN LATERAL (
+            SELECT DISTINCT (floor(random() * :mints) + 1)::int AS mint
+            FROM generate_series(1, :rows_per_wallet) WHERE w > 0
+        ) h
+        CROSS JOIN LATERAL (
+            SELECT now() - random() * make_interval(days => :days) AS ts WHERE h.mint > 0
+        ) t
+    """), {"wallets": wallets, "mints": mints, "rows_per_wallet": rows_per_wallet, "days": days})
+    await conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.history_covering (wallet_address, token_mint, first_seen, last_seen)
+        SELECT wallet_address, token_mint, first_seen, last_seen FROM {SCHEMA}.history_legacy ORDER BY id
+    """))
+    for layout in LAYOUTS:
+        await conn.execute(text(f"""
+            INSERT INTO {SCHEMA}.tokens_{layout} (ca, symbol, holders, twitter, website)
+            SELECT 'mint_' || n, 'SYM' || n, n, 'handle_' || n, 'https://example.com/' || n
+            FROM generate_series(1, :mints) AS n
+        """), {"mints": mints})
+        for ddl in LAYOUTS[layout]:
+            await conn.execute(text(ddl.format(schema=SCHEMA)))
+
+
+async def time_query(conn, sql: str, params_fn, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        params = params_fn()
+        start = time.perf_counter()
+        await conn.execute(text(sql), params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(args):
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        print(f"Seeding {args.wallets} wallets x {args.rows_per_wallet} holdings over {args.mints} mints...")
+        await seed(conn, args.wallets, args.mints, args.rows_per_wallet, args.days)
+        for layout in LAYOUTS:
+            # Fresh visibility map so index-only scans are possible, like a vacuumed production table
+            await conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.history_{layout}"))
+            await conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.tokens_{layout}"))
+
+        all_wallets = [f"wallet_{i}" for i in range(1, args.wallets + 1)]
+        params = {
+            "recent_all_wallets": lambda: {"wallets": all_wallets},
+            "pnl_distinct_mints": lambda: {"wallet": random.choice(all_wallets)},
+            "token_symbol": lambda: {"mint": f"mint_{random.randint(1, args.mints)}"},
+        }
+
+        print(f"\n{'query':<22}{'layout':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        for name, sql in QUERIES.items():
+            for layout in LAYOUTS:
+                statement = sql.format(schema=SCHEMA, layout=layout)
+                await time_query(conn, statement, params[name], 5)  # warm the cache
+                timings = await time_query(conn, statement, params[name], args.iterations)
+                print(
+                    f"{name:<22}{layout:<10}{percentile(timings, 0.5):>10.3f}"
+                    f"{percentile(timings, 0.95):>10.3f}{statistics.mean(timings):>10.3f}"
+                )
+
+        if args.explain:
+            for name, sql in QUERIES.items():
+                for layout in LAYOUTS:
+                    plan = await conn.execute(
+                        text("EXPLAIN (ANALYZE, BUFFERS) " + sql.format(schema=SCHEMA, layout=layout)),
+                        params[name]()
+                    )
+                    print(f"\n--- {name} / {layout}")
+                    print("\n".join(row[0] for row in plan))
+
+        if not args.keep:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=100)
+    parser.add_argument("--mints", type=int, default=5000)
+    parser.add_argument("--rows-per-wallet", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30, help="Spread of first_seen timestamps")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--explain", action="store_true", help="Print EXPLAIN ANALYZE for every query")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_holdings schema afterwards")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON decoding of Helius deliveries: the standard library (what
+request.json() did), orjson, and the msgspec schema decoder behind
+decode_transactions().
+
+Enhanced transactions with full account data run to several KB each, so the
+sample payloads are padded with accountData and instructions up to --txn-kb
+and batched into deliveries of 1, 10 and 100 transactions. Pass --payloads to
+time a recorded body (one JSON array per file) instead.
+
+    python -m benchmarks.bench_json_decode --txn-kb 8
+    python -m benchmarks.bench_json_decode --payloads delivery.json
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils import fastjson
+
+SAMPLES = Path(__file__).parent.parent / "tests" / "fixtures" / "helius_swaps.json"
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def pubkey() -> str:
+    return "".join(random.choices(BASE58, k=44))
+
+
+def pad(txn: dict, target_bytes: int) -> dict:
+    """Adds accountData and instructions the way Helius reports them until the transaction reaches target_bytes"""
+    txn = dict(txn, accountData=[], instructions=[])
+    while len(json.dumps(txn)) < target_bytes:
+        account = pubkey()
+        txn["accountData"].append({
+            "account": account,
+            "nativeBalanceChange": random.randint(-10**9, 10**9),
+            "tokenBalanceChanges": [{
+                "userAccount": pubkey(),
+                "tokenAccount": account,
+                "mint": pubkey(),
+                "rawTokenAmount": {"tokenAmount": str(random.randint(1, 10**12)), "decimals": 6},
+            }],
+        })
+        txn["instructions"].append({
+            "programId": pubkey(),
+            "accounts": [pubkey() for _ in range(8)],
+            "data": "".join(random.choices(string.ascii_letters, k=64)),
+            "innerInstructions": [{"programId": pubkey(), "accounts": [pubkey()], "data": "3Bxs4h24hBtQy9rw"}],
+        })
+    return txn
+
+
+def measure(decode, body: bytes, budget: float) -> float:
+    """Seconds per decode, repeating for about `budget` seconds"""
+    runs, started = 0, time.perf_counter()
+    while True:
+        decode(body)
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget:
+            return elapsed / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=Path, help="Recorded delivery body to time instead of the padded samples")
+    parser.add_argument("--txn-kb", type=float, default=8, help="Padded size of each transaction")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds spent per decoder and body")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.payloads:
+        bodies = {args.payloads.name: args.payloads.read_bytes()}
+    else:
+        swaps = [txn for txn in json.loads(SAMPLES.read_text()) if txn["type"] == "SWAP"]
+        padded = [pad(txn, int(args.txn_kb * 1024)) for txn in swaps]
+        bodies = {
+            f"{n} txn": json.dumps([padded[i % len(padded)] for i in range(n)]).encode()
+            for n in (1, 10, 100)
+        }
+
+    decoders = {"json (stdlib)": lambda body: json.loads(body.decode())}
+    if fastjson.orjson is not None:
+        decoders["orjson"] = fastjson.orjson.loads
+    if fastjson._transactions_decoder is not None:
+        decoders["msgspec typed"] = fastjson.decode_transactions
+
+    print(f"backend: {fastjson.BACKEND}, typed decoder: {'on' if fastjson._transactions_decoder else 'off'}")
+    for name, body in bodies.items():
+        print(f"\n{name}, {len(body) / 1024:.1f} KB")
+        baseline = None
+        for decoder_name, decode in decoders.items():
+            seconds = measure(decode, body, args.budget)
+            baseline = baseline or seconds
+            print(f"  {decoder_name:<14} {seconds * 1e6:10.1f} us   {len(body) / seconds / 2**20:8.1f} MB/s   {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
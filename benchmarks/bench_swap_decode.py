@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark decode throughput of bot.utils.swaps over Helius payloads.
+
+Replays the sample payloads (or a recorded file: a JSON array of enhanced
+transactions, or one webhook payload per line) through decode_swap() and
+through the indexing the webhook used before, tokenTransfers[0] and [-1], and
+reports transactions per second along with the per-record size of a Swap
+against the dict it replaced. Nothing leaves the process.
+
+    python -m benchmarks.bench_swap_decode --repeat 20000
+    python -m benchmarks.bench_swap_decode --payloads deliveries.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.swaps import decode_swap
+from config.settings import SOL_MINT
+
+SAMPLES = Path(__file__).parent.parent / "tests" / "fixtures" / "helius_swaps.json"
+
+
+def load_payloads(path: Path) -> list[dict]:
+    text = path.read_text()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    transactions = []
+    for line in text.splitlines():
+        if line.strip():
+            delivery = json.loads(line)
+            transactions.extend(delivery if isinstance(delivery, list) else [delivery])
+    return transactions
+
+
+def legacy_parse(txn: dict):
+    """The first/last transfer heuristic process_webhook used before the decoder"""
+    transfers = txn.get("tokenTransfers") or []
+    if not transfers:
+        return None
+    if txn.get("source") == "PUMP_FUN":
+        return {"owner": transfers[0].get("toUserAccount"), "mint": transfers[0].get("mint"),
+                "source": txn.get("source"), "transfers": transfers}
+    token_a, token_b = transfers[0], transfers[-1]
+    mint = token_a.get("mint") if token_a.get("mint") != SOL_MINT else token_b.get("mint")
+    return {"owner": txn.get("feePayer"), "mint": mint, "source": txn.get("source"), "transfers": transfers}
+
+
+def measure(decode, transactions: list[dict], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for txn in transactions:
+            decode(txn)
+    return len(transactions) * repeat / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=Path, default=SAMPLES)
+    parser.add_argument("--repeat", type=int, default=10000, help="Passes over the payloads")
+    args = parser.parse_args()
+
+    transactions = load_payloads(args.payloads)
+    raw = json.dumps(transactions)
+    print(f"{len(transactions)} transactions from {args.payloads}, {args.repeat} passes")
+
+    decoded = [decode_swap(txn) for txn in transactions]
+    print(f"decoded {sum(swap is not None for swap in decoded)} swaps")
+
+    # Warm up, then measure
+    measure(decode_swap, transactions, 100)
+    legacy = measure(legacy_parse, transactions, args.repeat)
+    current = measure(decode_swap, transactions, args.repeat)
+    started = time.perf_counter()
+    for _ in range(max(1, args.repeat // 10)):
+        json.loads(raw)
+    parse = len(transactions) * max(1, args.repeat // 10) / (time.perf_counter() - started)
+
+    print(f"{'json.loads':<14} {parse:>12,.0f} txn/s   (payload parsing, for scale)")
+    print(f"{'legacy index':<14} {legacy:>12,.0f} txn/s")
+    print(f"{'decode_swap':<14} {current:>12,.0f} txn/s   {1e6 / current:.2f} us/txn")
+
+    swaps = [swap for swap in decoded if swap is not None]
+    dicts = [record for record in map(legacy_parse, transactions) if record is not None]
+    print(f"record size: Swap {sum(map(sys.getsizeof, swaps)) / len(swaps):.0f} B, "
+          f"legacy dict {sum(map(sys.getsizeof, dicts)) / len(dicts):.0f} B (shallow)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark webhook -> alert latency of process_webhook against mocked I/O.
+
+GMGN (get_token_info, get_wallet_stats), the wallet lookup and the Telegram
+send are replaced with sleeps drawn around the given means, then the same
+deliveries run through the pre-refactor sequential order (lookup, then token
+info, then wallet stats) and through process_webhook, which starts the three
+as soon as the payload is parsed. Nothing leaves the process.
+
+    python -m benchmarks.bench_webhook_enrichment --runs 50 --token-ms 900 --stats-ms 600
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.monitor as monitor
+
+WALLET = "7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU"
+MINT = "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump"
+PAYLOAD = [{
+    "signature": "bench",
+    "source": "PUMP_FUN",
+    "feePayer": WALLET,
+    "tokenTransfers": [{"fromUserAccount": "CURVE", "toUserAccount": WALLET, "mint": MINT, "tokenAmount": 1000.0}],
+    "nativeTransfers": [{"fromUserAccount": WALLET, "toUserAccount": "CURVE", "amount": 500_000_000}],
+}]
+TOKEN_INFO = {"mint": MINT, "profile": {"name": "Bench", "ca": MINT}, "stats": {}, "holders": {}, "links": {}}
+
+
+def jittered(mean_ms: float) -> float:
+    return max(random.gauss(mean_ms, mean_ms * 0.2), 0) / 1000
+
+
+class NoAggregation:
+    """Every run opens a new alert, so each one pays for its own enrichment and send"""
+    last_send = None
+
+    def active(self, chat_id, mint):
+        return None
+
+    def publish(self, chat_id, mint, token_info, wallet_info):
+        self.last_send = asyncio.ensure_future(monitor.forward_message(None, None, token_info, chat_id, wallet_info))
+        return self.last_send
+
+
+aggregator = NoAggregation()
+
+
+def install_mocks(args) -> None:
+    async def find_wallet(owner):
+        await asyncio.sleep(jittered(args.db_ms))
+        return SimpleNamespace(name="bench", address=owner)
+
+    async def get_token_info(mint):
+        await asyncio.sleep(jittered(args.token_ms))
+        return TOKEN_INFO
+
+    async def get_wallet_stats(address, period="7d"):
+        await asyncio.sleep(jittered(args.stats_ms))
+        return {"pnl_7d": 0.1}
+
+    async def forward_message(client, message, token_info, chat_id, wallet_info=None, priority=None):
+        await asyncio.sleep(jittered(args.send_ms))
+
+    monitor.find_wallet = find_wallet
+    monitor.get_token_info = get_token_info
+    monitor.get_wallet_stats = get_wallet_stats
+    monitor.forward_message = forward_message
+    monitor.alert_aggregator = aggregator
+
+
+async def sequential(payload) -> None:
+    """The pre-refactor order: every enrichment call waits for the previous one"""
+    swap = monitor.decode_swap(payload[0])
+    wallet = await monitor.find_wallet(swap.owner)
+    token_info = await monitor.get_token_info(swap.token_mint)
+    pnl = await monitor.get_wallet_stats(wallet.address, period="7d")
+    wallet_info = {"name": wallet.name, "address": wallet.address, "pnl": pnl,
+                   "description": monitor.describe_swap(swap, token_info["profile"]["name"])}
+    await monitor.forward_message(None, None, token_info, None, wallet_info)
+
+
+async def concurrent(payload) -> None:
+    await monitor.process_webhook(payload, None)
+    # Buys are handed to the aggregator without waiting, count the send as well
+    await aggregator.last_send
+
+
+async def measure(pipeline, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await pipeline(PAYLOAD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<12} p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms   mean {statistics.mean(timings):8.1f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--db-ms", type=float, default=5)
+    parser.add_argument("--token-ms", type=float, default=900, help="get_token_info: 4 parallel GMGN calls")
+    parser.add_argument("--stats-ms", type=float, default=600, help="get_wallet_stats: one GMGN call")
+    parser.add_argument("--send-ms", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    install_mocks(args)
+    print(f"{args.runs} alerts, mocked latencies: db {args.db_ms} ms, token info {args.token_ms} ms, "
+          f"wallet stats {args.stats_ms} ms, send {args.send_ms} ms")
+    before = await measure(sequential, args.runs)
+    after = await measure(concurrent, args.runs)
+    report("sequential", before)
+    report("concurrent", after)
+    print(f"median reduction: {100 * (1 - statistics.median(after) / statistics.median(before)):.1f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Load test of POST /webhooks, from Helius delivery to Telegram alert.
+
+Starts the stubs (stubs/) in one process and the FastAPI app in another,
+pointed at them and sending through a StubTelegramClient, then posts Helius
+deliveries at a fixed arrival rate, whether or not earlier ones have been
+answered. Deliveries are built from the swap fixtures (or --payloads, a JSON
+array of enhanced transactions or one delivery per line): every one gets a
+fresh signature and, unless --keep-mints, a fresh token mint, and its swap is
+made by one of --wallets tracked wallets.
+
+Reports the achieved request rate, response times, receive-to-alert latency
+(from posting a delivery to the Telegram stub receiving the alert for its
+mint), alert throughput, and the CPU and memory of the app process.
+
+    python -m benchmarks.webhook_load --rate 20 --duration 30 --gmgn-latency-ms 300
+    python -m benchmarks.webhook_load --payloads deliveries.jsonl --rate 50 --gmgn-error-rate 0.05
+
+Needs DATABASE_URL to point at a scratch database: the tracked wallets are
+upserted into smart_wallets and every delivery is claimed in processed_signatures.
+Scheduled jobs and the webhook sync don't run.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import aiohttp
+# Nothing importing config.settings at module level: the app process imports this
+# module before serve_app() points the settings at the stubs
+from stubs.run import add_arguments as add_stub_arguments, run as run_stubs, stub_env
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SAMPLES = Path(__file__).parent.parent / "tests" / "fixtures" / "helius_swaps.json"
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+CA_PATTERN = re.compile(r"CA:\*\* `([1-9A-HJ-NP-Za-km-z]+)`")
+
+
+def pubkey(rng: random.Random) -> str:
+    return "".join(rng.choices(BASE58, k=44))
+
+
+def replace_strings(value: Any, replacements: Dict[str, str]) -> Any:
+    """Copy of a decoded JSON value with every string in `replacements` swapped"""
+    if isinstance(value, str):
+        return replacements.get(value, value)
+    if isinstance(value, list):
+        return [replace_strings(item, replacements) for item in value]
+    if isinstance(value, dict):
+        return {key: replace_strings(item, replacements) for key, item in value.items()}
+    return value
+
+
+def build_deliveries(transactions: List[dict], count: int, batch: int, wallets: int,
+                     keep_mints: bool, rng: random.Random) -> tuple[List[dict], List[str]]:
+    """
+    Returns:
+        tuple: [{"mint", "body"}] for each delivery, and the wallets to track.
+    """
+    from bot.utils.swaps import decode_swap
+
+    templates = [(txn, decode_swap(txn)) for txn in transactions]
+    templates = [(txn, swap) for txn, swap in templates if swap is not None]
+    if not templates:
+        raise SystemExit("No swaps among the payloads")
+
+    # Synthetic deliveries spread over a wallet pool, recorded ones keep their owners
+    pool = [pubkey(rng) for _ in range(wallets)] if wallets else None
+    tracked = set(pool or ())
+    deliveries = []
+    for i in range(count):
+        txn, swap = templates[i % len(templates)]
+        replacements = {}
+        if pool:
+            replacements[swap.owner] = pool[i % len(pool)]
+        else:
+            tracked.add(swap.owner)
+        mint = swap.token_mint if keep_mints else pubkey(rng)
+        replacements[swap.token_mint] = mint
+        first = replace_strings(txn, replacements)
+        first["signature"] = f"load{uuid.uuid4().hex}"
+        # The rest of the batch rides along, process_webhook alerts on the first transaction
+        rest = [dict(templates[(i + k) % len(templates)][0], signature=f"load{uuid.uuid4().hex}") for k in range(1, batch)]
+        deliveries.append({"mint": mint, "body": json.dumps([first, *rest]).encode()})
+    return deliveries, sorted(tracked)
+
+
+def serve_app(env: Dict[str, str], port: int, wallets: List[str], telegram_url: str) -> None:
+    """App process: the bot's webhook endpoint with its I/O pointed at the stubs"""
+    os.environ.update(env)
+    asyncio.run(_serve_app(port, wallets, telegram_url))
+
+
+async def _serve_app(port: int, wallets: List[str], telegram_url: str) -> None:
+    # Imported here, after the environment points the settings at the stubs
+    import main
+    import uvicorn
+    from datetime import datetime, UTC
+    from database.database import AsyncSessionFactory, SmartWallet, init_db, warm_pool
+    from sqlalchemy.dialects.postgresql import insert
+    from bot.utils.outbound import outbound_queue
+    from bot.utils.token import token_writer
+    from bot.utils.token_metrics import token_metrics_writer
+    from stubs.telegram import StubTelegramClient
+
+    await init_db()
+    now = datetime.now(UTC).replace(tzinfo=None)
+    async with AsyncSessionFactory() as session:
+        for i in range(0, len(wallets), 1000):
+            await session.execute(insert(SmartWallet).values([
+                dict(address=address, name=f"load-{address[:12]}", first_seen=now, last_active=now)
+                for address in wallets[i:i + 1000]
+            ]).on_conflict_do_nothing())
+        await session.commit()
+    await warm_pool()
+
+    client = StubTelegramClient(telegram_url)
+    await client.start()
+    main.client = client
+    await outbound_queue.start(client)
+    await token_writer.start()
+    await token_metrics_writer.start()
+
+    config = uvicorn.Config(main.web_app, host="127.0.0.1", port=port, lifespan="off", log_level="warning")
+    try:
+        await uvicorn.Server(config).serve()
+    finally:
+        await token_writer.stop()
+        await token_metrics_writer.stop()
+        await outbound_queue.stop()
+        await client.stop()
+
+
+class ResourceSampler:
+    """CPU and resident memory of a process, sampled while the load runs (needs psutil)"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.process = psutil.Process(pid) if psutil is not None else None
+        self.interval = interval
+        self.rss: List[int] = []
+        self.cpu_start = self.cpu_end = None
+        self.started = self.ended = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _cpu(self) -> float:
+        times = self.process.cpu_times()
+        return times.user + times.system
+
+    async def _sample(self) -> None:
+        while True:
+            self.rss.append(self.process.memory_info().rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.process is None:
+            return
+        self.started, self.cpu_start = time.perf_counter(), self._cpu()
+        self._task = asyncio.create_task(self._sample())
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        self.ended, self.cpu_end = time.perf_counter(), self._cpu()
+        self._task.cancel()
+
+    def report(self) -> Optional[Dict[str, float]]:
+        if self.process is None or self.cpu_end is None:
+            return None
+        cpu = self.cpu_end - self.cpu_start
+        return {
+            "cpu_seconds": cpu,
+            "cpu_percent": 100 * cpu / (self.ended - self.started),
+            "rss_mb_peak": max(self.rss) / 2**20,
+            "rss_mb_mean": statistics.mean(self.rss) / 2**20,
+        }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": values[-1]}
+
+
+async def wait_for_app(url: str, process: multiprocessing.Process, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if not process.is_alive():
+                raise SystemExit("The app process exited during startup")
+            try:
+                async with session.get(f"{url}/metrics") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("The app didn't start listening")
+
+
+async def run_load(app_url: str, secret: str, deliveries: List[dict], rate: float) -> List[dict]:
+    """Posts every delivery at its scheduled time (open loop). Returns one record per delivery."""
+    results = []
+    headers = {"Authorization": secret or "", "Content-Type": "application/json"}
+    connector = aiohttp.TCPConnector(limit=0)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        async def post(delivery: dict) -> None:
+            record = {"mint": delivery["mint"], "sent_at": time.time(), "status": None}
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{app_url}/webhooks", data=delivery["body"], headers=headers) as response:
+                    await response.read()
+                    record["status"] = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                record["status"] = type(e).__name__
+            record["response_ms"] = (time.perf_counter() - started) * 1000
+            results.append(record)
+
+        tasks = []
+        started = time.perf_counter()
+        for i, delivery in enumerate(deliveries):
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(post(delivery)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+async def collect_alerts(telegram_url: str, expected: set, timeout: float) -> Dict[str, float]:
+    """First delivery time of an alert per expected mint, waiting up to `timeout` for stragglers"""
+    first: Dict[str, float] = {}
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            async with session.get(f"{telegram_url}/_stub/deliveries") as response:
+                deliveries = await response.json()
+            first.clear()
+            for delivery in deliveries:
+                for mint in CA_PATTERN.findall(delivery["text"]):
+                    if mint not in first or delivery["at"] < first[mint]:
+                        first[mint] = delivery["at"]
+            if expected <= first.keys() or time.monotonic() >= deadline:
+                return first
+            await asyncio.sleep(0.5)
+
+
+async def stub_stats(urls: Dict[str, str]) -> Dict[str, dict]:
+    async with aiohttp.ClientSession() as session:
+        stats = {}
+        for name, url in urls.items():
+            async with session.get(f"{url}/_stub/stats") as response:
+                stats[name] = await response.json()
+        return stats
+
+
+def report(args, results: List[dict], alerts: Dict[str, float], load_seconds: float,
+           resources: Optional[dict], stubs: Dict[str, dict]) -> dict:
+    statuses: Dict[str, int] = {}
+    for record in results:
+        statuses[str(record["status"])] = statuses.get(str(record["status"]), 0) + 1
+    accepted = [record for record in results if record["status"] == 200]
+    # With --keep-mints later buys merge into the mint's alert, only the first one opened it
+    opened: Dict[str, float] = {}
+    for record in accepted:
+        opened[record["mint"]] = min(record["sent_at"], opened.get(record["mint"], record["sent_at"]))
+    latencies = [(alerts[mint] - sent_at) * 1000 for mint, sent_at in opened.items() if mint in alerts]
+    delivered_by = max(alerts.values(), default=None)
+    first_sent = min((record["sent_at"] for record in results), default=None)
+    sent_span = max((record["sent_at"] for record in results), default=0) - (first_sent or 0)
+
+    summary = {
+        "requests": len(results),
+        "target_rate": args.rate,
+        # Deliveries go out on schedule whatever the app does, completions show what it kept up with
+        "sent_rate": (len(results) - 1) / sent_span if sent_span else 0,
+        "completed_rate": len(results) / load_seconds if load_seconds else 0,
+        "statuses": statuses,
+        "response_ms": percentiles([record["response_ms"] for record in results]),
+        "alerts_expected": len(opened),
+        "alerts_delivered": len(latencies),
+        "alert_latency_ms": percentiles(latencies),
+        "alert_throughput": len(latencies) / (delivered_by - first_sent) if latencies and delivered_by > first_sent else 0,
+        "app_resources": resources,
+        "stubs": stubs,
+    }
+
+    print(f"\n{summary['requests']} deliveries sent at {summary['sent_rate']:.1f}/s (target {args.rate}/s), "
+          f"all answered after {load_seconds:.1f}s: {summary['completed_rate']:.1f}/s, statuses {statuses}")
+    for name in ("response_ms", "alert_latency_ms"):
+        p = summary[name]
+        if p:
+            print(f"  {name:<17} p50 {p['p50']:9.1f}   p95 {p['p95']:9.1f}   p99 {p['p99']:9.1f}   max {p['max']:9.1f}")
+    print(f"  alerts            {summary['alerts_delivered']}/{summary['alerts_expected']} delivered, "
+          f"{summary['alert_throughput']:.1f}/s")
+    if resources:
+        print(f"  app process       CPU {resources['cpu_seconds']:.1f}s ({resources['cpu_percent']:.0f}%), "
+              f"RSS peak {resources['rss_mb_peak']:.0f} MB, mean {resources['rss_mb_mean']:.0f} MB")
+    else:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        print(f"  child processes   CPU {usage.ru_utime + usage.ru_stime:.1f}s, max RSS {usage.ru_maxrss / 1024:.0f} MB "
+              f"(install psutil for per-process figures)")
+    print("  stubs             " + ", ".join(
+        f"{name} {stats['requests']} req/{stats['errors']} err" for name, stats in stubs.items()))
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10, help="Deliveries per second")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load")
+    parser.add_argument("--batch", type=int, default=1, help="Transactions per delivery")
+    parser.add_argument("--payloads", type=Path, default=SAMPLES, help="Recorded transactions to replay")
+    parser.add_argument("--wallets", type=int, default=50,
+                        help="Tracked wallets the swaps are spread over, 0 keeps the recorded owners")
+    parser.add_argument("--keep-mints", action="store_true",
+                        help="Keep the recorded mints, repeats then merge into open alerts")
+    parser.add_argument("--chat-rate", type=float, default=1000,
+                        help="Telegram messages per second the bot allows itself; "
+                             "the default lifts pacing, 0.33 measures production pacing too")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="Seconds to wait for alerts after the last delivery")
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra app settings")
+    parser.add_argument("--json", type=Path, help="Write the summary here")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    from benchmarks.bench_swap_decode import load_payloads
+
+    rng = random.Random(args.seed)
+    count = max(1, int(args.rate * args.duration))
+    deliveries, wallets = build_deliveries(
+        load_payloads(args.payloads), count, args.batch, args.wallets, args.keep_mints, rng
+    )
+    print(f"{count} deliveries of {args.batch} transactions, {len(wallets)} tracked wallets")
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    stubs = context.Process(target=run_stubs, args=(args, ready), daemon=True)
+    stubs.start()
+    urls = ready.get(timeout=30)
+
+    secret = os.getenv("WEBHOOK_SECRET") or "load-test"
+    env = dict(
+        stub_env(urls),
+        WEBHOOK_SECRET=secret,
+        HOMIES_CHAT_ID=os.getenv("HOMIES_CHAT_ID") or "-1001",
+        TELEGRAM_CHAT_RATE=str(args.chat_rate),
+        TELEGRAM_CHAT_BURST=str(max(1, int(args.chat_rate))),
+        TELEGRAM_GLOBAL_RATE=str(args.chat_rate),
+        LOG_LEVEL="WARNING",
+    )
+    env.update(item.split("=", 1) for item in args.env)
+    app = context.Process(target=serve_app, args=(env, args.port, wallets, urls["telegram"]), daemon=True)
+    app.start()
+    app_url = f"http://127.0.0.1:{args.port}"
+
+    async def scenario() -> dict:
+        await wait_for_app(app_url, app)
+        sampler = ResourceSampler(app.pid)
+        sampler.start()
+        started = time.perf_counter()
+        results = await run_load(app_url, secret, deliveries, args.rate)
+        load_seconds = time.perf_counter() - started
+        expected = {record["mint"] for record in results if record["status"] == 200}
+        alerts = await collect_alerts(urls["telegram"], expected, args.drain_timeout)
+        sampler.stop()
+        return report(args, results, alerts, load_seconds, sampler.report(), await stub_stats(urls))
+
+    try:
+        summary = asyncio.run(scenario())
+    finally:
+        for process in (app, stubs):
+            process.terminate()
+            process.join(15)
+            if process.is_alive():
+                process.kill()
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
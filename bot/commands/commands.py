@@ -1,13 +1,15 @@
 from bot.languages.language_manager import lang_manager
 from bot.keyboards.keyboards import get_start_keyboard
 from bot.utils.decorators import get_user
-from logger.logger import logger
+from logger.logger import get_logger
 from bot.utils.pnl import calculate_wallet_pnl
 from database.database import SmartWallet
 from sqlalchemy import select
 
 from pyrogram.types import BotCommand, Message
 
+logger = get_logger("commands")
+
 async def get_bot_commands():
     return [
         BotCommand(command="start", description="Start the bot"),
@@ -63,6 +65,7 @@ async def pnl_command(client, message: Message, user, session):
                                  pnl_data["wallet_name"], pnl_data["wallet_address"]),
             lang_manager.get_text(user.language, "pnl_period", pnl_data["period_days"]),
             lang_manager.get_text(user.language, "pnl_total", round(pnl_data["total_realized_pnl"], 4)),
+            lang_manager.get_text(user.language, "pnl_unrealized", round(pnl_data["total_unrealized_pnl"], 4)),
             lang_manager.get_text(user.language, "pnl_transactions", pnl_data["total_transactions"]),
             ""
         ]
@@ -1,4 +1,4 @@
-from logger.logger import logger
+from logger.logger import get_logger
 from config.settings import SOL_MINT, SOL_AMOUNT, AUTO_MULTIPLIER, SLIPPAGE_BPS, ALLOWED_USERS, HOMIES_CHAT_ID
 import re
 # from pyrogram.enums import MessageEntityType
@@ -7,21 +7,35 @@ from pyrogram import Client
 from bot.utils.jupiter_swap import swap
 from bot.utils.token import get_token_info, save_token_info
 from bot.keyboards.keyboards import get_buy_button
+from bot.utils.outbound import outbound_queue, PRIORITY_ALERT
+from bot.utils.tracing import span
 
-async def forward_message(client: Client, message: Message, token_info: dict, chat_id: int, wallet_info: dict = None):
+logger = get_logger("messages")
+
+async def forward_message(client: Client, message: Message, token_info: dict, chat_id: int, wallet_info: dict = None, priority: int = PRIORITY_ALERT):
+        """
+        Queues the token alert on the outbound queue, it is sent as soon as the
+        chat's rate limit allows.
+
+        Returns:
+            Optional[asyncio.Future]: Resolves to the sent Message (None if sending failed), None if the alert couldn't be queued.
+        """
         try:
             # Safely get contract address
             ca = token_info.get('profile', {}).get('ca', 'N/A') if token_info else 'N/A'
             
-            msg = await client.send_message(
-                chat_id=chat_id,
-                text=format_forward_message(token_info, wallet_info),
+            with span("format_forward_message"):
+                text = format_forward_message(token_info, wallet_info)
+            return outbound_queue.send(
+                chat_id,
+                text,
+                priority=priority,
                 reply_markup=get_buy_button(ca),
                 disable_web_page_preview=False
             )
-            logger.debug(f"Forwarded message: {msg.id} / link {msg.link}")
         except Exception as e:
             logger.error(f"Forward error: {e}")
+            return None
 
 
 def format_wallet_token_pnl(pnl_data: dict) -> str:
@@ -70,26 +84,39 @@ def format_wallet_token_pnl(pnl_data: dict) -> str:
   }
 """
 
-def format_forward_message(token_info: dict, wallet: dict = None) -> str:
-    # Helper function to safely convert values to float
-    def safe_float(value, default=0.0):
-        if value is None:
-            return default
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return default
-            
-    return f"""**#{wallet['name'] if wallet['name'] else "N/A"}** { wallet['description'] if wallet['description'] else "" }
-
-📌**CA:** `{token_info.get('profile').get('ca', 'N/A')}`
+def _format_age(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{max(int(seconds // 60), 1)}m"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h"
+    return f"{int(seconds // 86400)}d"
+
+def format_token_history(history: dict) -> str:
+    """Changes since the token's first snapshot, see bot.utils.token_metrics.since_first_snapshot"""
+    changes = []
+    for field, label in (("holders", "holders"), ("liquidity", "LP")):
+        percent = (history.get(field) or {}).get("change_percent")
+        if percent is not None:
+            changes.append(f"{label} {percent:+.1f}%")
+    # Already a percentage, the change is in points
+    insiders = (history.get("insiders_percent") or {}).get("change")
+    if insiders is not None:
+        changes.append(f"insiders {insiders:+.2f} pts")
+    if not changes:
+        return ""
+    return f"🕰️ Since first seen {_format_age(history['age_seconds'])} ago: {', '.join(changes)}\n"
+
+def format_token_report(token_info: dict) -> str:
+    """Token section shared by single and aggregated alerts"""
+    history = format_token_history(token_info['history']) if token_info.get('history') else ""
+    return f"""📌**CA:** `{token_info.get('profile').get('ca', 'N/A')}`
 Name: **{token_info.get('profile').get('name', 'N/A')}**
 Symbol: **{token_info.get('profile').get('symbol', 'N/A')}**
 🏷️ Price: {token_info.get('profile').get('price', 0)}
 💸 MC: 
 💰 LP: ${token_info.get('profile').get('liquidity', 0)}
 👥 **Holders:** {token_info.get('stats').get('holders', 0)}
-📊 **TOP 100 Metrics:**
+{history}📊 **TOP 100 Metrics:**
     - 📈 Profit Avg: {token_info.get('holders').get('avg_profit_percent', 0):.2f}%
     - 🔝 Top 10 holders: {token_info.get('profile').get('top_10_holder_rate', 0):.2f}%
     - 📉 BC Owners: {token_info.get('stats').get('bc_owners_percent', 0):.2f}%
@@ -106,10 +133,46 @@ Symbol: **{token_info.get('profile').get('symbol', 'N/A')}**
     - Telegram: {token_info.get('links').get('telegram', 'N/A')}
     - Github: {token_info.get('links').get('github', 'N/A')}
     - Website: {token_info.get('links').get('website', 'N/A')}
+"""
 
+def format_forward_message(token_info: dict, wallet: dict = None) -> str:
+    return f"""**#{wallet['name'] if wallet['name'] else "N/A"}** { wallet['description'] if wallet['description'] else "" }
+
+{format_token_report(token_info)}
 { format_wallet_token_pnl(wallet.get('pnl') if wallet else None)}
 """
 
+# Wallet lines listed in an aggregated alert, keeps edits well below Telegram's 4096 characters
+MAX_AGGREGATED_WALLETS = 15
+
+def format_aggregated_message(token_info: dict, wallets: list[dict]) -> str:
+    """
+    One alert for several tracked wallets buying the same token. A single
+    wallet gets the regular forward message.
+    """
+    if len(wallets) == 1:
+        return format_forward_message(token_info, wallets[0])
+
+    lines = []
+    for wallet in wallets[:MAX_AGGREGATED_WALLETS]:
+        line = f"  • **#{wallet['name'] or 'N/A'}** {(wallet['description'] or '').strip()}"
+        pnl = (wallet.get('pnl') or {}).get('pnl')
+        if pnl is not None:
+            try:
+                pnl = float(pnl)
+                line += f" ({'🔴 -' if pnl < 0 else '🟢 +'}${abs(pnl):.2f} PNL)"
+            except (ValueError, TypeError):
+                pass
+        lines.append(line)
+    if len(wallets) > MAX_AGGREGATED_WALLETS:
+        lines.append(f"  … and {len(wallets) - MAX_AGGREGATED_WALLETS} more")
+    wallet_lines = "\n".join(lines)
+
+    return f"""**👥 Wallets in: {len(wallets)}**
+{wallet_lines}
+
+{format_token_report(token_info)}"""
+
 async def user_in_chat_message_handler(_:Client, message:Message):
     # Expresión regular para capturar el token
     pump_fun_pattern = r"\b([A-Za-z0-9]+pump)\b"
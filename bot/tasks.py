@@ -1,10 +1,21 @@
 from bot.commands.commands import get_bot_commands
-from logger.logger import logger
+from logger.logger import get_logger
 from datetime import datetime, timedelta, UTC
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pyrogram import Client
-from sqlalchemy import select
+from bot.utils.token_index import get_token_index, refresh_token_index
+from bot.utils.retention import compact_holding_history
+from bot.utils.dedupe import prune_processed_signatures
+from bot.utils.token import refresh_wallet_stats
+from bot.utils.webhook_sync import webhook_sync
+from config.settings import WALLET_STATS_REFRESH_INTERVAL, WALLET_STATS_PREWARM_TICK, WEBHOOK_SYNC_INTERVAL
 from database.database import SmartWallet, AsyncSessionFactory
+from sqlalchemy import select
+from collections import deque
+import asyncio
+import math
+
+logger = get_logger("tasks")
 
 def register_tasks(app: Client, tasks_app: AsyncIOScheduler):
     async def on_startup():
@@ -14,11 +25,29 @@ def register_tasks(app: Client, tasks_app: AsyncIOScheduler):
         me = await app.get_me()
         logger.info(f"{identity} account @{me.username} is running!")
 
-    async def keep_db_online():
-        async with AsyncSessionFactory() as session:
-            query = select(SmartWallet).limit(1)
-            result = await session.execute(query)
-            result.scalars().first()
+    async def refresh_mint_index():
+        await refresh_token_index()
+
+    # Wallets still to refresh in the current pass, and how many the pass started with
+    rotation = deque()
+    rotation_size = 0
+
+    async def prewarm_wallet_stats():
+        """
+        Refreshes the next slice of tracked wallets, so one full pass over all
+        of them takes WALLET_STATS_REFRESH_INTERVAL and GMGN sees a steady
+        trickle of requests instead of a burst.
+        """
+        nonlocal rotation_size
+        if not rotation:
+            async with AsyncSessionFactory() as session:
+                rotation.extend((await session.execute(select(SmartWallet.address))).scalars().all())
+            rotation_size = len(rotation)
+            if not rotation:
+                return
+        batch = math.ceil(rotation_size * WALLET_STATS_PREWARM_TICK / WALLET_STATS_REFRESH_INTERVAL)
+        addresses = [rotation.popleft() for _ in range(min(batch, len(rotation)))]
+        await asyncio.gather(*(refresh_wallet_stats(address, period='7d') for address in addresses))
 
     # Only run startup tasks if actually starting up
     tasks_app.add_job(
@@ -27,9 +56,50 @@ def register_tasks(app: Client, tasks_app: AsyncIOScheduler):
         run_date=datetime.now() + timedelta(seconds=3)  # Allow warmup time
     )
 
+    # Lookups work from the on-disk index right away; only refresh it in the
+    # background, and only soon after startup when it's actually stale
     tasks_app.add_job(
-        keep_db_online,
+        refresh_mint_index,
         'interval',
-        minutes=4,
-        next_run_time=datetime.now(UTC) + timedelta(seconds=3)
-    )
\ No newline at end of file
+        hours=24,
+        next_run_time=datetime.now(UTC) + timedelta(
+            seconds=30 if get_token_index().is_stale() else 24 * 60 * 60
+        )
+    )
+
+    # Keep the 7d stats every alert shows warm, well inside WALLET_STATS_TTL
+    tasks_app.add_job(
+        prewarm_wallet_stats,
+        'interval',
+        seconds=WALLET_STATS_PREWARM_TICK,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now(UTC) + timedelta(seconds=5)
+    )
+
+    # Wallets seeded or deleted while running reach Helius as one debounced update
+    tasks_app.add_job(
+        webhook_sync.refresh,
+        'interval',
+        seconds=WEBHOOK_SYNC_INTERVAL,
+        max_instances=1,
+        coalesce=True
+    )
+
+    # Processed webhook signatures only need to outlive Helius' retries
+    tasks_app.add_job(
+        prune_processed_signatures,
+        'interval',
+        hours=1,
+        max_instances=1,
+        coalesce=True
+    )
+
+    # Off-peak rollup of holding history past the retention window
+    tasks_app.add_job(
+        compact_holding_history,
+        'cron',
+        hour=3,
+        minute=30,
+        timezone=UTC
+    )
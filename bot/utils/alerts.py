@@ -0,0 +1,116 @@
+"""
+Buy alert aggregation.
+
+The first tracked wallet buying a mint sends the full token report. Further
+buys of that mint within ALERT_AGGREGATION_WINDOW seconds of the first one
+are added to its "Wallets in" list with edit_message_text instead of sending a
+new report, and reuse the token_info that was fetched for it, so
+process_webhook skips the GMGN token calls for them (see active()).
+
+Two buys landing before either has published can both fetch token_info, but
+the second publish() still joins the first alert.
+"""
+from config.settings import ALERT_AGGREGATION_WINDOW
+from bot.messages.messages import format_aggregated_message
+from bot.keyboards.keyboards import get_buy_button
+from bot.utils.outbound import outbound_queue, PRIORITY_BUY
+from logger.logger import get_logger
+from prometheus_client import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import time
+
+logger = get_logger("alerts")
+
+ALERT_BUYS = Counter("alert_buys_total", "Buy alerts by delivery, a new message or merged into one", ["delivery"])
+
+
+class AggregatedAlert:
+    __slots__ = ("chat_id", "mint", "token_info", "wallets", "opened", "message", "dirty")
+
+    def __init__(self, chat_id: Any, mint: str, token_info: dict, wallet_info: dict):
+        self.chat_id = chat_id
+        self.mint = mint
+        self.token_info = token_info
+        self.wallets: List[dict] = [wallet_info]
+        self.opened = time.monotonic()
+        # The sent Message, None until delivered
+        self.message = None
+        # Wallets joined before the first message was delivered
+        self.dirty = False
+
+    def render(self) -> Tuple[str, Dict[str, Any]]:
+        ca = self.token_info.get('profile', {}).get('ca', self.mint)
+        return format_aggregated_message(self.token_info, self.wallets), {
+            "reply_markup": get_buy_button(ca),
+            "disable_web_page_preview": False,
+        }
+
+
+class AlertAggregator:
+    def __init__(self, window: float = ALERT_AGGREGATION_WINDOW):
+        """
+        Args:
+            window (float): Seconds after the first buy during which later buys are merged.
+        """
+        self.window = window
+        self._alerts: Dict[Tuple[Any, str], AggregatedAlert] = {}
+
+    def active(self, chat_id: Any, mint: str) -> Optional[AggregatedAlert]:
+        """The open alert for mint in chat, if a buy for it was published within the window"""
+        alert = self._alerts.get((chat_id, mint))
+        if alert is not None and time.monotonic() - alert.opened >= self.window:
+            del self._alerts[(chat_id, mint)]
+            return None
+        return alert
+
+    def publish(self, chat_id: Any, mint: str, token_info: dict, wallet_info: dict) -> Optional[asyncio.Future]:
+        """
+        Sends a new alert for the buy, or adds it to the mint's open alert.
+
+        Returns:
+            Optional[asyncio.Future]: Resolves to the sent or edited Message (None if
+            that failed). None when the edit waits for the first message to be delivered.
+        """
+        self._prune()
+        alert = self.active(chat_id, mint)
+        if alert is None:
+            alert = AggregatedAlert(chat_id, mint, token_info, wallet_info)
+            self._alerts[(chat_id, mint)] = alert
+            text, kwargs = alert.render()
+            sent = outbound_queue.send(chat_id, text, priority=PRIORITY_BUY, **kwargs)
+            sent.add_done_callback(lambda future: self._delivered(alert, future))
+            ALERT_BUYS.labels("new").inc()
+            return sent
+
+        alert.wallets.append(wallet_info)
+        ALERT_BUYS.labels("merged").inc()
+        logger.debug("Merged buy of %s into alert with %d wallets", mint, len(alert.wallets))
+        if alert.message is None:
+            alert.dirty = True
+            return None
+        return self._edit(alert)
+
+    def _edit(self, alert: AggregatedAlert) -> asyncio.Future:
+        text, kwargs = alert.render()
+        return outbound_queue.edit(alert.chat_id, alert.message.id, text, priority=PRIORITY_BUY, **kwargs)
+
+    def _delivered(self, alert: AggregatedAlert, future: asyncio.Future) -> None:
+        alert.message = future.result()
+        if alert.message is None:
+            # Nothing to edit, the next buy opens a new alert
+            if self._alerts.get((alert.chat_id, alert.mint)) is alert:
+                del self._alerts[(alert.chat_id, alert.mint)]
+            return
+        if alert.dirty:
+            alert.dirty = False
+            self._edit(alert)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, alert in self._alerts.items() if now - alert.opened >= self.window]
+        for key in expired:
+            del self._alerts[key]
+
+
+alert_aggregator = AlertAggregator()
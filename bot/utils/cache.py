@@ -0,0 +1,105 @@
+"""
+In-process caches.
+
+Plain dict-backed structures for the single event loop the bot runs on, no
+locking. Every cache counts hits and misses so its hit rate can be logged or
+exported.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+import time
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024):
+        """
+        Args:
+            maxsize (int): Entries kept before the least recently used one is evicted.
+        """
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Invalidate a key. Returns the cached value, if any."""
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries go stale `ttl` seconds after they were set"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self.stale_hits = 0
+
+    def set(self, key: Hashable, value: Any) -> None:
+        super().set(key, (value, time.monotonic() + self.ttl))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Fresh value for key, or default when missing or stale"""
+        value, fresh = self.lookup(key)
+        return value if fresh else default
+
+    def lookup(self, key: Hashable) -> Tuple[Any, bool]:
+        """
+        Returns (value, fresh). Stale values are still returned so callers can
+        serve them while refreshing; (None, False) when the key is missing.
+        """
+        entry = super().get(key, _MISSING)
+        if entry is _MISSING:
+            return None, False
+        value, expires_at = entry
+        if time.monotonic() < expires_at:
+            return value, True
+        # Counted as a hit by LRUCache.get, but the caller still has to refresh
+        self.hits -= 1
+        self.misses += 1
+        self.stale_hits += 1
+        return value, False
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["stale_hits"] = self.stale_hits
+        return stats
@@ -0,0 +1,181 @@
+"""
+Lot-based cost basis tracking for wallet PNL.
+
+Each mint a wallet touched gets a Position holding its open lots, either as a
+FIFO queue or as a single average-cost pool. Every value is in SOL. Objects
+use __slots__ so a ledger per wallet stays small enough to keep thousands of
+wallets in memory at once.
+"""
+from collections import deque
+from typing import Dict, Iterator, Optional, Tuple
+
+FIFO = "fifo"
+AVERAGE = "average"
+COST_METHODS = (FIFO, AVERAGE)
+
+# Amounts below this are treated as fully consumed (float dust from partial sells)
+DUST = 1e-12
+
+
+class Lot:
+    """An open lot: tokens still held and the SOL paid for them."""
+    __slots__ = ("amount", "cost")
+
+    def __init__(self, amount: float, cost: float):
+        self.amount = amount
+        self.cost = cost
+
+
+class Position:
+    """Open lots and running totals for one mint in one wallet."""
+    __slots__ = (
+        "method", "lots", "amount", "cost",
+        "bought", "invested", "buys",
+        "sold", "proceeds", "sold_cost", "realized", "sells",
+        "routed_in", "routed_out",
+    )
+
+    def __init__(self, method: str = FIFO):
+        if method not in COST_METHODS:
+            raise ValueError(f"Unknown cost method: {method}")
+        self.method = method
+        # Average-cost positions only need the running totals below
+        self.lots = deque() if method == FIFO else None
+        self.amount = 0.0       # tokens currently held
+        self.cost = 0.0         # SOL basis of the tokens currently held
+        self.bought = 0.0       # tokens bought with SOL
+        self.invested = 0.0     # SOL spent on buys
+        self.buys = 0
+        self.sold = 0.0         # tokens sold for SOL
+        self.proceeds = 0.0     # SOL received from sells
+        self.sold_cost = 0.0    # basis of the tokens sold for SOL
+        self.realized = 0.0
+        self.sells = 0
+        self.routed_in = 0.0    # tokens received through token-to-token routes or transfers
+        self.routed_out = 0.0   # tokens sent through token-to-token routes or transfers
+
+    def acquire(self, amount: float, cost: float) -> None:
+        """Open a lot of `amount` tokens with a total basis of `cost` SOL."""
+        if amount <= 0:
+            return
+        if self.lots is not None:
+            self.lots.append(Lot(amount, cost))
+        self.amount += amount
+        self.cost += cost
+
+    def dispose(self, amount: float) -> float:
+        """
+        Remove `amount` tokens from the open lots.
+
+        Returns:
+            float: The SOL basis of the removed tokens. Tokens disposed beyond
+            what is held (e.g. bought before the history window) carry no basis.
+        """
+        if amount <= 0 or self.amount <= 0:
+            return 0.0
+
+        if self.lots is None:
+            take = min(amount, self.amount)
+            basis = self.cost * take / self.amount
+        else:
+            remaining = amount
+            basis = 0.0
+            while remaining > DUST and self.lots:
+                lot = self.lots[0]
+                if lot.amount <= remaining + DUST:
+                    basis += lot.cost
+                    remaining -= lot.amount
+                    self.lots.popleft()
+                else:
+                    part = lot.cost * remaining / lot.amount
+                    lot.amount -= remaining
+                    lot.cost -= part
+                    basis += part
+                    remaining = 0.0
+            take = amount - max(remaining, 0.0)
+
+        self.amount -= take
+        self.cost -= basis
+        if self.amount <= DUST:
+            self.amount = 0.0
+            self.cost = 0.0
+            if self.lots is not None:
+                self.lots.clear()
+        return basis
+
+    def buy(self, amount: float, sol: float) -> None:
+        self.acquire(amount, sol)
+        self.bought += amount
+        self.invested += sol
+        self.buys += 1
+
+    def sell(self, amount: float, sol: float) -> float:
+        """Sell `amount` tokens for `sol` and return the realized PNL of the sale."""
+        basis = self.dispose(amount)
+        pnl = sol - basis
+        self.sold += amount
+        self.proceeds += sol
+        self.sold_cost += basis
+        self.realized += pnl
+        self.sells += 1
+        return pnl
+
+    def unrealized(self, price: float) -> float:
+        """Mark the open lots to `price` (SOL per token)."""
+        return self.amount * price - self.cost if self.amount > 0 else 0.0
+
+
+class CostBasisLedger:
+    """All positions of a single wallet, updated swap by swap in slot order."""
+    __slots__ = ("method", "positions")
+
+    def __init__(self, method: str = FIFO):
+        if method not in COST_METHODS:
+            raise ValueError(f"Unknown cost method: {method}")
+        self.method = method
+        self.positions: Dict[str, Position] = {}
+
+    def position(self, mint: str) -> Position:
+        position = self.positions.get(mint)
+        if position is None:
+            position = self.positions[mint] = Position(self.method)
+        return position
+
+    def get(self, mint: str) -> Optional[Position]:
+        return self.positions.get(mint)
+
+    def buy(self, mint: str, amount: float, sol: float) -> None:
+        self.position(mint).buy(amount, sol)
+
+    def sell(self, mint: str, amount: float, sol: float) -> float:
+        return self.position(mint).sell(amount, sol)
+
+    def route(self, mint_in: str, amount_in: float, mint_out: str, amount_out: float) -> None:
+        """
+        Token-to-token swap: no SOL changes hands, so nothing is realized and
+        the basis of the tokens given up carries over to the tokens received.
+        """
+        source = self.position(mint_in)
+        basis = source.dispose(amount_in)
+        source.routed_out += amount_in
+        target = self.position(mint_out)
+        target.acquire(amount_out, basis)
+        target.routed_in += amount_out
+
+    def receive(self, mint: str, amount: float) -> None:
+        """Tokens arriving without payment (airdrops, transfers) open a zero-cost lot."""
+        position = self.position(mint)
+        position.acquire(amount, 0.0)
+        position.routed_in += amount
+
+    def send(self, mint: str, amount: float) -> None:
+        """Tokens leaving without payment close lots without realizing anything."""
+        position = self.position(mint)
+        position.dispose(amount)
+        position.routed_out += amount
+
+    def __iter__(self) -> Iterator[Tuple[str, Position]]:
+        return iter(self.positions.items())
+
+    def __len__(self) -> int:
+        return len(self.positions)
@@ -1,34 +1,91 @@
-from sqlalchemy import select
-from database.database import AsyncSession, User
-from logger.logger import logger
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from database.database import AsyncSessionFactory, User
+from config.settings import USER_CACHE_SIZE
+from bot.utils.cache import LRUCache
+from bot.utils.metrics import register_cache
+from logger.logger import get_logger
 
 from pyrogram.types import Message, CallbackQuery
-from typing import Callable, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Optional, Union
 from functools import wraps
 
+logger = get_logger("decorators")
+
+
+class CachedUser:
+    """Detached snapshot of a users row, safe to keep across sessions"""
+    __slots__ = ("id", "user_id", "username", "first_name", "last_name", "language", "is_active")
+
+    def __init__(self, row: User):
+        for field in self.__slots__:
+            setattr(self, field, getattr(row, field))
+
+
+user_cache = LRUCache(USER_CACHE_SIZE)
+register_cache("users", user_cache)
+
+
+async def load_user(session: AsyncSession, from_user) -> CachedUser:
+    """
+    Returns the cached user, or reads (and creates on first contact) its row.
+
+    Args:
+        session (AsyncSession): Only used on a cache miss.
+        from_user: The pyrogram User who sent the update.
+    """
+    user = user_cache.get(from_user.id)
+    if user is not None:
+        return user
+
+    row = (await session.execute(select(User).where(User.user_id == from_user.id))).scalars().first()
+    if row is None:
+        # Concurrent first commands from the same user race on the unique user_id
+        await session.execute(
+            insert(User).values(
+                user_id=from_user.id,
+                username=from_user.username,
+                first_name=from_user.first_name,
+                last_name=from_user.last_name,
+            ).on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        await session.commit()
+        row = (await session.execute(select(User).where(User.user_id == from_user.id))).scalars().one()
+
+    user = CachedUser(row)
+    user_cache.set(user.user_id, user)
+    return user
+
+
+async def update_user(session: AsyncSession, user_id: int, **values) -> Optional[CachedUser]:
+    """
+    Updates a users row, commits and refreshes its cache entry.
+
+    Returns:
+        Optional[CachedUser]: The updated user, or None if it doesn't exist.
+    """
+    user_cache.pop(user_id)
+    row = (await session.execute(
+        update(User).where(User.user_id == user_id).values(**values).returning(User)
+    )).scalars().first()
+    await session.commit()
+    if row is None:
+        return None
+    user = CachedUser(row)
+    user_cache.set(user_id, user)
+    return user
+
+
 def get_user():
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(client, update: Union[Message, CallbackQuery], *args, **kwargs):
-            async with AsyncSession() as session:
+            # A session only checks out a pooled connection on its first query,
+            # so cached users reach the handler without touching the database
+            async with AsyncSessionFactory() as session:
                 try:
-                    user_id = update.from_user.id
-                    result = await session.execute(
-                        select(User).where(User.user_id == user_id)
-                    )
-                    user = result.scalars().first()
-                    
-                    if not user:
-                        user = User(
-                            user_id=user_id,
-                            username=update.from_user.username,
-                            first_name=update.from_user.first_name,
-                            last_name=update.from_user.last_name
-                        )
-                        session.add(user)
-                        await session.commit()
-                        await session.refresh(user)
-                    
+                    user = await load_user(session, update.from_user)
                     return await func(client, update, user, session, *args, **kwargs)
                 except Exception as e:
                     await session.rollback()
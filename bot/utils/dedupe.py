@@ -0,0 +1,99 @@
+"""
+Webhook delivery dedupe by transaction signature.
+
+Helius retries deliveries it considers slow, so the same swap can arrive more
+than once. claim_signature() runs before any enrichment: signatures seen in
+the last SIGNATURE_DEDUPE_TTL seconds are answered from a bounded in-memory
+cache, anything else is claimed with an INSERT ... ON CONFLICT DO NOTHING into
+processed_signatures, which also catches retries that arrive after a restart.
+
+A delivery is claimed when it arrives, not when its alert is sent, so a retry
+of a delivery that failed halfway is still dropped. Missed alerts are rare;
+duplicate alerts and doubled GMGN load were not.
+"""
+from config.settings import SIGNATURE_DEDUPE_SIZE, SIGNATURE_DEDUPE_TTL, SIGNATURE_RETENTION_HOURS, COMPACTION_BATCH_SIZE
+from database.database import AsyncSessionFactory, ProcessedSignature
+from bot.utils.cache import TTLCache
+from bot.utils.metrics import register_cache, WEBHOOK_DUPLICATES
+from logger.logger import get_logger
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta, UTC
+
+logger = get_logger("dedupe")
+
+signature_cache = TTLCache(SIGNATURE_DEDUPE_SIZE, SIGNATURE_DEDUPE_TTL)
+register_cache("signatures", signature_cache)
+
+PRUNE_BATCH_SQL = text("""
+    DELETE FROM processed_signatures
+    WHERE signature IN (
+        SELECT signature FROM processed_signatures
+        WHERE received_at < :cutoff
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+async def claim_signature(signature: str) -> bool:
+    """
+    Claims a webhook transaction for processing.
+
+    Returns:
+        bool: True if this is the first delivery of `signature`, False for a duplicate.
+            Also True when the table can't be reached, a possible duplicate alert beats a lost one.
+    """
+    if signature_cache.get(signature) is not None:
+        WEBHOOK_DUPLICATES.labels("memory").inc()
+        return False
+    # Remembered before the INSERT is awaited, so a concurrent retry is caught in memory
+    signature_cache.set(signature, True)
+
+    try:
+        async with AsyncSessionFactory() as session:
+            claimed = (await session.execute(
+                insert(ProcessedSignature)
+                .values(signature=signature, received_at=datetime.now(UTC))
+                .on_conflict_do_nothing(index_elements=["signature"])
+                .returning(ProcessedSignature.signature)
+            )).scalar_one_or_none()
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Error claiming signature {signature}: {e}")
+        return True
+
+    if claimed is None:
+        WEBHOOK_DUPLICATES.labels("database").inc()
+        return False
+    return True
+
+
+async def prune_processed_signatures(
+    retention_hours: int = SIGNATURE_RETENTION_HOURS,
+    batch_size: int = COMPACTION_BATCH_SIZE
+) -> int:
+    """
+    Deletes processed_signatures rows older than `retention_hours`, one
+    committed batch at a time.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    cutoff = datetime.now(UTC) - timedelta(hours=retention_hours)
+    total = 0
+    try:
+        while True:
+            async with AsyncSessionFactory() as session:
+                result = await session.execute(PRUNE_BATCH_SQL, {"cutoff": cutoff, "batch_size": batch_size})
+                deleted = result.rowcount
+                await session.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+    except Exception as e:
+        logger.error(f"Processed signatures pruning error: {str(e)}")
+
+    if total:
+        logger.info(f"Pruned {total} processed signatures older than {retention_hours} hours")
+    return total
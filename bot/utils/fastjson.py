@@ -0,0 +1,114 @@
+"""
+Fast JSON encoding and decoding.
+
+loads() and dumps() use orjson when it is installed and the standard library
+otherwise (JSON_BACKEND=json forces the fallback). They take and return bytes,
+so bodies go from the socket to the parser without a detour through str.
+
+decode_transactions() parses Helius enhanced transactions, webhook
+deliveries and the transactions API alike, with a msgspec decoder typed by the
+fields the pipeline actually reads (see HeliusTransaction). accountData,
+instructions, events and the rest are skipped by the parser instead of being
+built into dicts and dropped. The result is still plain dicts and lists, and
+anything that doesn't fit the schema is decoded with loads() instead.
+
+JSON_BACKEND is read from the environment here rather than from
+config.settings, so gmgn/client.py can use loads() without a wallet key or a
+database configured (like config/endpoints.py).
+"""
+from dotenv import load_dotenv
+from logger.logger import get_logger
+from starlette.responses import JSONResponse
+from typing import Any, Callable, List, Optional, TypedDict, Union
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = get_logger("fastjson")
+
+load_dotenv()
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()  # "json" disables orjson/msgspec, e.g. to compare
+
+if JSON_BACKEND != "json" and orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    BACKEND = "json"
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class TokenTransfer(TypedDict, total=False):
+    fromUserAccount: Optional[str]
+    toUserAccount: Optional[str]
+    mint: Optional[str]
+    tokenAmount: Optional[float]
+
+
+class NativeTransfer(TypedDict, total=False):
+    fromUserAccount: Optional[str]
+    toUserAccount: Optional[str]
+    amount: Optional[int]
+
+
+class HeliusTransaction(TypedDict, total=False):
+    """What monitor, swaps, dedupe and pnl read from an enhanced transaction"""
+    signature: Optional[str]
+    slot: Optional[int]
+    timestamp: Optional[int]
+    type: Optional[str]
+    source: Optional[str]
+    fee: Optional[int]
+    feePayer: Optional[str]
+    transactionError: Any
+    tokenTransfers: Optional[List[TokenTransfer]]
+    nativeTransfers: Optional[List[NativeTransfer]]
+
+
+_transactions_decoder = (
+    msgspec.json.Decoder(List[HeliusTransaction]) if msgspec is not None and JSON_BACKEND != "json" else None
+)
+
+
+def decode_transactions(body: bytes) -> Any:
+    """
+    Parses a JSON array of Helius enhanced transactions, keeping only the
+    fields in HeliusTransaction. Bodies that aren't such an array are parsed
+    in full.
+
+    Raises:
+        ValueError: If the body isn't JSON at all.
+    """
+    if _transactions_decoder is not None:
+        try:
+            return _transactions_decoder.decode(body)
+        except msgspec.ValidationError as e:
+            logger.warning(f"Helius payload outside the expected schema, parsing in full: {e}")
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return loads(body)
+
+
+class FastJSONResponse(JSONResponse):
+    """FastAPI response class rendering with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
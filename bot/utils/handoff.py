@@ -0,0 +1,192 @@
+"""
+Alert handoff from follower workers to the leader.
+
+Every worker enriches the webhooks it receives, but only the leader
+(bot/utils/leader.py) has the Telegram client, the outbound queue and the
+alert aggregator. A follower writes the finished alert to pending_alerts and
+NOTIFYs in the same transaction. The leader's AlertRelay LISTENs, takes rows
+with DELETE ... RETURNING and publishes them as if it had processed the
+webhook itself, so buys of one mint still merge into one message whichever
+worker received them.
+
+Rows outlive the leader. A new leader starts by draining what is left, and
+the relay also polls every LEADER_POLL_INTERVAL in case a notification was
+missed. Alerts a leader took and had not sent when it died are lost, like
+the rest of its outbound queue.
+"""
+from config.settings import HANDOFF_BATCH_SIZE, LEADER_POLL_INTERVAL
+from database.database import AsyncSessionFactory, PendingAlert, connect_raw
+from bot.utils.fastjson import dumps, loads
+from logger.logger import get_logger
+from prometheus_client import Counter
+from sqlalchemy import text
+from datetime import datetime, timedelta, UTC
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import time
+
+logger = get_logger("handoff")
+
+CHANNEL = "pending_alerts"
+
+ALERT_HANDOFFS = Counter("alert_handoffs_total", "Alerts passed from follower workers to the leader", ["stage"])
+
+TAKE_BATCH_SQL = text("""
+    DELETE FROM pending_alerts
+    WHERE id IN (
+        SELECT id FROM pending_alerts
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, chat_id, mint, is_buy, payload, source, received_at
+""")
+
+
+def _plain(value: Any) -> Any:
+    # numpy counts from the holder analysis
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def hand_off(
+    chat_id: Any,
+    mint: str,
+    is_buy: bool,
+    token_info: dict,
+    wallet_info: dict,
+    source: Optional[str] = None,
+    received_at: Optional[float] = None,
+) -> bool:
+    """
+    Queues an alert for the leader to send.
+
+    Args:
+        received_at (float): time.perf_counter() when the delivery arrived, carried over
+            as wall-clock time so the leader can observe the alert latency.
+
+    Returns:
+        bool: True if the alert was stored, False if the database couldn't be reached.
+    """
+    age = time.perf_counter() - received_at if received_at is not None else 0.0
+    try:
+        async with AsyncSessionFactory() as session:
+            session.add(PendingAlert(
+                chat_id=str(chat_id),
+                mint=mint,
+                is_buy=is_buy,
+                payload=dumps({"token_info": token_info, "wallet_info": wallet_info}, default=_plain).decode(),
+                source=source,
+                received_at=datetime.now(UTC) - timedelta(seconds=age),
+            ))
+            # Delivered to the leader when the transaction commits
+            await session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": CHANNEL})
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Error handing off alert for {mint}: {e}")
+        return False
+    ALERT_HANDOFFS.labels("queued").inc()
+    return True
+
+
+class AlertRelay:
+    def __init__(self, batch_size: int = HANDOFF_BATCH_SIZE, interval: float = LEADER_POLL_INTERVAL):
+        """
+        Args:
+            batch_size (int): Rows taken per query.
+            interval (float): Seconds between polls when no notification arrives.
+        """
+        self.batch_size = batch_size
+        self.interval = interval
+        self._publish: Optional[Callable[..., Awaitable]] = None
+        self._conn = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.relayed = 0
+        self.failed = 0
+
+    async def start(self, publish: Callable[..., Awaitable]) -> None:
+        """
+        Starts relaying on the leader.
+
+        Args:
+            publish: Awaited with (chat_id, mint, is_buy, token_info, wallet_info, source, received_at)
+                for every handed off alert, see bot.utils.monitor.deliver_alert.
+        """
+        self._publish = publish
+        try:
+            self._conn = await connect_raw()
+            await self._conn.add_listener(CHANNEL, self._notified)
+        except Exception as e:
+            logger.error(f"Error listening for handed off alerts, polling every {self.interval}s: {e}")
+            self._conn = None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _notified(self, connection, pid, channel, payload) -> None:
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            # Cleared first, a notification that arrives while draining starts another pass
+            self._wakeup.clear()
+            while await self.drain() >= self.batch_size:
+                pass
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self) -> int:
+        """
+        Publishes up to batch_size handed off alerts, oldest first.
+
+        Returns:
+            int: Number of alerts taken from the table.
+        """
+        try:
+            async with AsyncSessionFactory() as session:
+                rows = (await session.execute(TAKE_BATCH_SQL, {"batch_size": self.batch_size})).all()
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error taking handed off alerts: {e}")
+            return 0
+
+        for row in sorted(rows, key=lambda row: row.id):
+            # Back on this process' perf_counter clock
+            age = (datetime.now(UTC) - row.received_at).total_seconds()
+            try:
+                payload = loads(row.payload)
+                await self._publish(
+                    row.chat_id, row.mint, row.is_buy, payload["token_info"], payload["wallet_info"],
+                    row.source, time.perf_counter() - age,
+                )
+                self.relayed += 1
+                ALERT_HANDOFFS.labels("relayed").inc()
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error relaying alert for {row.mint}: {e}")
+        return len(rows)
+
+    async def stop(self) -> None:
+        """Stops relaying, rows still in the table are left for the next leader"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            try:
+                await self._conn.close(timeout=self.interval)
+            except Exception:
+                self._conn.terminate()
+            self._conn = None
+        logger.info(f"Alert relay stopped: {self.relayed} relayed, {self.failed} failed")
+
+
+alert_relay = AlertRelay()
@@ -1,4 +1,4 @@
-from logger.logger import logger
+from logger.logger import get_logger
 from typing import Any, Dict, Optional, Union
 from config.settings import SOLANA_RPC_NODE, JUP_API
 import asyncio
@@ -6,16 +6,20 @@ import base64
 import aiohttp
 import statistics
 import time
-import json
 from solana.rpc.async_api import AsyncClient
 from solders.message import to_bytes_versioned  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 from solana.rpc.commitment import Processed
 from solana.rpc.types import TxOpts
 from config.settings import payer_keypair
+from bot.utils.metrics import http_trace, track_call
+from bot.utils.fastjson import dumps, loads
+
+logger = get_logger("jupiter_swap")
 
 async def get_recent_blockhash(client: AsyncClient):
-    response = await client.get_latest_blockhash()
+    with track_call("solana_rpc", "get_latest_blockhash"):
+        response = await client.get_latest_blockhash()
     return response.value.blockhash, response.value.last_valid_block_height
 
 # Get the data on the priority fees over the last 150 blocks.
@@ -32,9 +36,9 @@ async def get_recent_prioritization_fees(client: AsyncClient, input_mint: str):
     }
     await client.is_connected()
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("solana_rpc", "getRecentPrioritizationFees")]) as session:
             async with session.post(client._provider.endpoint_uri, json=body) as response:
-                json_response = await response.json()
+                json_response = await response.json(loads=loads)
                 logger.info(f"Prioritization fee response: {json_response}")
                 if json_response and "result" in json_response:
                     fees = [fee["prioritizationFee"] for fee in json_response["result"]]
@@ -56,7 +60,7 @@ async def get_quote(input_mint: str, output_mint: str, amount: int, slippage_bps
     }
     headers = {'Accept': 'application/json'}
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("jupiter", "quote")]) as session:
             async with session.get(
                 quote_url,
                 headers=headers,
@@ -64,18 +68,18 @@ async def get_quote(input_mint: str, output_mint: str, amount: int, slippage_bps
                 timeout=10
             ) as response:
                 if response.status == 422:
-                    error_data = await response.json()
+                    error_data = await response.json(loads=loads)
                     logger.error(f"Jupiter quote API validation error: {error_data}")
                     return None
                 response.raise_for_status()
-                return await response.json()
+                return await response.json(loads=loads)
     except aiohttp.ClientError as e:
         logger.error(f"Error getting quote from Jupiter: {e}")
         return None
 
 async def get_swap(wallet_address: str, quote_response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     swap_url = f"{JUP_API}/swap"
-    swap_data = json.dumps({
+    swap_data = dumps({
         "quoteResponse": quote_response,
         "userPublicKey": wallet_address,
         "wrapAndUnwrapSol": True,
@@ -93,7 +97,7 @@ async def get_swap(wallet_address: str, quote_response: Dict[str, Any]) -> Optio
         'Accept': 'application/json'
     }
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("jupiter", "swap")]) as session:
             async with session.post(
                 swap_url,
                 data=swap_data,
@@ -101,11 +105,11 @@ async def get_swap(wallet_address: str, quote_response: Dict[str, Any]) -> Optio
                 timeout=10
             ) as response:
                 if response.status == 422:
-                    error_data = await response.json()
+                    error_data = await response.json(loads=loads)
                     logger.error(f"Jupiter swap API validation error: {error_data}")
                     return None
                 response.raise_for_status()
-                swap_response = await response.json()
+                swap_response = await response.json(loads=loads)
                 logger.info(f"Swap response: {swap_response}")
                 return swap_response                
     except aiohttp.ClientError as e:
@@ -132,9 +136,10 @@ async def jupiter_swap(input_mint, output_mint, amount, auto_multiplier, slippag
             # logger.info(f"Final transaction to be sent: {signed_tx}")
             logger.info("Sending transaction...")
             try:
-                txn_sig = await client.send_raw_transaction(
-                    txn=bytes(signed_txn), opts=opts
-                )
+                with track_call("solana_rpc", "send_raw_transaction"):
+                    txn_sig = await client.send_raw_transaction(
+                        txn=bytes(signed_txn), opts=opts
+                    )
                 return txn_sig            
             except Exception as e:
                 logger.error(f"Failed to send transaction: {str(e)}")
@@ -147,7 +152,8 @@ async def wait_for_confirmation(client, signature, max_timeout=60):
     start_time = time.time()
     while time.time() - start_time < max_timeout:
         try:
-            status = await client.get_signature_statuses([signature])
+            with track_call("solana_rpc", "get_signature_statuses"):
+                status = await client.get_signature_statuses([signature])
             if status.value[0] is not None:
                 return status.value[0].confirmation_status
         except Exception as e:
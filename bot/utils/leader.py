@@ -0,0 +1,156 @@
+"""
+Leader election between webhook workers.
+
+Every worker serves /webhooks, but the scheduler jobs, the Helius webhook
+sync and the Telegram client must run exactly once. Workers compete for a
+session-level Postgres advisory lock (LEADER_LOCK_ID) on a connection of
+their own, and the holder is the leader for as long as that session lasts.
+Followers retry every LEADER_POLL_INTERVAL seconds. The leader runs a query
+on its connection at the same interval, and when that fails the lock has
+gone with the session, so it steps down before another worker takes over.
+
+A leader that crashes or is killed closes its connection and Postgres
+releases the lock, so a follower is elected within one interval. One whose
+duties fail to start steps down the same way: the partial start is undone
+and the lock released, and the next attempt, on any worker, starts over. A leader
+cut off from the database by the network keeps the lock until Postgres
+notices the dead peer, which TCP keepalives bound.
+
+With LEADER_ELECTION off (a single worker) the process is the leader from
+the start and no lock is taken. Duties that fail to start are retried every
+interval there too.
+"""
+from config.settings import LEADER_ELECTION, LEADER_LOCK_ID, LEADER_POLL_INTERVAL
+from database.database import connect_raw
+from logger.logger import get_logger
+from prometheus_client import Gauge
+from typing import Awaitable, Callable, Optional
+import asyncio
+import os
+
+logger = get_logger("leader")
+
+IS_LEADER = Gauge("worker_is_leader", "1 on the worker that holds the leader lock", multiprocess_mode="liveall")
+
+
+class LeaderElection:
+    def __init__(
+        self,
+        enabled: bool = LEADER_ELECTION,
+        lock_id: int = LEADER_LOCK_ID,
+        interval: float = LEADER_POLL_INTERVAL,
+        connect: Callable[[], Awaitable] = connect_raw,
+    ):
+        """
+        Args:
+            enabled (bool): Compete for the lock. When False this process is always the leader.
+            lock_id (int): Advisory lock key shared by all workers.
+            interval (float): Seconds between lock attempts, and between the leader's liveness checks.
+            connect: Opens the dedicated connection the lock is held on.
+        """
+        self.enabled = enabled
+        self.lock_id = lock_id
+        self.interval = interval
+        self._connect = connect
+        self._conn = None
+        self._leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callable[[], Awaitable]] = None
+        self._on_demoted: Optional[Callable[[], Awaitable]] = None
+
+        # Stats
+        self.elections = 0
+        self.demotions = 0
+
+    @property
+    def is_leader(self) -> bool:
+        """True on the worker that runs the jobs and the Telegram client"""
+        return self._leader or not self.enabled
+
+    async def start(self, on_elected: Callable[[], Awaitable], on_demoted: Callable[[], Awaitable]) -> None:
+        """
+        Makes a first attempt for the lock, then keeps trying in the background.
+
+        Args:
+            on_elected: Awaited when this worker becomes the leader.
+            on_demoted: Awaited when it stops being the leader, including on stop().
+        """
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        await self._attempt()
+        self._task = asyncio.create_task(self._run())
+
+    async def _attempt(self) -> None:
+        if not self.enabled:
+            if not self._leader:
+                await self._promote()
+            return
+        try:
+            if self._leader:
+                # The lock lasts as long as this session, a new connection wouldn't hold it
+                if self._conn is None or self._conn.is_closed():
+                    raise ConnectionError("the session holding the lock has ended")
+                await self._conn.fetchval("SELECT 1", timeout=self.interval)
+                return
+            if self._conn is None or self._conn.is_closed():
+                self._conn = await self._connect()
+            if await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", self.lock_id, timeout=self.interval):
+                await self._promote()
+        except Exception as e:
+            logger.error(f"Leader lock connection failed: {e}")
+            await self._close()
+            if self._leader:
+                await self._demote()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._attempt()
+
+    async def _promote(self) -> None:
+        self._leader = True
+        self.elections += 1
+        IS_LEADER.set(1)
+        logger.info(f"Worker {os.getpid()} is the leader")
+        try:
+            await self._on_elected()
+        except Exception as e:
+            logger.error(f"Error starting leader duties, stepping down: {e}")
+            # Holding the lock without the duties would keep every worker from running them
+            await self._demote()
+            await self._close()
+
+    async def _demote(self) -> None:
+        self._leader = False
+        self.demotions += 1
+        IS_LEADER.set(0)
+        logger.warning(f"Worker {os.getpid()} is no longer the leader")
+        try:
+            await self._on_demoted()
+        except Exception as e:
+            logger.error(f"Error stopping leader duties: {e}")
+
+    async def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                await self._conn.close(timeout=self.interval)
+            except Exception:
+                self._conn.terminate()
+            self._conn = None
+
+    async def stop(self) -> None:
+        """Stops leader duties if this worker has them, then releases the lock for the next worker"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._leader:
+            await self._demote()
+        # Closing the session releases the lock
+        await self._close()
+
+
+leader = LeaderElection()
@@ -0,0 +1,277 @@
+"""
+Prometheus metrics, served by main.py at /metrics.
+
+Call timings share one histogram labelled by service (gmgn, helius, jupiter,
+solana_rpc, telegram) and operation. Pool usage, cache hit rates and write
+buffer stats are read from their owners at scrape time, so the hot paths
+don't pay for them.
+
+With several uvicorn workers (WEB_WORKERS > 1) any one of them answers a
+scrape, so main.py starts them in prometheus_client's multiprocess mode:
+every worker writes its samples to files in PROMETHEUS_MULTIPROC_DIR and
+/metrics merges the files of all workers. Counters and histograms are summed,
+gauges say how in their multiprocess_mode. The stats read at scrape time only
+exist in their own worker, so there each worker copies them into gauges every
+few seconds (StatsPublisher): pool, cache and buffer gauges get a pid label,
+the totals are summed over the live workers.
+"""
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from logger.logger import get_logger
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, Optional
+import aiohttp
+import asyncio
+import os
+import tempfile
+import time
+
+logger = get_logger("metrics")
+
+# Set in the worker processes by enable_multiprocess()
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+WEBHOOKS_RECEIVED = Counter(
+    "webhooks_received_total", "Helius webhook deliveries received"
+)
+WEBHOOK_DUPLICATES = Counter(
+    "webhook_duplicates_total", "Deliveries dropped as already processed, by the layer that caught them", ["layer"]
+)
+WEBHOOK_PROCESSING_SECONDS = Histogram(
+    "webhook_processing_seconds", "Time spent handling one webhook delivery", buckets=LATENCY_BUCKETS
+)
+WEBHOOK_ALERT_LATENCY = Histogram(
+    "webhook_alert_latency_seconds", "Webhook receipt to alert sent", ["source"], buckets=LATENCY_BUCKETS
+)
+CALL_SECONDS = Histogram(
+    "external_call_seconds", "Outbound call latency", ["service", "operation"], buckets=LATENCY_BUCKETS
+)
+CALL_ERRORS = Counter(
+    "external_call_errors_total", "Outbound calls that raised or returned an HTTP error", ["service", "operation"]
+)
+
+
+@contextmanager
+def track_call(service: str, operation: str) -> Iterator[None]:
+    """Times the block as one call and counts it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        CALL_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        CALL_SECONDS.labels(service, operation).observe(time.perf_counter() - started)
+
+
+def tracked(service: str, operation: str) -> Callable:
+    """Decorator form of track_call for sync functions"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_call(service, operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def http_trace(service: str, operation: str) -> aiohttp.TraceConfig:
+    """
+    aiohttp trace hooks timing every request of a session.
+    Pass as ClientSession(trace_configs=[http_trace("helius", "balances")]).
+    """
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, ctx: SimpleNamespace, params) -> None:
+        ctx.started = time.perf_counter()
+
+    async def on_end(session, ctx: SimpleNamespace, params) -> None:
+        CALL_SECONDS.labels(service, operation).observe(time.perf_counter() - ctx.started)
+        if params.response.status >= 400:
+            CALL_ERRORS.labels(service, operation).inc()
+
+    async def on_exception(session, ctx: SimpleNamespace, params) -> None:
+        CALL_SECONDS.labels(service, operation).observe(time.perf_counter() - ctx.started)
+        CALL_ERRORS.labels(service, operation).inc()
+
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    trace.on_request_exception.append(on_exception)
+    return trace
+
+
+class TimedClient:
+    """Proxy timing every method call of a sync API client (e.g. the gmgn wrapper)"""
+
+    def __init__(self, client: Any, service: str):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        return tracked(self._service, name)(attr)
+
+
+# Objects exposing stats(), read on every scrape
+_caches: Dict[str, Any] = {}
+_write_buffers: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    _caches[name] = cache
+
+
+def register_write_buffer(buffer: Any) -> None:
+    _write_buffers[buffer.name] = buffer
+
+
+class _StatsCollector:
+    def describe(self):
+        # Nothing to pre-declare, and collecting at registration would hit the database module
+        return []
+
+    def collect(self):
+        from database.database import pool_stats
+
+        pool = pool_stats()
+        gauges = GaugeMetricFamily("db_pool_connections", "Database pool connections", labels=["state"])
+        for state in ("size", "checked_out", "checked_in", "overflow"):
+            gauges.add_metric([state], pool[state])
+        yield gauges
+        yield CounterMetricFamily("db_pool_checkouts", "Pool checkouts", value=pool["checkouts"])
+        yield CounterMetricFamily("db_pool_checkout_timeouts", "Pool checkouts that timed out", value=pool["timeouts"])
+        yield CounterMetricFamily("db_pool_invalidated", "Pooled connections invalidated", value=pool["invalidated"])
+        yield CounterMetricFamily(
+            "db_pool_checkout_wait_seconds", "Total time spent waiting for a connection", value=pool["wait_seconds_total"]
+        )
+        yield GaugeMetricFamily(
+            "db_pool_checkout_wait_max_seconds", "Longest wait for a connection", value=pool["wait_seconds_max"]
+        )
+
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Cached entries", labels=["cache"])
+        for name, cache in _caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            size.add_metric([name], stats["size"])
+        yield hits
+        yield misses
+        yield size
+
+        pending = GaugeMetricFamily("write_buffer_pending_rows", "Rows waiting for the next flush", labels=["buffer"])
+        written = CounterMetricFamily("write_buffer_rows_written", "Rows flushed", labels=["buffer"])
+        dropped = CounterMetricFamily("write_buffer_rows_dropped", "Rows lost to failed flushes", labels=["buffer"])
+        last_flush = GaugeMetricFamily("write_buffer_last_flush_seconds", "Duration of the last flush", labels=["buffer"])
+        for name, buffer in _write_buffers.items():
+            stats = buffer.stats()
+            pending.add_metric([name], stats["pending"])
+            written.add_metric([name], stats["rows_written"])
+            dropped.add_metric([name], stats["rows_dropped"])
+            last_flush.add_metric([name], stats["last_flush_seconds"])
+        yield pending
+        yield written
+        yield dropped
+        yield last_flush
+
+
+_stats_collector = _StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+class StatsPublisher:
+    """Copies this worker's scrape-time stats into file-backed gauges, multiprocess mode only"""
+
+    def __init__(self, interval: float = 5):
+        """
+        Args:
+            interval (float): Seconds between copies, how stale the merged stats can be.
+        """
+        self.interval = interval
+        self._gauges: Dict[str, Gauge] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not MULTIPROCESS_DIR:
+            return
+        self.publish()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Error publishing worker stats: {e}")
+
+    def publish(self) -> None:
+        for family in _stats_collector.collect():
+            for sample in family.samples:
+                gauge = self._gauges.get(sample.name)
+                if gauge is None:
+                    # Counters add up across workers, gauges stay per worker
+                    gauge = self._gauges[sample.name] = Gauge(
+                        sample.name, family.documentation, sorted(sample.labels),
+                        registry=None, multiprocess_mode="livesum" if family.type == "counter" else "liveall",
+                    )
+                (gauge.labels(**sample.labels) if sample.labels else gauge).set(sample.value)
+
+    async def stop(self) -> None:
+        """Stops publishing and drops this worker's live gauges from the merged output"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if MULTIPROCESS_DIR:
+            multiprocess.mark_process_dead(os.getpid())
+
+
+stats_publisher = StatsPublisher()
+
+
+def enable_multiprocess() -> str:
+    """
+    Creates a metrics directory for this run and points the worker processes
+    started afterwards at it. Call before uvicorn spawns them.
+
+    Returns:
+        str: The directory, to be removed once the workers have exited.
+    """
+    directory = tempfile.mkdtemp(prefix="prometheus-")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def _mark_dead_workers() -> None:
+    # Workers that crashed never ran StatsPublisher.stop(), their live gauges would stay forever
+    for path in Path(MULTIPROCESS_DIR).glob("gauge_live*_*.db"):
+        pid = int(path.stem.rsplit("_", 1)[1])
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            multiprocess.mark_process_dead(pid)
+        except PermissionError:
+            pass
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Returns the exposition payload and its content type, merged over all workers in multiprocess mode"""
+    if not MULTIPROCESS_DIR:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    _mark_dead_workers()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
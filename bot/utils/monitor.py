@@ -1,15 +1,35 @@
-from logger.logger import logger
-from config.settings import HELIUS_API_KEY, HOMIES_CHAT_ID, WEBHOOK_SECRET, WALLETS, SOL_MINT
+from logger.logger import get_logger
+from config.settings import HELIUS_API_KEY, HELIUS_API_URL, HOMIES_CHAT_ID, WEBHOOK_SECRET, WALLETS
 from database.database import SmartWallet, Token, WalletHoldingHistory, AsyncSessionFactory
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, case
+from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime, timedelta, UTC
+from typing import Optional
 from pyrogram import Client
 import aiohttp
+import asyncio
 from bot.utils.wallet import check_multiple_wallets
 from bot.utils.token import get_token_info, get_wallet_stats
+from bot.utils.token_metrics import get_token_metric_deltas, since_first_snapshot
 from bot.messages.messages import forward_message
+from bot.utils.metrics import http_trace, WEBHOOK_ALERT_LATENCY
+from bot.utils.outbound import outbound_queue, PRIORITY_ALERT, PRIORITY_NOTICE
+from bot.utils.alerts import alert_aggregator
+from bot.utils.handoff import hand_off
+from bot.utils.leader import leader
+from bot.utils.tracing import traced
+from bot.utils.swaps import Swap, decode_swap
+from bot.utils.fastjson import loads
+import time
 
-async def create_swap_webhook(webhook_url: str, addresses: list[str], auth_header: str = None) -> bool:
+logger = get_logger("monitor")
+
+# Holdings seen within this window are not alerted again
+HOLDING_HISTORY_WINDOW = timedelta(hours=24)
+# Rows per INSERT statement, keeps bind parameters well below asyncpg's 32767 limit
+UPSERT_CHUNK_SIZE = 5000
+
+async def create_swap_webhook(webhook_url: str, addresses: list[str], auth_header: str = None) -> Optional[str]:
     """
     Create a Helius webhook monitoring successful swaps for specified addresses.
     
@@ -19,9 +39,9 @@ async def create_swap_webhook(webhook_url: str, addresses: list[str], auth_heade
         auth_header: Optional authentication header for webhook security
     
     Returns:
-        True if webhook created successfully, False otherwise
+        The new webhook's ID, None if creation failed
     """
-    api_url = f"https://api.helius.xyz/v0/webhooks?api-key={HELIUS_API_KEY}"
+    api_url = f"{HELIUS_API_URL}/v0/webhooks?api-key={HELIUS_API_KEY}"
     
     payload = {
         "webhookURL": webhook_url,
@@ -33,30 +53,30 @@ async def create_swap_webhook(webhook_url: str, addresses: list[str], auth_heade
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("helius", "create_webhook")]) as session:
             async with session.post(api_url, json=payload) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await response.json(loads=loads)
                     logger.info(f"Created swap webhook: {data.get('webhookId')}")
-                    return True
+                    return data.get('webhookId')
                 
                 error = await response.text()
                 logger.error(f"Webhook creation failed ({response.status}): {error}")
-                return False
+                return None
                 
     except Exception as e:
         logger.error(f"Webhook creation exception: {str(e)}")
-        return False
+        return None
 
 async def get_webhooks() -> list[dict]:                                                
      """Retrieve all existing webhooks filtered for swap monitoring"""                  
-     api_url = f"https://api.helius.xyz/v0/webhooks?api-key={HELIUS_API_KEY}"           
+     api_url = f"{HELIUS_API_URL}/v0/webhooks?api-key={HELIUS_API_KEY}"           
                                                                                         
      try:                                                                               
-         async with aiohttp.ClientSession() as session:
+         async with aiohttp.ClientSession(trace_configs=[http_trace("helius", "get_webhooks")]) as session:
              async with session.get(api_url) as response:                               
                  if response.status == 200:                                             
-                     all_webhooks = await response.json()                               
+                     all_webhooks = await response.json(loads=loads)                               
                      return [                                                           
                          {
                              "id": wh["webhookId"],
@@ -72,36 +92,23 @@ async def get_webhooks() -> list[dict]:
          logger.error(f"Webhook retrieval failed: {str(e)}")                            
          return []                                                                      
 
-# TODO: GET wallets from database instead of config                                                                                        
-async def edit_webhook(webhook_id: str, new_addresses: list[str] = None, url: str = None) -> bool:
-    """Update existing webhook with new addresses or URL"""                            
-    api_url = f"https://api.helius.xyz/v0/webhooks/{webhook_id}?api-key={HELIUS_API_KEY}"
-    all_addresses = []
-    try:
-        async with AsyncSessionFactory() as session:
-            query = select(SmartWallet.address)
-            result = await session.execute(query)
-            db_addresses = list(result.scalars().all())
-
-            all_addresses = list(set(
-                db_addresses +
-                (new_addresses or [])
-            ))
-    except Exception as e:
-        logger.error(f"Error getting wallet addresses: {str(e)}")
-        return False
-                                                                                        
+async def update_webhook(webhook_id: str, url: str, addresses: list[str]) -> bool:
+    """
+    Replace the URL and address list of an existing swap webhook. Helius has
+    no partial update, the list sent is the list the webhook will cover.
+    """
+    api_url = f"{HELIUS_API_URL}/v0/webhooks/{webhook_id}?api-key={HELIUS_API_KEY}"
     update_data = {
         "webhookURL": url,
         "webhookType": "enhanced",
-        "accountAddresses": all_addresses,
+        "accountAddresses": addresses,
         "transactionTypes": ["SWAP"],
         "txnStatus": "success",
         "authHeader": WEBHOOK_SECRET
     }
-                                                                           
-    try:                                                                               
-        async with aiohttp.ClientSession() as session:
+
+    try:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("helius", "edit_webhook")]) as session:
             async with session.put(
                 api_url,
                 headers=
@@ -109,182 +116,254 @@ async def edit_webhook(webhook_id: str, new_addresses: list[str] = None, url: st
                     "Content-Type": "application/json"
                 },
                 json=update_data
-            ) as response:             
-                if response.status == 200:                                             
-                    logger.info(f"Updated webhook {webhook_id}")                       
-                    return True                                                        
-                logger.error(f"Webhook update failed: {await response.text()}")        
-                return False                                                           
-    except Exception as e:                                                             
-        logger.error(f"Webhook edit error: {str(e)}")                                  
-        return False                                                                   
-                                                                                        
-async def process_webhook(request_data: dict, client: Client):
-    """Handle incoming webhook notifications"""
+            ) as response:
+                if response.status == 200:
+                    logger.info(f"Updated webhook {webhook_id} ({len(addresses)} addresses)")
+                    return True
+                logger.error(f"Webhook update failed: {await response.text()}")
+                return False
+    except Exception as e:
+        logger.error(f"Webhook edit error: {str(e)}")
+        return False
+
+async def delete_webhook(webhook_id: str) -> bool:
+    """Delete a swap webhook, for one left without addresses"""
+    api_url = f"{HELIUS_API_URL}/v0/webhooks/{webhook_id}?api-key={HELIUS_API_KEY}"
+
+    try:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("helius", "delete_webhook")]) as session:
+            async with session.delete(api_url) as response:
+                # Already gone counts as deleted
+                if response.status in (200, 404):
+                    logger.info(f"Deleted webhook {webhook_id}")
+                    return True
+                logger.error(f"Webhook deletion failed ({response.status}): {await response.text()}")
+                return False
+    except Exception as e:
+        logger.error(f"Webhook deletion error: {str(e)}")
+        return False
+
+def describe_swap(swap: Swap, token_name: str) -> str:
+    if swap.source == "PUMP_FUN" and swap.is_buy:
+        return f"""🟢 Bought {swap.out_amount:.2f} of {token_name} in PUMPFUN💊"""
+
+    if swap.is_buy:
+        description = f"🟢 Bought {swap.in_amount:.2f} SOL for {swap.out_amount:.2f} **{token_name}**"
+    elif swap.is_sell:
+        description = f"🔴 Sold {swap.in_amount:.2f} **{token_name}** for {swap.out_amount:.2f} SOL"
+    else:
+        description = f"🔄 Swapped {swap.in_amount:.2f} `{swap.in_mint}` for {swap.out_amount:.2f} **{token_name}**"
+    return description + "\n"
+
+async def find_wallet(owner: str) -> Optional[SmartWallet]:
+    async with AsyncSessionFactory() as session:
+        query = select(SmartWallet).where(SmartWallet.address == owner)
+        return (await session.execute(query)).scalars().first()
+
+async def deliver_alert(
+    chat_id,
+    mint: str,
+    is_buy: bool,
+    token_info: dict,
+    wallet_info: dict,
+    source: Optional[str] = None,
+    received_at: Optional[float] = None,
+) -> Optional[asyncio.Future]:
+    """
+    Sends a swap alert through this worker's outbound queue. Runs on the
+    leader, for its own webhooks and for those followers handed off.
+
+    Args:
+        received_at (float): time.perf_counter() when the delivery arrived, for the alert latency metric.
+
+    Returns:
+        Optional[asyncio.Future]: Resolves to the sent Message, None if nothing was queued.
+    """
+    if is_buy:
+        # Sent ahead of sells and notices, or merged into the mint's open alert
+        sent = alert_aggregator.publish(chat_id, mint, token_info, wallet_info)
+    else:
+        sent = await forward_message(None, None, token_info, chat_id, wallet_info, priority=PRIORITY_ALERT)
+    if sent is not None and received_at is not None:
+        # Observed on delivery, so the latency includes time spent in the outbound queue
+        def observe_latency(future: asyncio.Future):
+            if future.result() is not None:
+                WEBHOOK_ALERT_LATENCY.labels(source or "UNKNOWN").observe(time.perf_counter() - received_at)
+
+        sent.add_done_callback(observe_latency)
+    return sent
+
+async def process_webhook(request_data: dict, client: Client, received_at: Optional[float] = None):
+    """
+    Handle incoming webhook notifications
+
+    The enrichment calls only depend on what the payload already says, so they
+    start together as soon as their input is parsed: wallet stats and the
+    wallet lookup from the owner, token info and its earlier snapshots
+    (bot.utils.token_metrics) from the mint. Alert latency is
+    the slowest of them instead of their sum. If the wallet turns out not to
+    be tracked the GMGN calls are cancelled.
+
+    Buys of a mint that already has an open alert (see bot.utils.alerts) reuse
+    its token_info instead of calling GMGN and are added to that alert.
+    Followers have no open alerts and no Telegram client: they hand the
+    finished alert to the leader (bot.utils.handoff), which merges it there.
+
+    Args:
+        received_at (float): time.perf_counter() when the delivery arrived, for the alert latency metric.
+    """
+    tasks = []
     try:
         # Extract swap transaction details
-        txn = request_data[0]
-        text = ""
-        # FIX: Use the AsyncSessionFactory directly
-        async with AsyncSessionFactory() as session:
-            try:
-                # Unnecessary check if swap is successful because webhook is filtered for success
-                # if txn.get("type") == "SWAP" and txn.get("transactionError") == None:
-                
-                # if source is PUMP_FUN, only one token transfer is expected and ownser is not feePayer
-                if txn.get("source") == "PUMP_FUN":
-                    # Get wallet addresse involved in the swap
-                    owner = txn.get("tokenTransfers", None)[0].get("toUserAccount")
-                    if not owner:                                          
-                        logger.error("No owner in token transfer")         
-                        return
-                    # Query to find a wallet by address
-                    query = select(SmartWallet).where(SmartWallet.address == owner)
-                    result = await session.execute(query)
-                    
-                    # Fetch the first result (if any)
-                    wallet = result.scalars().first()
-                    if not wallet:                                         
-                        logger.warning(f"Unknown wallet performed swap: {owner}")                                                                  
-                        return 
-                    # Format message details
-                    token = txn.get("tokenTransfers", {})[0]
-                    token_mint = token.get("mint", None)
-                    
-                    token_info = await get_token_info(token_mint)
-                    
-                    # Check if token_info is valid
-                    if not token_info:
-                        logger.error(f"Failed to get token info for mint: {token_mint}")
-                        return
-                    
-                    # Safely get token name
-                    token_name = token_info.get('profile', {}).get('name', 'Unknown')
-                    
-                    pnl_data = await get_wallet_stats(wallet.address, period='7d')
-                    wallet_info = {
-                        "name": wallet.name,
-                        "address": wallet.address,
-                        "description": f"""🟢 Bought {token.get('tokenAmount', 0):.2f} of {token_name} in PUMPFUN💊""",
-                        "pnl": pnl_data
-                    }
-                    await forward_message(client, None, token_info, HOMIES_CHAT_ID, wallet_info)
-                else:
-                    owner = txn.get("feePayer", None)
-                    if not owner:                                          
-                        logger.error("No owner in token transfer")         
-                        return
-                    # Query to find a wallet by address
-                    query = select(SmartWallet).where(SmartWallet.address == owner)
-                    result = await session.execute(query)
-                    wallet = result.scalars().first()
-                    if not wallet:                                         
-                        logger.warning(f"Unknown wallet performed swap: {owner}")                                                                  
-                        return
-                    length = len(txn.get("tokenTransfers", {})) 
-                    token_a = txn.get("tokenTransfers", {})[0]
-                    token_b = txn.get("tokenTransfers", {})[length - 1]
-
-                    # Get the token mint address
-                    token_mint = token_a.get("mint") if token_a.get("mint") != SOL_MINT else token_b.get("mint")
-                    
-                    token_info = await get_token_info(token_mint)
-                    
-                    # Check if token_info is valid
-                    if not token_info:
-                        logger.error(f"Failed to get token info for swap")
-                        return
-                    
-                    # Determine if buying or selling based on token types
-                    is_buying = token_a.get("mint") == SOL_MINT
-                    amount_a = token_a.get("tokenAmount", 0)
-                    amount_b = token_b.get("tokenAmount", 0)
-                    
-                    # Safely get token name
-                    token_name = token_info.get('profile', {}).get('name', 'Unknown')
-
-                    if is_buying:
-                        description = f"🟢 Bought {amount_a:.2f} SOL"
-                    else:
-                        description = f"🔴 Sold {amount_a:.2f} **{token_name}**"
-
-                    description += f" for {amount_b:.2f} "
-                    description += "SOL" if token_b.get("mint") == SOL_MINT else f"**{token_name}**"
-                    description += "\n"
-                    
-                    pnl_data = await get_wallet_stats(wallet.address, period='7d')
-                    wallet_info = {
-                        "name": wallet.name,
-                        "address": wallet.address,
-                        "description": description,
-                        "pnl": pnl_data
-                    }
-                    await forward_message(client, None, token_info, HOMIES_CHAT_ID, wallet_info)
-            except Exception as e:
-                logger.error(f"Error process_webhook: {str(e)}")
-                return None
+        # Unnecessary check if swap is successful because webhook is filtered for success
+        swap = decode_swap(request_data[0])
+        if swap is None:
+            logger.error(f"Could not decode swap {request_data[0].get('signature')}")
+            return
+
+        mint = swap.token_mint
+        open_alert = alert_aggregator.active(HOMIES_CHAT_ID, mint) if swap.is_buy else None
+
+        wallet_task = asyncio.create_task(traced("wallet_lookup", find_wallet(swap.owner)))
+        tasks = [wallet_task]
+        if open_alert is None:
+            token_task = asyncio.create_task(traced("get_token_info", get_token_info(mint), mint=mint))
+            # Earlier snapshots, queried before this fetch adds one
+            deltas_task = asyncio.create_task(traced("token_metric_deltas", get_token_metric_deltas(mint), mint=mint))
+            tasks += [token_task, deltas_task]
+        stats_task = asyncio.create_task(traced("get_wallet_stats", get_wallet_stats(swap.owner, period='7d')))
+        tasks.append(stats_task)
+
+        wallet = await wallet_task
+        if not wallet:
+            logger.warning(f"Unknown wallet performed swap: {swap.owner}")
+            return
+
+        token_info = open_alert.token_info if open_alert is not None else await token_task
+        # Check if token_info is valid
+        if not token_info:
+            logger.error(f"Failed to get token info for mint: {mint}")
+            return
+        if open_alert is None:
+            token_info = {**token_info, "history": since_first_snapshot(token_info, await deltas_task)}
+
+        # Safely get token name
+        token_name = token_info.get('profile', {}).get('name', 'Unknown')
+        wallet_info = {
+            "name": wallet.name,
+            "address": wallet.address,
+            "description": describe_swap(swap, token_name),
+            "pnl": await stats_task
+        }
+        alert = (HOMIES_CHAT_ID, mint, swap.is_buy, token_info, wallet_info, swap.source, received_at)
+        if leader.is_leader:
+            await deliver_alert(*alert)
+        else:
+            await hand_off(*alert)
     except Exception as e:
         logger.error(f"Webhook processing error: {str(e)}")
         return None
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
 async def fetch_wallet_holdings(wallet_addresses: list[str]) -> dict:
     """Get ALL token balances for multiple wallets"""
     result = await check_multiple_wallets(wallet_addresses)
     return result
 
+def _holding_alert_text(wallet_name: str, mint: str, symbol: Optional[str]) -> str:
+    return (
+        f"🚨 {wallet_name} acquired NEW TOKEN\n"
+        f"Mint: `{mint}`\n"
+        f"{f'Symbol: {symbol}' if symbol else ''}"
+    )
+
+async def reconcile_holdings(session, holdings_map: dict[str, dict], now: datetime) -> list[tuple[str, str]]:
+    """
+    Set-based diff of current holdings against the recent holding history.
+
+    Loads the last HOLDING_HISTORY_WINDOW of history for every wallet in one
+    query, diffs in memory, then upserts every current (wallet, mint) pair in
+    bulk: new pairs are inserted and known ones get their last_seen bumped, so
+    a token that is still held never counts as new again.
+
+    Returns:
+        list[tuple[str, str]]: The (wallet_address, token_mint) pairs acquired since the window.
+    """
+    current = {
+        (address, mint)
+        for address, mints in holdings_map.items()
+        for mint in mints
+    }
+    if not current:
+        return []
+
+    cutoff = now - HOLDING_HISTORY_WINDOW
+    history = await session.execute(
+        select(WalletHoldingHistory.wallet_address, WalletHoldingHistory.token_mint)
+        .where(
+            WalletHoldingHistory.wallet_address.in_(list(holdings_map)),
+            WalletHoldingHistory.last_seen >= cutoff
+        )
+    )
+    known = {(address, mint) for address, mint in history.all()}
+
+    rows = [
+        {"wallet_address": address, "token_mint": mint, "first_seen": now, "last_seen": now}
+        for address, mint in current
+    ]
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(WalletHoldingHistory).values(rows[i:i + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["wallet_address", "token_mint"],
+            set_={
+                "last_seen": stmt.excluded.last_seen,
+                # A holding that dropped out of the window is a new acquisition
+                "first_seen": case(
+                    (WalletHoldingHistory.last_seen < cutoff, stmt.excluded.first_seen),
+                    else_=WalletHoldingHistory.first_seen
+                )
+            }
+        )
+        await session.execute(stmt)
+
+    return sorted(current - known)
+
 async def monitor_wallets(client: Client):
+    alerts = []
     async with AsyncSessionFactory() as session:
         try:
-            wallets = (await session.execute(select(SmartWallet))).scalars().all()
+            wallets = (await session.execute(select(SmartWallet.address, SmartWallet.name))).all()
             
             if not wallets:
                 return
 
             # Get current holdings for ALL wallets
-            holdings_map = await fetch_wallet_holdings([w.address for w in wallets])
-            
-            # Process each wallet
-            for wallet in wallets:
-                current_mints = holdings_map.get(wallet.address, {})
-                
-                # Get historical holdings from last 24h
-                history = await session.execute(
-                    select(WalletHoldingHistory.token_mint)
-                    .where(
-                        WalletHoldingHistory.wallet_address == wallet.address,
-                        WalletHoldingHistory.last_seen >= datetime.now(UTC) - timedelta(hours=24)
-                    )
-                )
-                known_mints = {m for m in history.scalars().all()}
-                
-                # Find new acquisitions
-                new_mints = set(current_mints.keys()) - known_mints
-                
-                for mint in new_mints:
-                    # Record new holding
-                    session.add(WalletHoldingHistory(
-                        wallet_address=wallet.address,
-                        token_mint=mint,
-                        first_seen=datetime.now(UTC),
-                        last_seen=datetime.now(UTC)
-                    ))
-                    
-                    # Get token info if exists
-                    token = await session.execute(
-                        select(Token).where(Token.ca == mint)
-                    )
-                    token = token.scalar_one_or_none()
-                    
-                    await client.send_message(
-                        chat_id=HOMIES_CHAT_ID,
-                        text=(
-                            f"🚨 {wallet.name} acquired NEW TOKEN\n"
-                            f"Mint: `{mint}`\n"
-                            f"{f'Symbol: {token.symbol}' if token else ''}"
-                        )
-                    )
-                
+            holdings_map = await fetch_wallet_holdings([address for address, _ in wallets])
+
+            new_holdings = await reconcile_holdings(session, holdings_map, datetime.now(UTC))
             await session.commit()
+
+            if new_holdings:
+                # One lookup for the symbols of every new mint
+                new_mints = {mint for _, mint in new_holdings}
+                symbols = dict((await session.execute(
+                    select(Token.ca, Token.symbol).where(Token.ca.in_(new_mints))
+                )).all())
+                names = dict(wallets)
+                alerts = [
+                    _holding_alert_text(names.get(address) or address, mint, symbols.get(mint))
+                    for address, mint in new_holdings
+                ]
         except Exception as e:
             await session.rollback()
             logger.error(f"Monitoring error: {str(e)}")
+            return
+
+    # Queued after the session is closed, so Telegram never holds the monitoring transaction open
+    for text in alerts:
+        outbound_queue.send(HOMIES_CHAT_ID, text, priority=PRIORITY_NOTICE)
+    if alerts:
+        logger.info(f"Queued {len(alerts)} new holding alerts")
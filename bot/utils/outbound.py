@@ -0,0 +1,363 @@
+"""
+Outbound Telegram message scheduler.
+
+Alerts are queued with send() and delivered by one dispatcher task, so the
+coroutine that produced an alert never waits on Telegram. Every chat has a
+token bucket (TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST) and all chats share a
+bot-wide one (TELEGRAM_GLOBAL_RATE). When a chat has a token, the oldest
+message of its highest priority goes out: buys, then other alerts, then
+notices. Notices linger for OUTBOUND_NOTICE_LINGER_MS and are then joined with
+every other pending notice for the chat into a single message.
+
+A FloodWait only pauses the chat it was raised for. The message goes back to
+the front of its queue and the chat is skipped until the wait is over, while
+producers keep queueing and other chats keep sending.
+
+Edits of already sent messages (edit()) share the chat's rate limit. A pending
+edit is replaced by a newer one for the same message, only the latest text is
+sent.
+
+A message queued inside a trace (bot/utils/tracing.py) carries it along: an
+"outbound" span covers queueing to delivery, with the Telegram call as its
+child, and the trace ends when the message has been delivered or given up.
+"""
+from config.settings import (
+    TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST, TELEGRAM_GLOBAL_RATE,
+    OUTBOUND_NOTICE_LINGER_MS, OUTBOUND_DRAIN_TIMEOUT
+)
+from bot.utils.metrics import LATENCY_BUCKETS, track_call
+from bot.utils.tracing import HeldSpan, hold
+from logger.logger import get_logger
+from prometheus_client import Counter, Gauge, Histogram
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+import asyncio
+import time
+
+logger = get_logger("outbound")
+
+PRIORITY_BUY = 0
+PRIORITY_ALERT = 1
+PRIORITY_NOTICE = 2
+PRIORITY_NAMES = ("buy", "alert", "notice")
+
+# Telegram rejects longer texts, batched notices are split below it
+MAX_MESSAGE_LENGTH = 4096
+
+QUEUE_DEPTH = Gauge("telegram_outbound_queue_depth", "Messages waiting to be sent", ["priority"], multiprocess_mode="livesum")
+SEND_LATENCY = Histogram(
+    "telegram_outbound_latency_seconds", "Queued to delivered, FloodWaits included",
+    ["priority"], buckets=LATENCY_BUCKETS
+)
+FLOOD_WAITS = Counter("telegram_flood_waits_total", "FloodWait errors returned by Telegram")
+SEND_FAILURES = Counter("telegram_outbound_failures_total", "Queued messages that could not be sent", ["priority"])
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, 0 if one is"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class OutboundMessage:
+    __slots__ = ("chat_id", "text", "kwargs", "priority", "enqueued", "future", "message_id", "held")
+
+    def __init__(
+        self,
+        chat_id: Any,
+        text: str,
+        kwargs: Dict[str, Any],
+        priority: int,
+        future: asyncio.Future,
+        message_id: Optional[int] = None,
+    ):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.future = future
+        # Set for edits of an already sent message
+        self.message_id = message_id
+        # The trace this was queued in, ended on delivery
+        self.held: Optional[HeldSpan] = hold("outbound", priority=PRIORITY_NAMES[priority])
+
+
+class _Chat:
+    __slots__ = ("bucket", "queues", "blocked_until", "sending")
+
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.queues: List[Deque[OutboundMessage]] = [deque() for _ in PRIORITY_NAMES]
+        self.blocked_until = 0.0
+        self.sending = False
+
+    def head(self) -> Optional[OutboundMessage]:
+        for queue in self.queues:
+            if queue:
+                return queue[0]
+        return None
+
+
+class OutboundQueue:
+    def __init__(
+        self,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        chat_burst: float = TELEGRAM_CHAT_BURST,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        notice_linger: float = OUTBOUND_NOTICE_LINGER_MS / 1000,
+    ):
+        """
+        Args:
+            chat_rate (float): Messages per second per chat.
+            chat_burst (float): Messages a quiet chat may send back to back.
+            global_rate (float): Messages per second across all chats.
+            notice_linger (float): Seconds a notice waits for others to batch with.
+        """
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.notice_linger = notice_linger
+        self._global = TokenBucket(global_rate, max(1.0, global_rate))
+        self._chats: Dict[Any, _Chat] = {}
+        self._wakeup = asyncio.Event()
+        self._client: Optional[Client] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sending: Set[asyncio.Task] = set()
+
+        # Stats
+        self.queued = 0
+        self.sent = 0
+        self.batched = 0
+        self.coalesced = 0
+        self.flood_waits = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return sum(len(queue) for chat in self._chats.values() for queue in chat.queues)
+
+    def send(self, chat_id: Any, text: str, priority: int = PRIORITY_ALERT, **kwargs) -> asyncio.Future:
+        """
+        Queues a message without waiting for Telegram.
+
+        Args:
+            chat_id: Target chat.
+            text (str): Message text.
+            priority (int): PRIORITY_BUY, PRIORITY_ALERT or PRIORITY_NOTICE.
+            **kwargs: Passed to client.send_message, e.g. reply_markup.
+                Notices with kwargs are never batched.
+
+        Returns:
+            asyncio.Future: Resolves to the sent Message, or None if sending failed.
+        """
+        return self._enqueue(chat_id, text, priority, kwargs)
+
+    def edit(self, chat_id: Any, message_id: int, text: str, priority: int = PRIORITY_ALERT, **kwargs) -> asyncio.Future:
+        """
+        Queues an edit_message_text of a sent message. If an edit of the same
+        message is still queued, its text is replaced and its future returned.
+
+        Returns:
+            asyncio.Future: Resolves to the edited Message, or None if editing failed.
+        """
+        chat = self._chats.get(chat_id)
+        if chat is not None:
+            for queue in chat.queues:
+                for message in queue:
+                    if message.message_id == message_id:
+                        message.text = text
+                        message.kwargs = kwargs
+                        self.coalesced += 1
+                        return message.future
+        return self._enqueue(chat_id, text, priority, kwargs, message_id)
+
+    def _enqueue(
+        self, chat_id: Any, text: str, priority: int, kwargs: Dict[str, Any], message_id: Optional[int] = None
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat(self.chat_rate, self.chat_burst)
+        chat.queues[priority].append(OutboundMessage(chat_id, text, kwargs, priority, future, message_id))
+        QUEUE_DEPTH.labels(PRIORITY_NAMES[priority]).inc()
+        self.queued += 1
+        self._wakeup.set()
+        return future
+
+    def _ready_at(self, chat: _Chat, message: OutboundMessage, now: float) -> float:
+        ready_at = max(chat.blocked_until, now + chat.bucket.wait_time(now))
+        if message.priority == PRIORITY_NOTICE:
+            ready_at = max(ready_at, message.enqueued + self.notice_linger)
+        return ready_at
+
+    def _take_batch(self, chat: _Chat, message: OutboundMessage) -> List[OutboundMessage]:
+        queue = chat.queues[message.priority]
+        batch = [queue.popleft()]
+        if message.priority == PRIORITY_NOTICE and not message.kwargs and message.message_id is None:
+            length = len(message.text)
+            while queue and not queue[0].kwargs and queue[0].message_id is None and length + 2 + len(queue[0].text) <= MAX_MESSAGE_LENGTH:
+                length += 2 + len(queue[0].text)
+                batch.append(queue.popleft())
+        QUEUE_DEPTH.labels(PRIORITY_NAMES[message.priority]).dec(len(batch))
+        return batch
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """
+        Starts a send for every chat that may send now, most urgent first.
+
+        Returns:
+            Optional[float]: Seconds until the next chat becomes ready, None if nothing is waiting.
+        """
+        heads = []
+        for chat_id, chat in self._chats.items():
+            message = None if chat.sending else chat.head()
+            if message is not None:
+                heads.append((message.priority, message.enqueued, chat_id, chat, message))
+        heads.sort(key=lambda head: head[:2])
+
+        next_ready = None
+        for _, _, chat_id, chat, message in heads:
+            ready_at = self._ready_at(chat, message, now)
+            if ready_at <= now:
+                ready_at = now + self._global.wait_time(now)
+            if ready_at > now:
+                next_ready = ready_at if next_ready is None else min(next_ready, ready_at)
+                continue
+            self._global.take()
+            chat.bucket.take()
+            chat.sending = True
+            task = asyncio.create_task(self._send(chat_id, chat, self._take_batch(chat, message)))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+        return None if next_ready is None else next_ready - now
+
+    async def _send(self, chat_id: Any, chat: _Chat, batch: List[OutboundMessage]) -> None:
+        first = batch[0]
+        result = None
+        operation = "send_message" if first.message_id is None else "edit_message_text"
+        started = time.perf_counter()
+        try:
+            if first.message_id is not None:
+                with track_call("telegram", operation):
+                    result = await self._client.edit_message_text(
+                        chat_id=chat_id, message_id=first.message_id, text=first.text, **first.kwargs
+                    )
+            else:
+                with track_call("telegram", operation):
+                    result = await self._client.send_message(
+                        chat_id=chat_id, text="\n\n".join(m.text for m in batch), **first.kwargs
+                    )
+        except FloodWait as e:
+            FLOOD_WAITS.inc()
+            self.flood_waits += 1
+            chat.blocked_until = time.monotonic() + e.value
+            logger.warning(f"FloodWait of {e.value}s for chat {chat_id}, {len(self)} messages queued")
+            # Still queued, their outbound spans stay open
+            self._trace_call(batch, operation, started, e, done=False)
+            # Back to the front, in their original order
+            chat.queues[first.priority].extendleft(reversed(batch))
+            QUEUE_DEPTH.labels(PRIORITY_NAMES[first.priority]).inc(len(batch))
+            return
+        except Exception as e:
+            self.failed += len(batch)
+            SEND_FAILURES.labels(PRIORITY_NAMES[first.priority]).inc(len(batch))
+            logger.error(f"Outbound send to {chat_id} failed: {e}")
+            self._trace_call(batch, operation, started, e)
+        else:
+            self._trace_call(batch, operation, started)
+        finally:
+            chat.sending = False
+            self._wakeup.set()
+
+        if result is not None:
+            self.sent += len(batch)
+            self.batched += len(batch) - 1
+        delivered = time.monotonic()
+        for message in batch:
+            SEND_LATENCY.labels(PRIORITY_NAMES[message.priority]).observe(delivered - message.enqueued)
+            if not message.future.done():
+                message.future.set_result(result)
+
+    @staticmethod
+    def _trace_call(
+        batch: List[OutboundMessage], operation: str, started: float,
+        error: Optional[BaseException] = None, done: bool = True
+    ) -> None:
+        for message in batch:
+            if message.held is not None:
+                message.held.child(operation, started, error, batched=len(batch))
+                if done:
+                    message.held.end(error)
+
+    async def _run(self) -> None:
+        while True:
+            delay = self._dispatch(time.monotonic())
+            # Nothing awaited since _dispatch, so no wakeup can be lost here
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self),
+            "queued": self.queued,
+            "sent": self.sent,
+            "batched": self.batched,
+            "coalesced": self.coalesced,
+            "flood_waits": self.flood_waits,
+            "failed": self.failed,
+        }
+
+    async def start(self, client: Client) -> None:
+        self._client = client
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = OUTBOUND_DRAIN_TIMEOUT) -> None:
+        """Delivers what is queued for up to `timeout` seconds, then stops the dispatcher."""
+        deadline = time.monotonic() + timeout
+        while (len(self) or self._sending) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+        dropped = 0
+        for chat in self._chats.values():
+            for priority, queue in enumerate(chat.queues):
+                QUEUE_DEPTH.labels(PRIORITY_NAMES[priority]).dec(len(queue))
+                for message in queue:
+                    dropped += 1
+                    if message.held is not None:
+                        message.held.end(RuntimeError("dropped on shutdown"))
+                    if not message.future.done():
+                        message.future.set_result(None)
+                queue.clear()
+        if dropped:
+            logger.warning(f"Dropped {dropped} queued messages on shutdown")
+        logger.info(f"Outbound queue stopped: {self.stats()}")
+
+
+outbound_queue = OutboundQueue()
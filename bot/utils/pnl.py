@@ -1,11 +1,19 @@
-from logger.logger import logger
-from config.settings import HELIUS_API_KEY
+from logger.logger import get_logger
+from config.settings import HELIUS_API_KEY, HELIUS_API_URL, SOL_MINT
 from database.database import SmartWallet, Token, WalletHoldingHistory, AsyncSessionFactory
 from sqlalchemy import select
 from datetime import datetime, timedelta, UTC
 import aiohttp
 from typing import Dict, List, Optional, Any
 import asyncio
+import logging
+from bot.utils.cost_basis import CostBasisLedger, Position, FIFO
+from bot.utils.token import get_token_profile
+from bot.utils.metrics import http_trace
+from bot.utils.swaps import wallet_deltas
+from bot.utils.fastjson import decode_transactions
+
+logger = get_logger("pnl")
 
 
 async def get_wallet_transactions(wallet_address: str, days: int = 45) -> Optional[List[Dict[str, Any]]]:
@@ -19,7 +27,7 @@ async def get_wallet_transactions(wallet_address: str, days: int = 45) -> Option
     Returns:
         Optional[List[Dict[str, Any]]]: List of transaction data or None if request failed
     """
-    api_url = f"https://api.helius.xyz/v0/addresses/{wallet_address}/transactions"
+    api_url = f"{HELIUS_API_URL}/v0/addresses/{wallet_address}/transactions"
     
     # Calculate start time (7 days ago)
     start_time = int((datetime.now(UTC) - timedelta(days=days)).timestamp())
@@ -32,10 +40,11 @@ async def get_wallet_transactions(wallet_address: str, days: int = 45) -> Option
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace("helius", "transactions")]) as session:
             async with session.get(api_url, params=params) as response:
                 if response.status == 200:
-                    transactions = await response.json()
+                    # Typed decode, the account data and instructions PnL never reads are skipped
+                    transactions = decode_transactions(await response.read())
                     return transactions
                 else:
                     logger.error(f"Failed to fetch transactions: {await response.text()}")
@@ -45,14 +54,149 @@ async def get_wallet_transactions(wallet_address: str, days: int = 45) -> Option
         return None
 
 
-async def calculate_token_pnl(wallet_address: str, token_info: Optional[dict], days: int = 7) -> Dict[str, Any]:
+def _empty_pnl(token_mint: Optional[str], method: str = FIFO) -> Dict[str, Any]:
+    return {
+        "token_mint": token_mint,
+        "cost_method": method,
+        "invested": 0,
+        "remaining_investment": 0,
+        "realized_pnl": 0,
+        "unrealized_pnl": 0,
+        "profit_percentage": 0,
+        "buy_volume": 0,
+        "sell_volume": 0,
+        "remaining_tokens": 0,
+        "market_price": 0,
+        "market_value": 0,
+        "avg_buy_price": 0,
+        "avg_sell_price": 0,
+        "buy_transactions": 0,
+        "sell_transactions": 0,
+        "total_transactions": 0
+    }
+
+
+def apply_transaction(ledger: CostBasisLedger, txn: Dict[str, Any], wallet_address: str) -> None:
+    """Book one Helius enhanced transaction into the wallet's cost basis ledger."""
+    # Same net changes decode_swap() reads, multi-token legs are split here instead
+    deltas = wallet_deltas(txn, wallet_address)
+    sol = deltas.pop(SOL_MINT, 0.0)
+    gained = [(mint, amount) for mint, amount in deltas.items() if amount > 0]
+    spent = [(mint, -amount) for mint, amount in deltas.items() if amount < 0]
+
+    if gained and sol < 0:
+        # Bought with SOL; multi-token buys split the SOL evenly
+        share = -sol / len(gained)
+        for mint, amount in gained:
+            ledger.buy(mint, amount, share)
+    elif spent and sol > 0:
+        share = sol / len(spent)
+        for mint, amount in spent:
+            ledger.sell(mint, amount, share)
+    elif gained and spent:
+        # Token-to-token route: carry the basis over to whatever came back
+        if len(gained) == 1 and len(spent) == 1:
+            ledger.route(spent[0][0], spent[0][1], gained[0][0], gained[0][1])
+        else:
+            basis = 0.0
+            for mint, amount in spent:
+                position = ledger.position(mint)
+                basis += position.dispose(amount)
+                position.routed_out += amount
+            share = basis / len(gained)
+            for mint, amount in gained:
+                position = ledger.position(mint)
+                position.acquire(amount, share)
+                position.routed_in += amount
+    else:
+        for mint, amount in gained:
+            ledger.receive(mint, amount)
+        for mint, amount in spent:
+            ledger.send(mint, amount)
+
+
+def build_ledger(wallet_address: str, transactions: List[Dict[str, Any]], method: str = FIFO) -> CostBasisLedger:
+    """Replay the wallet's transactions in slot order into a fresh ledger."""
+    ledger = CostBasisLedger(method)
+    ordered = sorted(
+        transactions,
+        key=lambda txn: (txn.get("slot") or 0, txn.get("timestamp") or 0)
+    )
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for txn in ordered:
+        if txn.get("transactionError"):
+            continue
+        apply_transaction(ledger, txn, wallet_address)
+        if debug:
+            logger.debug("Booked %s (%s) slot %s for %s", txn.get("signature"), txn.get("type"), txn.get("slot"), wallet_address)
+    return ledger
+
+
+async def get_token_prices_sol(mints: List[str]) -> Dict[str, float]:
+    """
+    Latest price in SOL per token for each mint, derived from the USD prices
+    returned by get_token_profile. Mints without a price are left out.
     """
-    Calculates realized PNL for a specific token in a wallet over the specified period.
+    if not mints:
+        return {}
+    profiles = await asyncio.gather(
+        get_token_profile(SOL_MINT),
+        *(get_token_profile(mint) for mint in mints),
+        return_exceptions=True
+    )
+    sol_profile, token_profiles = profiles[0], profiles[1:]
+    sol_usd = sol_profile.get("price", 0.0) if isinstance(sol_profile, dict) else 0.0
+    if not sol_usd:
+        logger.warning("No SOL price available, open lots will not be marked")
+        return {}
+
+    prices = {}
+    for mint, profile in zip(mints, token_profiles):
+        if isinstance(profile, dict) and profile.get("price"):
+            prices[mint] = profile["price"] / sol_usd
+    return prices
+
+
+def position_pnl(token_mint: str, position: Optional[Position], price: float = 0.0, method: str = FIFO) -> Dict[str, Any]:
+    """Summarize a ledger position, marking open lots to `price` (SOL per token)."""
+    if position is None:
+        return _empty_pnl(token_mint, method)
+
+    unrealized = position.unrealized(price) if price else 0.0
+    return {
+        "token_mint": token_mint,
+        "cost_method": method,
+        "invested": position.invested,  # Total amount of SOL used to buy target token
+        "remaining_investment": position.cost,  # Basis of the open lots
+        "realized_pnl": position.realized,
+        "unrealized_pnl": unrealized,
+        "profit_percentage": (position.realized / position.sold_cost) * 100 if position.sold_cost > 0 else 0,
+        "buy_volume": position.bought,
+        "sell_volume": position.sold,
+        "remaining_tokens": position.amount,
+        "market_price": price,
+        "market_value": position.amount * price,
+        "avg_buy_price": position.invested / position.bought if position.bought > 0 else 0,
+        "avg_sell_price": position.proceeds / position.sold if position.sold > 0 else 0,
+        "buy_transactions": position.buys,
+        "sell_transactions": position.sells,
+        "total_transactions": position.buys + position.sells
+    }
+
+
+async def calculate_token_pnl(wallet_address: str, token_info: Optional[dict], days: int = 7, method: str = FIFO) -> Dict[str, Any]:
+    """
+    Calculates realized and unrealized PNL for a specific token in a wallet over the specified period.
+
+    Transactions are replayed in slot order through a lot-based ledger (FIFO or
+    average cost), so partial sells and token-to-token routes keep the right
+    basis. Open lots are marked to the latest price from get_token_profile.
     
     Args:
         wallet_address (str): The wallet address
         token_info (Optional[dict]): The token mint information
         days (int): Number of days to look back (default: 7)
+        method (str): Cost basis method, "fifo" or "average" (default: "fifo")
         
     Returns:
         Dict[str, Any]: Dictionary containing PNL data
@@ -60,251 +204,49 @@ async def calculate_token_pnl(wallet_address: str, token_info: Optional[dict], d
     # Check if token_info is None or missing required fields
     if token_info is None:
         logger.error("Token info is None")
-        return {
-            "invested": 0,
-            "realized_pnl": 0,
-            "buy_volume": 0,
-            "sell_volume": 0,
-            "buy_transactions": 0,
-            "sell_transactions": 0,
-            "avg_buy_price": 0,
-            "avg_sell_price": 0
-        }
+        return _empty_pnl(None, method)
         
     # Ensure token_info has the required mint field
     if "mint" not in token_info:
         logger.error("Token info missing 'mint' field")
-        return {
-            "invested": 0,
-            "realized_pnl": 0,
-            "buy_volume": 0,
-            "sell_volume": 0,
-            "buy_transactions": 0,
-            "sell_transactions": 0,
-            "avg_buy_price": 0,
-            "avg_sell_price": 0
-        }
+        return _empty_pnl(None, method)
+
+    token_mint = token_info["mint"]
         
     # Increase history days to ensure we capture all transactions
     history_days = max(days * 3, 45)
     transactions = await get_wallet_transactions(wallet_address, history_days)
     
     if not transactions:
-        return {
-            "invested": 0,
-            "realized_pnl": 0,
-            "buy_volume": 0,
-            "sell_volume": 0,
-            "buy_transactions": 0,
-            "sell_transactions": 0,
-            "avg_buy_price": 0,
-            "avg_sell_price": 0
-        }
-    
-    # Filter transactions for the specific token
-    token_transactions = []
-    for txn in transactions:
-        token_transfers = txn.get("tokenTransfers", [])
-        for transfer in token_transfers:
-            if transfer.get("mint") == token_info.get("mint"):
-                token_transactions.append(txn)
-                break
-    
-    # Calculate buy and sell volumes and prices
-    buy_volume = 0
-    sell_volume = 0
-    buy_value_sol = 0
-    sell_value_sol = 0
-    buy_transactions = 0
-    sell_transactions = 0
-    
-    # SOL mint address
-    SOL_MINT = "So11111111111111111111111111111111111111112"
-    
-    # Debug information
-    logger.info(f"Found {len(token_transactions)} transactions for token {token_info.get('mint')}")
-    
-    # First pass: Process buy transactions to calculate average buy price
-    for txn in token_transactions:
-        token_transfers = txn.get("tokenTransfers", [])
-        
-        # Skip if no token transfers
-        if not token_transfers:
-            continue
-            
-        # Identify token transfers for our specific token and SOL
-        target_token_transfers = []
-        sol_transfers = []
-        
-        for transfer in token_transfers:
-            if transfer.get("mint") == token_info.get("mint"):
-                target_token_transfers.append(transfer)
-            elif transfer.get("mint") == SOL_MINT:
-                sol_transfers.append(transfer)
-        
-        # Skip if no transfers for our target token
-        if not target_token_transfers:
-            continue
-            
-        # Determine if this is a buy or sell transaction
-        is_buying = False
-        is_selling = False
-        token_amount = 0
-        sol_amount = 0
-        
-        # Check if we're receiving the token (buying) or sending the token (selling)
-        for transfer in target_token_transfers:
-            if transfer.get("toUserAccount") == wallet_address:
-                is_buying = True
-                token_amount += transfer.get("tokenAmount", 0)
-            elif transfer.get("fromUserAccount") == wallet_address:
-                is_selling = True
-                token_amount += transfer.get("tokenAmount", 0)
-        
-        # Debug transaction type
-        if is_buying and not is_selling:
-            logger.info(f"Found BUY transaction: {txn.get('signature')}")
-        elif is_selling and not is_buying:
-            logger.info(f"Found SELL transaction: {txn.get('signature')}")
-        
-        # For buys: Look for SOL going out
-        if is_buying and not is_selling:
-            for transfer in sol_transfers:
-                if transfer.get("fromUserAccount") == wallet_address:
-                    sol_amount += transfer.get("tokenAmount", 0)
-            
-            # If we found both token coming in and SOL going out, it's a valid buy
-            if token_amount > 0 and sol_amount > 0:
-                buy_volume += token_amount
-                buy_value_sol += sol_amount
-                buy_transactions += 1
-                logger.info(f"Recorded BUY: {token_amount} tokens for {sol_amount} SOL")
-    
-    # Calculate average buy price after processing all buy transactions
-    avg_buy_price_sol = buy_value_sol / buy_volume if buy_volume > 0 else 0
-    logger.info(f"Average buy price: {avg_buy_price_sol} SOL per token")
-    
-    # Second pass: Process sell transactions using the calculated average buy price
-    for txn in token_transactions:
-        token_transfers = txn.get("tokenTransfers", [])
-        
-        # Skip if no token transfers
-        if not token_transfers:
-            continue
-            
-        # Identify token transfers for our specific token and SOL
-        target_token_transfers = []
-        sol_transfers = []
-        
-        for transfer in token_transfers:
-            if transfer.get("mint") == token_info.get("mint"):
-                target_token_transfers.append(transfer)
-            elif transfer.get("mint") == SOL_MINT:
-                sol_transfers.append(transfer)
-        
-        # Skip if no transfers for our target token
-        if not target_token_transfers:
-            continue
-            
-        # Determine if this is a sell transaction
-        is_selling = False
-        token_amount = 0
-        sol_amount = 0
-        
-        # Check if we're sending the token (selling)
-        for transfer in target_token_transfers:
-            if transfer.get("fromUserAccount") == wallet_address:
-                is_selling = True
-                token_amount += transfer.get("tokenAmount", 0)
-        
-        # Skip if not a sell transaction
-        if not is_selling:
-            continue
-            
-        logger.info(f"Processing SELL transaction: {txn.get('signature')}")
-        
-        # First check for SOL transfers
-        for transfer in sol_transfers:
-            if transfer.get("toUserAccount") == wallet_address:
-                sol_amount += transfer.get("tokenAmount", 0)
-        
-        # If no SOL was received, check for other tokens received in the same transaction
-        if sol_amount == 0:
-            other_token_transfers = []
-            for transfer in token_transfers:
-                # Skip the target token and SOL transfers
-                if transfer.get("mint") != token_info.get("mint") and transfer.get("mint") != SOL_MINT:
-                    # Only count tokens received by the wallet
-                    if transfer.get("toUserAccount") == wallet_address:
-                        other_token_transfers.append(transfer)
-            
-            # Log other tokens received
-            if other_token_transfers:
-                for other_transfer in other_token_transfers:
-                    other_token_mint = other_transfer.get("mint")
-                    other_token_amount = other_transfer.get("tokenAmount", 0)
-                    logger.info(f"Found non-SOL token received in sell: {other_token_mint}, amount: {other_token_amount}")
-                    
-                    # We don't have price data for these tokens, so we'll estimate based on the target token's average buy price
-                    # This assumes the trade was roughly at market value
-                    estimated_sol_value = avg_buy_price_sol * token_amount if avg_buy_price_sol > 0 else 0
-                    sol_amount += estimated_sol_value
-                    logger.info(f"Estimated SOL value for received token: {estimated_sol_value} SOL")
-        
-        # If we found token going out, record it as a sell
-        if token_amount > 0:
-            sell_volume += token_amount
-            sell_value_sol += sol_amount
-            sell_transactions += 1
-            logger.info(f"Recorded SELL: {token_amount} tokens for {sol_amount} SOL")
-    
-    # Log summary
-    logger.info(f"Summary - Buy transactions: {buy_transactions}, Sell transactions: {sell_transactions}")
-    logger.info(f"Summary - Buy volume: {buy_volume}, Sell volume: {sell_volume}")
-    
-    # Calculate average sell price in SOL (buy price was already calculated)
-    avg_sell_price_sol = sell_value_sol / sell_volume if sell_volume > 0 else 0
-    
-    # Calculate realized PNL in SOL
-    realized_pnl_sol = sell_value_sol - (avg_buy_price_sol * sell_volume) if sell_volume > 0 else 0
-    
-    # Calculate unrealized PNL for remaining tokens
-    remaining_tokens = buy_volume - sell_volume
-    unrealized_pnl = 0  # We don't have current price data to calculate unrealized PNL
-    
-    # Calculate profit percentage if applicable
-    profit_percentage = (realized_pnl_sol / (avg_buy_price_sol * sell_volume)) * 100 if sell_volume > 0 and avg_buy_price_sol > 0 else 0
-    
-    # Calculate remaining investment
-    remaining_investment = avg_buy_price_sol * (buy_volume - sell_volume) if buy_volume > sell_volume else 0
-    
-    # Calculate total investment (including what's been sold and what remains)
-    total_investment = buy_value_sol
-    
-    return {
-        "token_mint": token_info.get("mint"),
-        "invested": buy_value_sol,  # Total amount of SOL used to buy target token
-        "remaining_investment": remaining_investment,
-        "realized_pnl": realized_pnl_sol,
-        "profit_percentage": profit_percentage,
-        "buy_volume": buy_volume,
-        "sell_volume": sell_volume,
-        "remaining_tokens": buy_volume - sell_volume,
-        "avg_buy_price": avg_buy_price_sol,
-        "avg_sell_price": avg_sell_price_sol,
-        "buy_transactions": buy_transactions,
-        "sell_transactions": sell_transactions,
-        "total_transactions": buy_transactions + sell_transactions
-    }
+        return _empty_pnl(token_mint, method)
 
+    # The whole wallet is replayed so routes through other tokens carry their basis
+    ledger = build_ledger(wallet_address, transactions, method)
+    position = ledger.get(token_mint)
 
-async def calculate_wallet_pnl(wallet_address: str, days: int = 7) -> Dict[str, Any]:
+    price = 0.0
+    if position is not None and position.amount > 0:
+        prices = await get_token_prices_sol([token_mint])
+        price = prices.get(token_mint, 0.0)
+
+    result = position_pnl(token_mint, position, price, method)
+    logger.info(
+        "PNL %s... for %s... (%s): %d buys, %d sells, realized %.4f SOL, unrealized %.4f SOL",
+        token_mint[:8], wallet_address[:8], method,
+        result['buy_transactions'], result['sell_transactions'],
+        result['realized_pnl'], result['unrealized_pnl']
+    )
+    return result
+
+
+async def calculate_wallet_pnl(wallet_address: str, days: int = 7, method: str = FIFO) -> Dict[str, Any]:
     """
-    Calculates total realized PNL for a wallet across all tokens over the specified period.
+    Calculates total realized and unrealized PNL for a wallet across all tokens over the specified period.
     
     Args:
         wallet_address (str): The wallet address
         days (int): Number of days to look back (default: 7)
+        method (str): Cost basis method, "fifo" or "average" (default: "fifo")
         
     Returns:
         Dict[str, Any]: Dictionary containing wallet PNL data
@@ -329,12 +271,24 @@ async def calculate_wallet_pnl(wallet_address: str, days: int = 7) -> Dict[str,
             history_result = await session.execute(history_query)
             token_mints = history_result.scalars().all()
             
-            # Calculate PNL for each token
-            token_pnl_tasks = [calculate_token_pnl(wallet_address, {"mint": mint}, days) for mint in token_mints]
-            token_pnls = await asyncio.gather(*token_pnl_tasks)
+            # Replay the wallet once and read every token's position from the same ledger
+            history_days = max(days * 3, 45)
+            transactions = await get_wallet_transactions(wallet_address, history_days) or []
+            ledger = build_ledger(wallet_address, transactions, method)
+
+            open_mints = [
+                mint for mint in token_mints
+                if (position := ledger.get(mint)) is not None and position.amount > 0
+            ]
+            prices = await get_token_prices_sol(open_mints)
+            token_pnls = [
+                position_pnl(mint, ledger.get(mint), prices.get(mint, 0.0), method)
+                for mint in token_mints
+            ]
             
             # Calculate total metrics
             total_realized_pnl = sum(pnl["realized_pnl"] for pnl in token_pnls)
+            total_unrealized_pnl = sum(pnl["unrealized_pnl"] for pnl in token_pnls)
             total_invested = sum(pnl["invested"] for pnl in token_pnls)
             total_remaining_investment = sum(pnl["remaining_investment"] for pnl in token_pnls)
             total_buy_transactions = sum(pnl["buy_transactions"] for pnl in token_pnls)
@@ -351,6 +305,8 @@ async def calculate_wallet_pnl(wallet_address: str, days: int = 7) -> Dict[str,
                 "total_invested": total_invested,
                 "total_remaining_investment": total_remaining_investment,
                 "total_realized_pnl": total_realized_pnl,
+                "total_unrealized_pnl": total_unrealized_pnl,
+                "cost_method": method,
                 "overall_profit_percentage": overall_profit_percentage,
                 "total_buy_transactions": total_buy_transactions,
                 "total_sell_transactions": total_sell_transactions,
@@ -363,12 +319,13 @@ async def calculate_wallet_pnl(wallet_address: str, days: int = 7) -> Dict[str,
             return {"error": str(e)}
 
 
-async def calculate_all_wallets_pnl(days: int = 7) -> List[Dict[str, Any]]:
+async def calculate_all_wallets_pnl(days: int = 7, method: str = FIFO) -> List[Dict[str, Any]]:
     """
     Calculates realized PNL for all tracked wallets over the specified period.
     
     Args:
         days (int): Number of days to look back (default: 7)
+        method (str): Cost basis method, "fifo" or "average" (default: "fifo")
         
     Returns:
         List[Dict[str, Any]]: List of wallet PNL data
@@ -381,7 +338,7 @@ async def calculate_all_wallets_pnl(days: int = 7) -> List[Dict[str, Any]]:
             wallets = wallets_result.scalars().all()
             
             # Calculate PNL for each wallet
-            wallet_pnl_tasks = [calculate_wallet_pnl(wallet.address, days) for wallet in wallets]
+            wallet_pnl_tasks = [calculate_wallet_pnl(wallet.address, days, method) for wallet in wallets]
             wallet_pnls = await asyncio.gather(*wallet_pnl_tasks)
             
             return wallet_pnls
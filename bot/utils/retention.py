@@ -0,0 +1,87 @@
+"""
+Retention for wallet_holding_history.
+
+monitor_wallets only looks back 24h and PNL at most HOLDING_HISTORY_RETENTION_DAYS,
+so rows whose last_seen is older than that are rolled into per-wallet daily
+summaries (wallet_holding_daily) and deleted. This keeps the hot table, and
+every index the hot queries use, sized to the recent window only.
+"""
+from logger.logger import get_logger
+from config.settings import HOLDING_HISTORY_RETENTION_DAYS, COMPACTION_BATCH_SIZE
+from database.database import AsyncSessionFactory
+from sqlalchemy import text
+from datetime import datetime, timedelta, UTC
+
+logger = get_logger("retention")
+
+# Move one batch of expired rows into the daily rollup in a single statement.
+# SKIP LOCKED keeps the job from waiting on rows monitor_wallets is upserting.
+COMPACT_BATCH_SQL = text("""
+    WITH expired AS (
+        DELETE FROM wallet_holding_history
+        WHERE id IN (
+            SELECT id FROM wallet_holding_history
+            WHERE last_seen < :cutoff
+            ORDER BY id
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING wallet_address, token_mint, first_seen, last_seen
+    ),
+    rolled AS (
+        INSERT INTO wallet_holding_daily AS daily (wallet_address, day, token_count, token_mints, last_seen)
+        SELECT
+            wallet_address,
+            (first_seen AT TIME ZONE 'UTC')::date,
+            count(DISTINCT token_mint),
+            array_agg(DISTINCT token_mint ORDER BY token_mint),
+            max(last_seen)
+        FROM expired
+        WHERE wallet_address IS NOT NULL AND first_seen IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (wallet_address, day) DO UPDATE SET
+            -- A mint seen again after an earlier batch rolled it up is listed and counted once
+            token_count = (
+                SELECT count(DISTINCT mint) FROM unnest(daily.token_mints || excluded.token_mints) AS mint
+            ),
+            token_mints = ARRAY(
+                SELECT DISTINCT mint FROM unnest(daily.token_mints || excluded.token_mints) AS mint ORDER BY mint
+            ),
+            last_seen = greatest(daily.last_seen, excluded.last_seen)
+        RETURNING 1
+    )
+    SELECT count(*) FROM expired
+""")
+
+
+async def compact_holding_history(
+    retention_days: int = HOLDING_HISTORY_RETENTION_DAYS,
+    batch_size: int = COMPACTION_BATCH_SIZE
+) -> int:
+    """
+    Rolls wallet_holding_history rows not seen for `retention_days` into
+    wallet_holding_daily, one committed batch at a time.
+
+    Returns:
+        int: Number of history rows compacted.
+    """
+    cutoff = datetime.now(UTC) - timedelta(days=retention_days)
+    total = 0
+    try:
+        while True:
+            async with AsyncSessionFactory() as session:
+                result = await session.execute(
+                    COMPACT_BATCH_SQL,
+                    {"cutoff": cutoff, "batch_size": batch_size}
+                )
+                moved = result.scalar_one()
+                await session.commit()
+            total += moved
+            if moved < batch_size:
+                break
+    except Exception as e:
+        logger.error(f"Holding history compaction error: {str(e)}")
+
+    if total:
+        logger.info(f"Compacted {total} holding history rows older than {retention_days} days")
+    return total
@@ -0,0 +1,162 @@
+"""
+Decoder for Helius enhanced transactions.
+
+decode_swap() turns one transaction into a Swap with a single pass over its
+transfers. The owner's net change per mint is summed from tokenTransfers; SOL
+comes from wrapped SOL transfers when there are any and from nativeTransfers
+(lamports) otherwise. Hops of a multi-hop route never touch the owner, so they
+net out, and wrapping or unwrapping wSOL isn't counted next to the native
+transfer that funded it.
+
+The webhook alerts and the PnL ledger both read transactions through
+wallet_deltas(), so a swap is never booked differently from how it was alerted.
+"""
+from config.settings import SOL_MINT
+from typing import Any, Dict, Iterable, List, Optional
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+
+class Swap:
+    """
+    One swap by `owner`: it paid `in_amount` of `in_mint` and received
+    `out_amount` of `out_mint`. Native and wrapped SOL are both SOL_MINT, in SOL.
+    """
+    __slots__ = ("signature", "slot", "timestamp", "source", "owner", "in_mint", "in_amount", "out_mint", "out_amount")
+
+    def __init__(
+        self,
+        signature: Optional[str],
+        slot: Optional[int],
+        timestamp: Optional[int],
+        source: Optional[str],
+        owner: str,
+        in_mint: str,
+        in_amount: float,
+        out_mint: str,
+        out_amount: float,
+    ):
+        self.signature = signature
+        self.slot = slot
+        self.timestamp = timestamp
+        self.source = source
+        self.owner = owner
+        self.in_mint = in_mint
+        self.in_amount = in_amount
+        self.out_mint = out_mint
+        self.out_amount = out_amount
+
+    @property
+    def is_buy(self) -> bool:
+        return self.in_mint == SOL_MINT
+
+    @property
+    def is_sell(self) -> bool:
+        return self.out_mint == SOL_MINT
+
+    @property
+    def token_mint(self) -> str:
+        """The traded token: what was received, unless that was SOL"""
+        return self.in_mint if self.out_mint == SOL_MINT else self.out_mint
+
+    def __repr__(self) -> str:
+        return (
+            f"Swap({self.signature}, {self.owner}: {self.in_amount} {self.in_mint} -> "
+            f"{self.out_amount} {self.out_mint}, {self.source})"
+        )
+
+
+def wallet_deltas(txn: Dict[str, Any], owner: str) -> Dict[str, float]:
+    """
+    Net balance change per mint for `owner` in a single transaction, SOL
+    (wrapped when present, otherwise native) under SOL_MINT.
+    """
+    deltas: Dict[str, float] = {}
+    for transfer in txn.get("tokenTransfers") or ():
+        mint = transfer.get("mint")
+        amount = transfer.get("tokenAmount")
+        if not mint or not amount:
+            continue
+        if transfer.get("toUserAccount") == owner:
+            deltas[mint] = deltas.get(mint, 0.0) + float(amount)
+        if transfer.get("fromUserAccount") == owner:
+            deltas[mint] = deltas.get(mint, 0.0) - float(amount)
+
+    if not deltas.get(SOL_MINT):
+        native = 0
+        for transfer in txn.get("nativeTransfers") or ():
+            amount = transfer.get("amount")
+            if not amount:
+                continue
+            if transfer.get("toUserAccount") == owner:
+                native += amount
+            if transfer.get("fromUserAccount") == owner:
+                native -= amount
+        if native:
+            deltas[SOL_MINT] = native / LAMPORTS_PER_SOL
+
+    return deltas
+
+
+def _largest(legs: List[tuple]) -> tuple:
+    return max(legs, key=lambda leg: leg[1])
+
+
+def decode_swap(txn: Dict[str, Any], owner: Optional[str] = None) -> Optional[Swap]:
+    """
+    Decodes a Helius enhanced transaction into a Swap.
+
+    Args:
+        txn (dict): One transaction of a webhook payload or of the transactions API.
+        owner (str): Wallet to decode for. Defaults to the fee payer, or to the
+            receiver of the first token transfer when the fee payer didn't trade
+            (relayed pump.fun buys).
+
+    Returns:
+        Optional[Swap]: None for failed transactions and transactions where the
+        owner didn't give up one asset for another.
+    """
+    if txn.get("transactionError"):
+        return None
+
+    if owner is None:
+        owner = txn.get("feePayer")
+        deltas = wallet_deltas(txn, owner) if owner else {}
+        if not any(mint != SOL_MINT for mint in deltas):
+            transfers = txn.get("tokenTransfers") or ()
+            receiver = transfers[0].get("toUserAccount") if transfers else None
+            if not receiver or receiver == owner:
+                return None
+            owner = receiver
+            deltas = wallet_deltas(txn, owner)
+    else:
+        deltas = wallet_deltas(txn, owner)
+
+    sol = deltas.pop(SOL_MINT, 0.0)
+    gained = [(mint, amount) for mint, amount in deltas.items() if amount > 0]
+    spent = [(mint, -amount) for mint, amount in deltas.items() if amount < 0]
+
+    # SOL is the counter asset whenever it moved, multi-token legs report the largest
+    if gained and sol < 0:
+        (in_mint, in_amount), (out_mint, out_amount) = (SOL_MINT, -sol), _largest(gained)
+    elif spent and sol > 0:
+        (in_mint, in_amount), (out_mint, out_amount) = _largest(spent), (SOL_MINT, sol)
+    elif gained and spent:
+        (in_mint, in_amount), (out_mint, out_amount) = _largest(spent), _largest(gained)
+    else:
+        return None
+
+    return Swap(
+        txn.get("signature"), txn.get("slot"), txn.get("timestamp"), txn.get("source"),
+        owner, in_mint, in_amount, out_mint, out_amount,
+    )
+
+
+def decode_swaps(transactions: Iterable[Dict[str, Any]], owner: Optional[str] = None) -> List[Swap]:
+    """decode_swap() over a batch, e.g. a wallet's history, skipping non-swaps"""
+    swaps = []
+    for txn in transactions:
+        swap = decode_swap(txn, owner)
+        if swap is not None:
+            swaps.append(swap)
+    return swaps
@@ -6,13 +6,18 @@ when fetching token data from GMGN.ai.
 
 Refactored: 2025-10-18
 """
-from logger.logger import logger
-from database.database import AsyncSession, Token
-from typing import Any, Dict, Optional, TypedDict
+from logger.logger import get_logger
+from database.database import AsyncSession, AsyncSessionFactory, Token
+from config.settings import GMGN_HOST, TOKEN_FLUSH_INTERVAL_MS, TOKEN_FLUSH_MAX_ROWS, WALLET_STATS_TTL, WALLET_STATS_CACHE_SIZE
+from bot.utils.write_buffer import WriteBuffer
+from bot.utils.metrics import TimedClient, register_cache, register_write_buffer
+from bot.utils.cache import TTLCache
+from bot.utils.tracing import traced
+from bot.utils.token_metrics import record_token_metrics
+from typing import Any, Dict, List, Optional, TypedDict
 import aiohttp
 import asyncio
 import pandas as pd
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime
 
@@ -20,6 +25,8 @@ from datetime import datetime
 from gmgn.client import gmgn
 from functools import wraps
 
+logger = get_logger("token")
+
 class TokenInfo(TypedDict):
     holders: dict
     links: dict 
@@ -44,7 +51,8 @@ def get_gmgn_client():
     """Get or create global gmgn client instance"""
     global _gmgn_client
     if _gmgn_client is None:
-        _gmgn_client = gmgn()
+        # Every endpoint call is timed and counted under external_call_seconds{service="gmgn"}
+        _gmgn_client = TimedClient(gmgn(GMGN_HOST), "gmgn")
     return _gmgn_client
 
 # ============================================================================
@@ -333,10 +341,10 @@ async def get_token_info(token: str) -> Optional[Dict]:
         
         # Run all requests concurrently
         results = await asyncio.gather(
-            get_top_holders(token),
-            get_token_links(token),
-            get_token_stats(token),
-            get_token_profile(token),
+            traced("gmgn.holders", get_top_holders(token)),
+            traced("gmgn.links", get_token_links(token)),
+            traced("gmgn.stats", get_token_stats(token)),
+            traced("gmgn.profile", get_token_profile(token)),
             return_exceptions=True
         )
         
@@ -364,20 +372,22 @@ async def get_token_info(token: str) -> Optional[Dict]:
             logger.info("This is likely due to Cloudflare protection. Consider using alternative data sources or proxies.")
             return None
             
-        return {
+        token_info = {
             "mint": token,
             "holders": holders,
             "links": links,
             "stats": stats,
             "profile": profile
         }
+        record_token_metrics(token_info)
+        return token_info
         
     except Exception as e:
         logger.error(f"Error getting token info: {e}")
         return None
     
-async def get_wallet_stats(wallet_address: str, period: str = '7d') -> Optional[Dict[str, Any]]:
-    """Get general wallet statistics using gmgnai-wrapper (across all tokens)"""
+async def fetch_wallet_stats(wallet_address: str, period: str = '7d') -> Optional[Dict[str, Any]]:
+    """Get general wallet statistics using gmgnai-wrapper (across all tokens). Always calls GMGN."""
     try:
         client = get_gmgn_client()
         
@@ -413,60 +423,119 @@ async def get_wallet_stats(wallet_address: str, period: str = '7d') -> Optional[
         logger.error(f"Error getting wallet stats via wrapper: {e}")
         return None
 
-async def save_token_info(token_info: Dict[str, Any]) -> bool:
-    try:
-        from database.database import AsyncSessionFactory
-        async with AsyncSessionFactory() as session:
-            # Add helper function to safely convert values
-            def get_native_int(val):
-                return int(val.item()) if hasattr(val, 'item') else int(val)
-            
-            def get_native_float(val):
-                return float(val.item()) if hasattr(val, 'item') else float(val)
-
-            update_values = {
-                'ca': token_info['profile']['ca'],
-                'symbol': token_info['profile']['symbol'],
-                'name': token_info['profile']['name'],
-                'holders': token_info['profile']['holders'],
-                'logo': token_info['profile']['logo'],
-                'price': token_info['profile']['price'],
-                'top_10_holder_rate': token_info['profile']['top_10_holder_rate'],
-                'volume_1h': token_info['profile']['volume_1h'],
-                'volume_5m': token_info['profile']['volume_5m'],
-                'liquidity': token_info['profile']['liquidity'],
-                'twitter': token_info['links']['twitter'],
-                'github': token_info['links']['github'],
-                'telegram': token_info['links']['telegram'],
-                'website': token_info['links']['website'],
-                'bc_owners_percent': get_native_float(token_info['stats']['bc_owners_percent']),
-                'insiders_percent': get_native_float(token_info['stats']['insiders_percent']),
-                'avg_profit_percent': get_native_float(token_info['holders']['avg_profit_percent']),
-                'fresh_wallets': get_native_int(token_info['holders']['fresh_wallets']),
-                'sold_wallets': get_native_int(token_info['holders']['sold_wallets']),
-                'suspicious_wallets': get_native_int(token_info['holders']['suspicious_wallets']),
-                'insiders_wallets': get_native_int(token_info['holders']['insiders_wallets']),
-                'phishing_wallets': get_native_int(token_info['holders']['phishing_wallets']),
-                'profitable_wallets': get_native_int(token_info['holders']['profitable_wallets']),
-                'same_address_funded': get_native_int(token_info['holders']['same_address_funded']),
-                'created_date': datetime.utcnow()  # Add this line to create timezone-naive UTC datetime
-            }
+# (wallet_address, period) -> stats; kept fresh by the prewarm_wallet_stats job
+wallet_stats_cache = TTLCache(WALLET_STATS_CACHE_SIZE, WALLET_STATS_TTL)
+register_cache("wallet_stats", wallet_stats_cache)
+_wallet_stats_inflight: Dict[tuple, asyncio.Task] = {}
+
+def _wallet_stats_refresh(wallet_address: str, period: str) -> asyncio.Task:
+    """The in-flight GMGN fetch for (wallet, period), started if there is none"""
+    key = (wallet_address, period)
+    task = _wallet_stats_inflight.get(key)
+    if task is None:
+        async def fetch():
+            try:
+                stats = await fetch_wallet_stats(wallet_address, period)
+                # Failures are not cached, the next caller retries
+                if stats is not None:
+                    wallet_stats_cache.set(key, stats)
+                return stats
+            finally:
+                _wallet_stats_inflight.pop(key, None)
+        task = _wallet_stats_inflight[key] = asyncio.create_task(fetch())
+    return task
+
+async def refresh_wallet_stats(wallet_address: str, period: str = '7d') -> Optional[Dict[str, Any]]:
+    """
+    Fetches wallet stats from GMGN into the cache. Concurrent refreshes of the
+    same (wallet, period) share one request.
+    """
+    # A cancelled alert must not cancel the shared fetch
+    return await asyncio.shield(_wallet_stats_refresh(wallet_address, period))
+
+async def get_wallet_stats(wallet_address: str, period: str = '7d') -> Optional[Dict[str, Any]]:
+    """
+    Wallet statistics from the cache. A stale entry is returned right away and
+    refreshed in the background; only wallets never seen before wait on GMGN.
+    """
+    stats, fresh = wallet_stats_cache.lookup((wallet_address, period))
+    if stats is None:
+        return await refresh_wallet_stats(wallet_address, period)
+    if not fresh:
+        _wallet_stats_refresh(wallet_address, period)
+    return stats
+
+# 25 columns per row, keeps each INSERT below asyncpg's 32767 bind parameters
+TOKEN_UPSERT_CHUNK_SIZE = 1000
 
-            stmt = insert(Token).values(
-                **update_values
-            ).on_conflict_do_update(
+def _token_row(token_info: Dict[str, Any]) -> Dict[str, Any]:
+    # Helper functions to safely convert numpy values
+    def get_native_int(val):
+        return int(val.item()) if hasattr(val, 'item') else int(val)
+
+    def get_native_float(val):
+        return float(val.item()) if hasattr(val, 'item') else float(val)
+
+    return {
+        'ca': token_info['profile']['ca'],
+        'symbol': token_info['profile']['symbol'],
+        'name': token_info['profile']['name'],
+        'holders': token_info['profile']['holders'],
+        'logo': token_info['profile']['logo'],
+        'price': token_info['profile']['price'],
+        'top_10_holder_rate': token_info['profile']['top_10_holder_rate'],
+        'volume_1h': token_info['profile']['volume_1h'],
+        'volume_5m': token_info['profile']['volume_5m'],
+        'liquidity': token_info['profile']['liquidity'],
+        'twitter': token_info['links']['twitter'],
+        'github': token_info['links']['github'],
+        'telegram': token_info['links']['telegram'],
+        'website': token_info['links']['website'],
+        'bc_owners_percent': get_native_float(token_info['stats']['bc_owners_percent']),
+        'insiders_percent': get_native_float(token_info['stats']['insiders_percent']),
+        'avg_profit_percent': get_native_float(token_info['holders']['avg_profit_percent']),
+        'fresh_wallets': get_native_int(token_info['holders']['fresh_wallets']),
+        'sold_wallets': get_native_int(token_info['holders']['sold_wallets']),
+        'suspicious_wallets': get_native_int(token_info['holders']['suspicious_wallets']),
+        'insiders_wallets': get_native_int(token_info['holders']['insiders_wallets']),
+        'phishing_wallets': get_native_int(token_info['holders']['phishing_wallets']),
+        'profitable_wallets': get_native_int(token_info['holders']['profitable_wallets']),
+        'same_address_funded': get_native_int(token_info['holders']['same_address_funded']),
+        'created_date': datetime.utcnow()  # timezone-naive UTC datetime
+    }
+
+async def write_tokens(rows: List[Dict[str, Any]]) -> None:
+    """One multi-row upsert per chunk, the latest snapshot wins for each ca"""
+    async with AsyncSessionFactory() as session:
+        for i in range(0, len(rows), TOKEN_UPSERT_CHUNK_SIZE):
+            stmt = insert(Token).values(rows[i:i + TOKEN_UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
                 index_elements=['ca'],
-                set_=update_values
+                set_={column: stmt.excluded[column] for column in rows[0] if column != 'ca'}
             )
-
             await session.execute(stmt)
-            await session.commit()
-            return True
-            
-    except (IntegrityError, SQLAlchemyError) as e:
-        logger.error(f"DB error saving token: {e}")
-        await session.rollback()
-        return False
-    except KeyError as e:
+        await session.commit()
+
+token_writer = WriteBuffer(
+    "tokens",
+    write_tokens,
+    max_rows=TOKEN_FLUSH_MAX_ROWS,
+    flush_interval=TOKEN_FLUSH_INTERVAL_MS / 1000,
+    key=lambda row: row['ca'],
+)
+register_write_buffer(token_writer)
+
+async def save_token_info(token_info: Dict[str, Any]) -> bool:
+    """
+    Queues token_info for the next batched upsert into tokens. Repeated saves
+    of the same mint before the flush collapse into the latest one.
+
+    Returns:
+        bool: True if the snapshot was queued, False if token_info is incomplete.
+    """
+    try:
+        token_writer.add(_token_row(token_info))
+        return True
+    except (KeyError, TypeError, ValueError) as e:
         logger.error(f"Missing field in token info: {e}")
         return False
@@ -0,0 +1,176 @@
+"""
+On-disk mint metadata index (mint -> symbol, decimals).
+
+The index is a SQLite table clustered on the mint (WITHOUT ROWID) and read
+through SQLite's memory-mapped I/O, so lookups touch only the pages they need
+and the process never holds the whole token list. Startup only opens the file;
+refreshing from the solana-labs token list is a separate, in-place upsert.
+
+Lookups run on the event loop, so they never wait for a refresh: the upsert
+writes on a connection of its own, and in WAL mode the reader connection keeps
+seeing the last committed rows until the refresh commits.
+"""
+import aiohttp
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from config.settings import TOKEN_INDEX_PATH, TOKEN_INDEX_MMAP_SIZE
+from logger.logger import get_logger
+
+logger = get_logger("token_index")
+
+TOKEN_LIST_URL = "https://raw.githubusercontent.com/solana-labs/token-list/main/src/tokens/solana.tokenlist.json"
+TOKEN_INDEX_MAX_AGE = 24 * 60 * 60  # Refresh from the token list once a day
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mints (
+    mint TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    decimals INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class TokenIndex:
+    def __init__(self, path: str = TOKEN_INDEX_PATH, mmap_size: int = TOKEN_INDEX_MMAP_SIZE):
+        """
+        Opens (or creates) the mint index. Never touches the network.
+
+        Args:
+            path (str): Location of the SQLite file.
+            mmap_size (int): Bytes of the file SQLite may memory-map for reads.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Only the writer's transaction is serialised, readers never wait on it
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.executescript(SCHEMA)
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._reader.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._reader.execute("PRAGMA query_only=ON")
+
+    def close(self) -> None:
+        with self._read_lock:
+            self._reader.close()
+        with self._write_lock:
+            self._writer.close()
+
+    def lookup(self, mint: str) -> Optional[Tuple[str, int]]:
+        """Returns (symbol, decimals) for a mint, or None if it isn't indexed."""
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT symbol, decimals FROM mints WHERE mint = ?", (mint,)
+            ).fetchone()
+
+    def symbol(self, mint: str, default: str = "Unknown Token") -> str:
+        row = self.lookup(mint)
+        return row[0] if row else default
+
+    def lookup_many(self, mints: Iterable[str]) -> Dict[str, Tuple[str, int]]:
+        """Returns {mint: (symbol, decimals)} for the indexed mints among `mints`."""
+        mints = list(mints)
+        found = {}
+        with self._read_lock:
+            # Stay well below SQLite's bound parameter limit
+            for i in range(0, len(mints), 500):
+                chunk = mints[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for mint, symbol, decimals in self._reader.execute(
+                    f"SELECT mint, symbol, decimals FROM mints WHERE mint IN ({placeholders})", chunk
+                ):
+                    found[mint] = (symbol, decimals)
+        return found
+
+    def upsert(self, rows: Iterable[Tuple[str, str, int]]) -> int:
+        """Inserts or updates (mint, symbol, decimals) rows in one transaction, invisible to lookups until it commits."""
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            cursor.execute("BEGIN")
+            try:
+                cursor.executemany(
+                    "INSERT INTO mints (mint, symbol, decimals) VALUES (?, ?, ?) "
+                    "ON CONFLICT(mint) DO UPDATE SET symbol = excluded.symbol, decimals = excluded.decimals",
+                    rows
+                )
+                count = cursor.rowcount
+                cursor.execute(
+                    "INSERT INTO meta (key, value) VALUES ('updated_at', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (str(int(time.time())),)
+                )
+                cursor.execute("COMMIT")
+                return count
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._read_lock:
+            return self._reader.execute("SELECT count(*) FROM mints").fetchone()[0]
+
+    def updated_at(self) -> Optional[int]:
+        with self._read_lock:
+            row = self._reader.execute("SELECT value FROM meta WHERE key = 'updated_at'").fetchone()
+        return int(row[0]) if row else None
+
+    def is_stale(self, max_age: int = TOKEN_INDEX_MAX_AGE) -> bool:
+        updated_at = self.updated_at()
+        return updated_at is None or time.time() - updated_at > max_age
+
+
+def _token_list_rows(token_list: List[dict]) -> List[Tuple[str, str, int]]:
+    return [
+        (token["address"], token.get("symbol") or "", int(token.get("decimals") or 0))
+        for token in token_list
+        if token.get("address")
+    ]
+
+
+async def refresh_token_index(index: Optional["TokenIndex"] = None, url: str = TOKEN_LIST_URL) -> int:
+    """
+    Downloads the solana-labs token list and upserts it into the index in place.
+    Lookups keep working from the existing rows while the refresh runs.
+
+    Returns:
+        int: Number of rows written, 0 if the download failed.
+    """
+    index = index or get_token_index()
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120, connect=10)) as session:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                # raw.githubusercontent serves the list as text/plain
+                token_list = (await response.json(content_type=None))["tokens"]
+    except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+        logger.error(f"Error fetching token list: {e}")
+        return 0
+
+    rows = _token_list_rows(token_list)
+    del token_list
+    count = await asyncio.to_thread(index.upsert, rows)
+    logger.info(f"Token index refreshed ({count} mints)")
+    return count
+
+
+# Global index instance (reused across calls)
+_token_index: Optional[TokenIndex] = None
+
+def get_token_index() -> TokenIndex:
+    """Get or open the global token index"""
+    global _token_index
+    if _token_index is None:
+        _token_index = TokenIndex()
+    return _token_index
@@ -0,0 +1,164 @@
+"""
+Token metrics time series.
+
+Every token_info fetched for an alert is also appended to token_metrics as a
+(mint, ts) snapshot through a buffered writer, so earlier holder counts,
+insider percentages, liquidity and volume survive later save_token_info
+overwrites. The deltas ("holders +40% since first seen") come from two
+primary key probes instead of another GMGN call, and process_webhook adds them
+to new alerts as token_info["history"] (see since_first_snapshot).
+"""
+from logger.logger import get_logger
+from config.settings import METRICS_FLUSH_INTERVAL_MS, METRICS_FLUSH_MAX_ROWS
+from database.database import AsyncSessionFactory, TokenMetric
+from bot.utils.write_buffer import WriteBuffer
+from bot.utils.metrics import register_write_buffer
+from sqlalchemy import select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional
+
+logger = get_logger("token_metrics")
+
+METRIC_FIELDS = (
+    "holders", "price", "liquidity", "volume_1h", "volume_5m",
+    "insiders_percent", "bc_owners_percent", "top_10_holder_rate",
+)
+# Compared in alerts with the token's first snapshot
+HISTORY_FIELDS = ("holders", "liquidity", "insiders_percent")
+# 10 columns per row, keeps each INSERT below asyncpg's 32767 bind parameters
+INSERT_CHUNK_SIZE = 2000
+
+
+def _native(value: Any) -> Any:
+    # numpy scalars from the pandas based holder analysis
+    return value.item() if hasattr(value, "item") else value
+
+
+def token_metrics_row(token_info: Dict[str, Any], ts: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Flatten a get_token_info result into a token_metrics row"""
+    profile = token_info.get("profile") or {}
+    stats = token_info.get("stats") or {}
+    mint = token_info.get("mint") or profile.get("ca")
+    if not mint:
+        return None
+    return {
+        "mint": mint,
+        "ts": ts or datetime.now(UTC),
+        "holders": _native(stats.get("holders", profile.get("holders"))),
+        "price": _native(profile.get("price")),
+        "liquidity": _native(profile.get("liquidity")),
+        "volume_1h": _native(profile.get("volume_1h")),
+        "volume_5m": _native(profile.get("volume_5m")),
+        "insiders_percent": _native(stats.get("insiders_percent")),
+        "bc_owners_percent": _native(stats.get("bc_owners_percent")),
+        "top_10_holder_rate": _native(profile.get("top_10_holder_rate")),
+    }
+
+
+async def write_token_metrics(rows: List[Dict[str, Any]]) -> None:
+    async with AsyncSessionFactory() as session:
+        for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+            # A snapshot for the same (mint, ts) is a retry, keep the first one
+            stmt = insert(TokenMetric).values(rows[i:i + INSERT_CHUNK_SIZE]).on_conflict_do_nothing()
+            await session.execute(stmt)
+        await session.commit()
+    logger.debug("Wrote %d token metric snapshots", len(rows))
+
+
+token_metrics_writer = WriteBuffer(
+    "token_metrics",
+    write_token_metrics,
+    max_rows=METRICS_FLUSH_MAX_ROWS,
+    flush_interval=METRICS_FLUSH_INTERVAL_MS / 1000,
+)
+register_write_buffer(token_metrics_writer)
+
+
+def record_token_metrics(token_info: Optional[Dict[str, Any]]) -> None:
+    """Queue a snapshot of token_info. Returns immediately."""
+    if not token_info:
+        return
+    row = token_metrics_row(token_info)
+    if row is not None:
+        token_metrics_writer.add(row)
+
+
+def _change(first: Optional[float], latest: Optional[float]) -> Dict[str, Optional[float]]:
+    if first is None or latest is None:
+        return {"first": first, "latest": latest, "change": None, "change_percent": None}
+    return {
+        "first": first,
+        "latest": latest,
+        "change": latest - first,
+        "change_percent": (latest - first) / first * 100 if first else None,
+    }
+
+
+async def get_token_metric_deltas(mint: str, since: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Compares the first snapshot of a mint (optionally the first one at or after
+    `since`) with the latest one.
+
+    Returns:
+        Optional[Dict[str, Any]]: {"first_ts", "latest_ts", "snapshots_span_seconds",
+        <metric>: {"first", "latest", "change", "change_percent"}} or None without snapshots
+        (since `since`). With a single snapshot first and latest are the same row.
+    """
+    first = select(TokenMetric).where(TokenMetric.mint == mint)
+    if since is not None:
+        first = first.where(TokenMetric.ts >= since)
+    first = first.order_by(TokenMetric.ts.asc()).limit(1)
+    latest = select(TokenMetric).where(TokenMetric.mint == mint)
+    if since is not None:
+        # Otherwise a mint without snapshots since then would compare its old latest with itself
+        latest = latest.where(TokenMetric.ts >= since)
+    latest = latest.order_by(TokenMetric.ts.desc()).limit(1)
+
+    try:
+        async with AsyncSessionFactory() as session:
+            both = union_all(first.subquery().select(), latest.subquery().select()).subquery()
+            rows = (await session.execute(select(both).order_by(both.c.ts))).mappings().all()
+    except Exception as e:
+        logger.error(f"Error reading token metrics for {mint}: {e}")
+        return None
+
+    if not rows:
+        return None
+    first_row, latest_row = rows[0], rows[-1]
+    deltas = {
+        "first_ts": first_row["ts"],
+        "latest_ts": latest_row["ts"],
+        "snapshots_span_seconds": (latest_row["ts"] - first_row["ts"]).total_seconds(),
+    }
+    for field in METRIC_FIELDS:
+        deltas[field] = _change(first_row[field], latest_row[field])
+    return deltas
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def since_first_snapshot(
+    token_info: Dict[str, Any], deltas: Optional[Dict[str, Any]], now: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Changes from the first stored snapshot of a mint (get_token_metric_deltas)
+    to the token_info about to be alerted. Plain floats, so the result survives
+    the alert handoff between workers.
+
+    Returns:
+        Optional[Dict[str, Any]]: {"age_seconds", <HISTORY_FIELDS>: {"first", "latest", "change",
+        "change_percent"}}, None if the mint has no earlier snapshot.
+    """
+    current = token_metrics_row(token_info, now)
+    if not deltas or current is None:
+        return None
+    history = {"age_seconds": (current["ts"] - deltas["first_ts"]).total_seconds()}
+    for field in HISTORY_FIELDS:
+        history[field] = _change(_number(deltas[field]["first"]), _number(current[field]))
+    return history
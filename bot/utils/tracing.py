@@ -0,0 +1,243 @@
+"""
+Lightweight tracing for the webhook -> alert pipeline.
+
+A trace is started per webhook delivery, keyed by the transaction signature,
+and every stage wrapped in span() records its offset and duration. The current
+trace and span live in contextvars, so spans opened inside asyncio.gather()
+children nest under the span that started them. Outside of a trace span() is a
+no-op.
+
+Work handed to another task that outlives the block, like an alert waiting in
+the outbound queue, keeps the trace open with hold(). The trace then finishes
+when the last held span ends, so a webhook trace runs until its alert is
+delivered to Telegram. Alerts a follower worker hands to the leader
+(bot/utils/handoff.py) leave its trace at the handoff.
+
+Finished traces feed trace_span_seconds{span} for per-stage percentiles, and
+traces slower than TRACE_SLOW_MS are appended to TRACE_EXPORT_PATH as JSONL.
+"""
+from config.settings import TRACE_SLOW_MS, TRACE_EXPORT_PATH
+from bot.utils.metrics import LATENCY_BUCKETS
+from logger.logger import get_logger, queue_handler
+from prometheus_client import Histogram
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = get_logger("tracing")
+
+SPAN_SECONDS = Histogram(
+    "trace_span_seconds", "Duration of each traced pipeline stage", ["span"], buckets=LATENCY_BUCKETS
+)
+
+_span_ids = itertools.count(1)
+_export_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "started", "duration", "attrs", "error")
+
+    def __init__(self, name: str, parent_id: Optional[int], attrs: Dict[str, Any]):
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+
+def _describe(error: Optional[BaseException]) -> Optional[str]:
+    return f"{type(error).__name__}: {error}" if error is not None else None
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "started", "wall_started", "spans", "held", "closed", "finished")
+
+    def __init__(self, trace_id: str, name: str, started: Optional[float] = None):
+        self.trace_id = trace_id
+        self.name = name
+        self.started = started if started is not None else time.perf_counter()
+        self.wall_started = datetime.now(UTC)
+        self.spans: List[Span] = []
+        # Spans from hold() not ended yet, and whether start_trace()'s block is over
+        self.held = 0
+        self.closed = False
+        self.finished = False
+
+    def to_dict(self, duration: float) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.wall_started.isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "spans": [
+                {
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "name": s.name,
+                    "offset_ms": round((s.started - self.started) * 1000, 3),
+                    "duration_ms": round(s.duration * 1000, 3) if s.duration is not None else None,
+                    "error": s.error,
+                    **({"attrs": s.attrs} if s.attrs else {}),
+                }
+                for s in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def start_trace(trace_id: str, name: str = "webhook", started: Optional[float] = None) -> Iterator[Trace]:
+    """
+    Opens a trace for the enclosed block.
+
+    Args:
+        trace_id (str): Correlates the trace with the transaction, e.g. the Helius signature.
+        name (str): Root span name.
+        started (float): time.perf_counter() the pipeline actually started at, if earlier.
+    """
+    trace = Trace(trace_id, name, started)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.closed = True
+        if not trace.held:
+            _finish(trace)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Times the enclosed block as a stage of the current trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attrs)
+    trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.started
+        _current_span.reset(token)
+
+
+class HeldSpan:
+    """A span of a trace that stays open after the block that started it, see hold()"""
+    __slots__ = ("trace", "span")
+
+    def __init__(self, trace: Trace, span: Span):
+        self.trace = trace
+        self.span = span
+
+    def child(self, name: str, started: float, error: Optional[BaseException] = None, **attrs: Any) -> None:
+        """Records a stage that ran from `started` (time.perf_counter()) until now"""
+        if self.trace.finished:
+            return
+        current = Span(name, self.span.span_id, attrs)
+        current.started = started
+        current.duration = time.perf_counter() - started
+        current.error = _describe(error)
+        self.trace.spans.append(current)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Ends the span, and the trace if nothing else holds it open"""
+        if self.span.duration is not None:
+            return
+        self.span.duration = time.perf_counter() - self.span.started
+        self.span.error = _describe(error)
+        self.trace.held -= 1
+        if self.trace.closed and not self.trace.held:
+            _finish(self.trace)
+
+
+def hold(name: str, **attrs: Any) -> Optional[HeldSpan]:
+    """
+    Opens a span of the current trace that ends with HeldSpan.end() instead of
+    with the enclosing block. None outside of a trace, or in a context copied
+    from a trace that already finished (e.g. a done callback).
+    """
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        return None
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attrs)
+    trace.spans.append(current)
+    trace.held += 1
+    return HeldSpan(trace, current)
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamps records logged inside a trace with its trace_id"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = _current_trace.get()
+        if trace is not None:
+            record.trace_id = trace.trace_id
+        return True
+
+
+# Runs on the logging thread of the caller, where the trace contextvar is visible
+queue_handler.addFilter(TraceIdFilter())
+
+
+def _finish(trace: Trace) -> None:
+    trace.finished = True
+    duration = time.perf_counter() - trace.started
+    for s in trace.spans:
+        if s.duration is not None:
+            SPAN_SECONDS.labels(s.name).observe(s.duration)
+    if duration * 1000 < TRACE_SLOW_MS:
+        return
+    logger.info(f"Slow trace {trace.trace_id}: {duration * 1000:.0f} ms over {len(trace.spans)} spans")
+    if not TRACE_EXPORT_PATH:
+        return
+    line = json.dumps(trace.to_dict(duration), default=str)
+    try:
+        # Keep file I/O off the event loop
+        asyncio.get_running_loop().run_in_executor(None, _append_line, TRACE_EXPORT_PATH, line)
+    except RuntimeError:
+        _append_line(TRACE_EXPORT_PATH, line)
+
+
+def _append_line(path: str, line: str) -> None:
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _export_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logger.error(f"Error exporting trace to {path}: {e}")
+
+
+async def traced(name: str, awaitable, **attrs: Any) -> Any:
+    """Awaits `awaitable` inside span(name), handy for asyncio.gather() arguments"""
+    with span(name, **attrs):
+        return await awaitable
@@ -1,142 +1,174 @@
-import requests
-import os
-from config.settings import HELIUS_API_KEY
+import aiohttp
+import asyncio
+from typing import Dict, List, Optional
+from config.settings import HELIUS_API_KEY, HELIUS_API_URL, BALANCE_CONCURRENCY
+from bot.utils.token_index import get_token_index
+from bot.utils.metrics import http_trace
+from bot.utils.fastjson import loads
+from logger.logger import get_logger
+
+logger = get_logger("wallet")
+
 
 class SolanaWalletBalanceChecker:
     def __init__(
         self,
         api_key: str = HELIUS_API_KEY,
-        base_url: str = "https://api.helius.xyz/v0/addresses/",
+        base_url: str = f"{HELIUS_API_URL}/v0/addresses/",
+        concurrency: int = BALANCE_CONCURRENCY,
     ):
         """
-        Initializes the Solana wallet balance checker using Hélius API.
+        Initializes the async Solana wallet balance checker using Hélius API.
 
         Args:
             api_key (str): Your Hélius API key.
             base_url (str): The base URL for the Hélius API.
+            concurrency (int): Maximum number of balance requests in flight.
         """
         self.api_key = api_key
         self.base_url = base_url
-        self.token_mapping = self.load_token_list()
-
-    def load_token_list(self) -> dict:
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30, connect=10),
+                trace_configs=[http_trace("helius", "balances")]
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def token_symbol(self, mint: str) -> str:
+        return get_token_index().symbol(mint)
+
+    async def get_wallet_balances(self, wallet_address: str) -> Optional[dict]:
         """
-        Loads the Solana token list to map mint addresses to token names.
+        Fetches the raw SOL and SPL token balances for the given wallet address.
+
+        Args:
+            wallet_address (str): The public key of the wallet.
 
         Returns:
-            dict: A dictionary mapping mint addresses to token names.
+            dict: The Hélius balances response, or None if the request failed.
         """
-        url = "https://raw.githubusercontent.com/solana-labs/token-list/main/src/tokens/solana.tokenlist.json"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            token_list = response.json()["tokens"]
-            return {
-                token["address"]: token["symbol"]
-                for token in token_list
-            }
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching token list: {e}")
-            return {}
-
-    def get_wallet_balances(self, wallet_address: str) -> dict:
+        url = f"{self.base_url}{wallet_address}/balances"
+        session = await self.get_session()
+        async with self._semaphore:
+            try:
+                async with session.get(url, params={"api-key": self.api_key}) as response:
+                    response.raise_for_status()
+                    return await response.json(loads=loads)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error fetching wallet balances for {wallet_address}: {e}")
+                return None
+
+    async def get_token_balances(self, wallet_address: str) -> Optional[Dict[str, float]]:
         """
-        Fetches the SOL and SPL token balances for the given wallet address.
-
-        Args:
-            wallet_address (str): The public key of the wallet.
+        Fetches the SPL token balances of a wallet.
 
         Returns:
-            dict: A dictionary containing SOL and SPL token balances.
+            dict: {mint: ui_amount} for every token with a non-zero balance,
+            or None if the request failed.
         """
-        url = f"{self.base_url}{wallet_address}/balances?api-key={self.api_key}"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Ensure the request was successful
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching wallet balances: {e}")
+        balances_data = await self.get_wallet_balances(wallet_address)
+        if balances_data is None:
             return None
 
-    def display_balances(self, wallet_address: str) -> None:
+        holdings = {}
+        for token in balances_data.get("tokens", []):
+            mint = token.get("mint")
+            amount = token.get("amount", 0)
+            if not mint or not amount:
+                continue
+            holdings[mint] = amount / (10 ** token.get("decimals", 0))
+        return holdings
+
+    async def get_multiple_balances(self, wallet_addresses: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Fetches SPL token balances for many wallets concurrently.
+
+        Returns:
+            dict: {wallet: {mint: ui_amount}}. Wallets whose request failed are
+            left out so callers don't mistake them for empty wallets.
+        """
+        results = await asyncio.gather(
+            *(self.get_token_balances(address) for address in wallet_addresses)
+        )
+        return {
+            address: holdings
+            for address, holdings in zip(wallet_addresses, results)
+            if holdings is not None
+        }
+
+    async def format_balances(self, wallet_address: str) -> str:
         """
-        Fetches and displays the SOL and SPL token balances with token names.
+        Fetches the SOL and SPL token balances and formats them with token names.
 
         Args:
             wallet_address (str): The public key of the wallet.
         """
-        print(f"Fetching balances for wallet: {wallet_address}")
-        balances_data = self.get_wallet_balances(wallet_address)
-
+        balances_data = await self.get_wallet_balances(wallet_address)
         if not balances_data:
-            print("No balance data found or API request failed.")
-            return
+            return "No balance data found or API request failed."
 
-        # Display SOL balance
-        sol_balance = (
-            balances_data.get("nativeBalance", 0) / 1e9
-        )  # Convert lamports to SOL
-        print(f"SOL: {sol_balance}")
-
-        # Display SPL token balances
         tokens = balances_data.get("tokens", [])
+        symbols = get_token_index().lookup_many(token.get("mint") for token in tokens)
+        lines = [f"SOL: {balances_data.get('nativeBalance', 0) / 1e9}"]  # Convert lamports to SOL
+
         if not tokens:
-            print("No SPL tokens found.")
+            lines.append("No SPL tokens found.")
         else:
-            print("SPL Tokens:")
+            lines.append("SPL Tokens:")
             for token in tokens:
                 mint = token.get("mint")
-                amount = token.get("amount", 0)
-                decimals = token.get("decimals", 0)
-                balance = amount / (10**decimals)
-                token_name = self.token_mapping.get(
-                    mint, "Unknown Token"
-                )
-                print(f"  {token_name} ({mint}): {balance}")
+                balance = token.get("amount", 0) / (10 ** token.get("decimals", 0))
+                lines.append(f"  {symbols.get(mint, ('Unknown Token',))[0]} ({mint}): {balance}")
+        return "\n".join(lines)
+
 
+# Global checker instance (reused across calls)
+_balance_checker: Optional[SolanaWalletBalanceChecker] = None
 
-def check_solana_balance(wallet_address: str) -> str:
+def get_balance_checker() -> SolanaWalletBalanceChecker:
+    """Get or create global balance checker instance"""
+    global _balance_checker
+    if _balance_checker is None:
+        _balance_checker = SolanaWalletBalanceChecker()
+    return _balance_checker
+
+
+async def check_solana_balance(wallet_address: str) -> Dict[str, float]:
     """
-    Checks and returns the SOL and SPL token balances for a given Solana wallet address.
+    Checks the SPL token balances for a given Solana wallet address.
 
     Args:
         wallet_address (str): The public key of the Solana wallet.
 
     Returns:
-        str: A string representation of the SOL and SPL token balances.
+        dict: {mint: ui_amount} for every token the wallet holds.
 
     Raises:
-        ValueError: If the wallet_address is not a string.
-        TypeError: If the wallet_address is not a valid Solana wallet address.
+        TypeError: If the balances could not be fetched for the wallet address.
     """
-    try:
-        checker = SolanaWalletBalanceChecker(
-            api_key=HELIUS_API_KEY
-        )
-        balance_info = checker.display_balances(wallet_address)
-        return str(balance_info)
-    except Exception as e:
-        raise TypeError(
-            f"Invalid wallet_address: {wallet_address}. Error: {e}"
-        )
+    holdings = await get_balance_checker().get_token_balances(wallet_address)
+    if holdings is None:
+        raise TypeError(f"Could not fetch balances for wallet_address: {wallet_address}")
+    return holdings
 
 
-def check_multiple_wallets(wallet_addresses: list[str]) -> str:
+async def check_multiple_wallets(wallet_addresses: list[str]) -> Dict[str, Dict[str, float]]:
     """
-    Checks and returns the SOL and SPL token balances for multiple Solana wallet addresses.
+    Checks the SPL token balances for multiple Solana wallet addresses concurrently.
 
     Args:
         wallet_addresses (list[str]): A list of public keys of the Solana wallets.
 
     Returns:
-        list[str]: A list of string representations of the SOL and SPL token balances for each wallet address.
-
-    Raises:
-        ValueError: If any wallet_address in the list is not a string.
-        TypeError: If any wallet_address in the list is not a valid Solana wallet address.
+        dict: {wallet: {mint: ui_amount}} for every wallet whose balances were fetched.
     """
-    out = [
-        check_solana_balance(wallet_address)
-        for wallet_address in wallet_addresses
-    ]
-    return str(out)
\ No newline at end of file
+    return await get_balance_checker().get_multiple_balances(wallet_addresses)
@@ -0,0 +1,283 @@
+"""
+Helius webhook address sync.
+
+Helius only takes a webhook's full address list, so WebhookSync keeps the
+last list it sent to each webhook in WEBHOOK_SYNC_STATE_PATH and only PUTs the
+webhooks whose list (or URL) actually changes. Startup with the same wallets
+and the same URL makes no Helius call at all.
+
+Addresses stay on the webhook that already covers them. New ones fill the
+webhooks with room left, and once every webhook holds HELIUS_WEBHOOK_MAX_ADDRESSES
+another one is created. A webhook left without addresses is deleted rather
+than sent an empty list. Wallet changes picked up between syncs (add(),
+remove(), refresh()) are collected for WEBHOOK_SYNC_DEBOUNCE_MS and go out as
+one update.
+
+Without a state file the webhooks are read from Helius: WEBHOOK_ID, any
+webhook pointing at the current URL, and those listed in the state before.
+"""
+from config.settings import (
+    WEBHOOK_ID,
+    WEBHOOK_SECRET,
+    WEBHOOK_SYNC_STATE_PATH,
+    WEBHOOK_SYNC_DEBOUNCE_MS,
+    HELIUS_WEBHOOK_MAX_ADDRESSES,
+)
+from database.database import SmartWallet, AsyncSessionFactory
+from bot.utils.monitor import create_swap_webhook, delete_webhook, get_webhooks, update_webhook
+from bot.utils.fastjson import dumps, loads
+from logger.logger import get_logger
+from sqlalchemy import select
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import os
+
+logger = get_logger("webhook_sync")
+
+
+def plan_shards(
+    current: Dict[str, Set[str]],
+    desired: Set[str],
+    max_addresses: int
+) -> Tuple[Dict[str, Set[str]], List[Set[str]]]:
+    """
+    Spreads `desired` over the existing webhooks, moving as few addresses as possible.
+
+    Args:
+        current (dict): Addresses each webhook covers now, by webhook ID.
+        desired (set): Every address that should be covered.
+        max_addresses (int): Addresses one webhook may hold.
+
+    Returns:
+        Tuple[dict, list]: The new address set of every existing webhook, empty for
+            the ones no longer needed, and the address sets of webhooks that have to be created.
+    """
+    shards: Dict[str, Set[str]] = {}
+    placed: Set[str] = set()
+    for webhook_id, addresses in current.items():
+        # Addresses on two webhooks stay on the first, overfull webhooks give back their excess
+        kept = sorted((addresses & desired) - placed)[:max_addresses]
+        shards[webhook_id] = set(kept)
+        placed.update(kept)
+
+    missing = sorted(desired - placed)
+    for addresses in shards.values():
+        if not missing:
+            break
+        room = max_addresses - len(addresses)
+        if room > 0:
+            addresses.update(missing[:room])
+            missing = missing[room:]
+
+    new = [set(missing[i:i + max_addresses]) for i in range(0, len(missing), max_addresses)]
+    return shards, new
+
+
+async def load_wallet_addresses() -> Optional[List[str]]:
+    """Every tracked wallet address, None if the database can't be read"""
+    try:
+        async with AsyncSessionFactory() as session:
+            return list((await session.execute(select(SmartWallet.address))).scalars().all())
+    except Exception as e:
+        logger.error(f"Error getting wallet addresses: {str(e)}")
+        return None
+
+
+class WebhookSync:
+    def __init__(
+        self,
+        state_path: str = WEBHOOK_SYNC_STATE_PATH,
+        max_addresses: int = HELIUS_WEBHOOK_MAX_ADDRESSES,
+        debounce: float = WEBHOOK_SYNC_DEBOUNCE_MS / 1000
+    ):
+        """
+        Args:
+            state_path (str): JSON file remembering each webhook's URL and addresses.
+            max_addresses (int): Addresses per webhook before another one is created.
+            debounce (float): Seconds wallet changes are collected before they're sent.
+        """
+        self.state_path = state_path
+        self.max_addresses = max_addresses
+        self.debounce = debounce
+        # URL the webhooks should deliver to, known after the first sync()
+        self.url: Optional[str] = None
+        self.webhooks: Dict[str, Set[str]] = {}
+        self.urls: Dict[str, str] = {}
+        self._pending_add: Set[str] = set()
+        self._pending_remove: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._load_state()
+
+    def covered(self) -> Set[str]:
+        """Addresses some webhook covers, as far as the last update knows"""
+        return set().union(*self.webhooks.values())
+
+    def _load_state(self) -> None:
+        try:
+            with open(self.state_path, "rb") as f:
+                state = loads(f.read())
+            for webhook_id, webhook in state["webhooks"].items():
+                self.webhooks[webhook_id] = set(webhook["addresses"])
+                self.urls[webhook_id] = webhook["url"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable webhook sync state {self.state_path}: {e}")
+            self.webhooks, self.urls = {}, {}
+
+    def _save_state(self) -> None:
+        state = {
+            "webhooks": {
+                webhook_id: {"url": self.urls.get(webhook_id), "addresses": sorted(addresses)}
+                for webhook_id, addresses in self.webhooks.items()
+            }
+        }
+        try:
+            directory = os.path.dirname(self.state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Written aside and renamed, a crash mid-write never leaves half a state
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(dumps(state))
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.error(f"Error saving webhook sync state: {e}")
+
+    async def _load_remote(self, url: str) -> None:
+        """Replaces the local view with the webhooks Helius reports for this bot"""
+        known = set(self.webhooks)
+        if WEBHOOK_ID:
+            known.add(WEBHOOK_ID)
+        self.webhooks, self.urls = {}, {}
+        for webhook in await get_webhooks():
+            if webhook["id"] in known or webhook["url"] == url:
+                self.webhooks[webhook["id"]] = set(webhook["addresses"])
+                self.urls[webhook["id"]] = webhook["url"]
+        self._save_state()
+        logger.info(f"Loaded {len(self.webhooks)} Helius webhooks covering {len(self.covered())} addresses")
+
+    async def sync(self, url: str, addresses: Optional[Iterable[str]] = None, reload: bool = False) -> bool:
+        """
+        Brings the webhooks in line with `addresses`, delivering to `url`.
+
+        Args:
+            url (str): Endpoint every webhook should deliver to.
+            addresses (Iterable[str]): Addresses to cover. Defaults to every tracked wallet.
+            reload (bool): Read the webhooks from Helius instead of trusting the state file.
+
+        Returns:
+            bool: True if every webhook is up to date.
+        """
+        if addresses is None:
+            addresses = await load_wallet_addresses()
+            if addresses is None:
+                return False
+        desired = set(addresses)
+
+        async with self._lock:
+            self.url = url
+            if reload or not self.webhooks:
+                await self._load_remote(url)
+            # Anything still pending is part of this sync
+            self._pending_add.clear()
+            self._pending_remove.clear()
+            if desired == self.covered() and all(
+                addresses and self.urls.get(webhook_id) == url for webhook_id, addresses in self.webhooks.items()
+            ):
+                logger.info(f"Helius webhooks already cover {len(desired)} addresses, no update needed")
+                return True
+            return await self._apply(desired)
+
+    async def _apply(self, desired: Set[str]) -> bool:
+        shards, new = plan_shards(self.webhooks, desired, self.max_addresses)
+        ok = True
+
+        for webhook_id, addresses in shards.items():
+            if not addresses:
+                # Helius would keep an empty webhook around, and a wallet set shrunk to zero leaves only those
+                if await delete_webhook(webhook_id):
+                    del self.webhooks[webhook_id]
+                    self.urls.pop(webhook_id, None)
+                else:
+                    ok = False
+                continue
+            if addresses == self.webhooks[webhook_id] and self.urls.get(webhook_id) == self.url:
+                continue
+            if await update_webhook(webhook_id, self.url, sorted(addresses)):
+                self.webhooks[webhook_id] = addresses
+                self.urls[webhook_id] = self.url
+            else:
+                ok = False
+
+        for addresses in new:
+            webhook_id = await create_swap_webhook(self.url, sorted(addresses), WEBHOOK_SECRET)
+            if webhook_id:
+                self.webhooks[webhook_id] = addresses
+                self.urls[webhook_id] = self.url
+            else:
+                ok = False
+
+        self._save_state()
+        if not ok:
+            logger.warning("Some Helius webhooks could not be updated, the next sync retries them")
+        return ok
+
+    def add(self, addresses: Iterable[str]) -> None:
+        """Covers `addresses` with the next debounced update"""
+        addresses = set(addresses)
+        self._pending_remove -= addresses
+        self._pending_add |= addresses - self.covered()
+        self._schedule()
+
+    def remove(self, addresses: Iterable[str]) -> None:
+        """Stops covering `addresses` with the next debounced update"""
+        addresses = set(addresses)
+        self._pending_add -= addresses
+        self._pending_remove |= addresses & self.covered()
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if not (self._pending_add or self._pending_remove):
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.debounce)
+        await self.flush()
+
+    async def flush(self) -> bool:
+        """Sends the pending wallet changes now"""
+        if self.url is None:
+            # Nothing to deliver to before the first sync(), which covers them anyway
+            return False
+        async with self._lock:
+            if not (self._pending_add or self._pending_remove):
+                return True
+            desired = (self.covered() | self._pending_add) - self._pending_remove
+            added, removed = len(self._pending_add), len(self._pending_remove)
+            self._pending_add.clear()
+            self._pending_remove.clear()
+            logger.info(f"Syncing Helius webhooks: {added} addresses added, {removed} removed")
+            return await self._apply(desired)
+
+    async def refresh(self) -> None:
+        """Queues wallets added to or removed from the database since the last update"""
+        addresses = await load_wallet_addresses()
+        if addresses is None:
+            return
+        desired, covered = set(addresses), self.covered()
+        self.add(desired - covered)
+        self.remove(covered - desired)
+
+    async def stop(self) -> None:
+        """Sends pending changes instead of waiting out the debounce"""
+        await self.flush()
+        # Nothing is left for the timer; an update it had started finished under the lock
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+
+
+webhook_sync = WebhookSync()
@@ -0,0 +1,145 @@
+"""
+Async write-behind buffer.
+
+Producers call add() without awaiting the database; rows are handed to an
+async flush function in batches, either every `flush_interval` seconds or as
+soon as `max_rows` are pending, and once more on stop().
+
+With a `key` function the buffer coalesces: a row replaces any pending row
+with the same key, so a burst of saves for one mint becomes a single row in
+the next batch.
+"""
+from logger.logger import get_logger
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+import asyncio
+import time
+
+logger = get_logger("write_buffer")
+
+
+class WriteBuffer:
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List[Any]], Awaitable[None]],
+        max_rows: int = 500,
+        flush_interval: float = 1.0,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        """
+        Args:
+            name (str): Used in log lines.
+            flush_fn: Coroutine writing a batch of rows, e.g. one multi-row INSERT.
+            max_rows (int): Pending rows that trigger an immediate flush.
+            flush_interval (float): Seconds between periodic flushes.
+            key: Optional row -> key function. When set, only the latest
+                pending row per key is written.
+        """
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.key = key
+        self._rows: List[Any] = []
+        self._keyed: Dict[Hashable, Any] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+
+        # Stats
+        self.added = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.last_flush_rows = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keyed) if self.key else len(self._rows)
+
+    def add(self, row: Any) -> None:
+        """Queue a row. Never blocks on the database."""
+        self.added += 1
+        if self.key:
+            key = self.key(row)
+            if key in self._keyed:
+                self.coalesced += 1
+                # Re-insert so the dict keeps the most recent save last
+                del self._keyed[key]
+            self._keyed[key] = row
+        else:
+            self._rows.append(row)
+        if len(self) >= self.max_rows and (self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    def _take(self) -> List[Any]:
+        if self.key:
+            rows, self._keyed = list(self._keyed.values()), {}
+        else:
+            rows, self._rows = self._rows, []
+        return rows
+
+    async def flush(self) -> int:
+        """Write everything pending. Returns the number of rows written."""
+        async with self._lock:
+            rows = self._take()
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            try:
+                await self.flush_fn(rows)
+            except Exception as e:
+                # Dropping a batch beats growing without bound while the DB is down
+                self.rows_dropped += len(rows)
+                logger.error(f"{self.name} flush failed, dropped {len(rows)} rows: {e}")
+                return 0
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self.rows_written += len(rows)
+            self.last_flush_rows = len(rows)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.total_flush_seconds += elapsed
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and flush latency (seconds) since the buffer was created."""
+        return {
+            "pending": len(self),
+            "added": self.added,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "last_flush_rows": self.last_flush_rows,
+            "avg_flush_rows": self.rows_written / self.flushes if self.flushes else 0.0,
+            "last_flush_seconds": self.last_flush_seconds,
+            "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending_flush is not None:
+            await asyncio.gather(self._pending_flush, return_exceptions=True)
+        await self.flush()
+        logger.info(f"{self.name} buffer stopped: {self.stats()}")
@@ -0,0 +1,36 @@
+"""
+Base URLs of the external APIs.
+
+Kept apart from settings.py so gmgn/client.py and the stubs can read them
+without a wallet key or a database configured. USE_LOCAL_STUBS=true points
+every client at the servers `python -m stubs.run` starts on 127.0.0.1, on
+fixed ports from STUB_BASE_PORT, so tests and benchmarks make no network
+calls. A URL set explicitly still wins over the switch.
+"""
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+USE_LOCAL_STUBS = os.getenv("USE_LOCAL_STUBS", "false").lower() == "true"
+STUB_BASE_PORT = int(os.getenv("STUB_BASE_PORT", "18100"))  # First of the five ports below
+STUB_PORTS = {
+    name: STUB_BASE_PORT + offset
+    for offset, name in enumerate(("gmgn", "helius", "jupiter", "rpc", "telegram"))
+}
+
+
+def stub_url(name: str) -> str:
+    """Base URL of a local stub when it runs on its fixed port"""
+    return f"http://127.0.0.1:{STUB_PORTS[name]}"
+
+
+def _endpoint(key: str, default: str, stub: str) -> str:
+    return (os.getenv(key) or (stub_url(stub) if USE_LOCAL_STUBS else default)).rstrip("/")
+
+
+GMGN_HOST = _endpoint("GMGN_HOST", "https://gmgn.ai", "gmgn")
+HELIUS_API_URL = _endpoint("HELIUS_API_URL", "https://api.helius.xyz", "helius")
+JUP_API = _endpoint("JUP_API", "https://quote-api.jup.ag/v6", "jupiter")
+# No public default, the node comes from the environment unless the stubs stand in
+SOLANA_RPC_NODE = os.getenv("SOLANA_RPC_NODE") or (stub_url("rpc") if USE_LOCAL_STUBS else None)
@@ -5,9 +5,11 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.resolve()))
 
 from dotenv import load_dotenv
+import json
 import os
 from solana.rpc.api import Client
 from solders.keypair import Keypair #type: ignore
+from config.endpoints import GMGN_HOST, HELIUS_API_URL, JUP_API, SOLANA_RPC_NODE, USE_LOCAL_STUBS  # Base URLs, USE_LOCAL_STUBS points them at stubs/
 
 load_dotenv()
 
@@ -19,14 +21,28 @@ SESSION_STRING = os.getenv("SESSION_STRING")
 
 # Wallet and swap configurations
 WALLET_PRIVATE_KEY = os.getenv("WALLET_PRIVATE_KEY")
-SOLANA_RPC_NODE = os.getenv("SOLANA_RPC_NODE")
 SOL_MINT = "So11111111111111111111111111111111111111112"
 AUTO_MULTIPLIER = os.getenv("SOLANA_AUTO_MULTIPLIER") # a 10% bump to the median of getRecentPrioritizationFees over last 150 blocks
 SLIPPAGE_BPS = os.getenv("SOLANA_SLIPPAGE_BPS") # slippage tolerance 1000 = 10%
 SOL_AMOUNT = os.getenv("SOL_AMOUNT_TO_SPEND") # Amount of SOL to swap in lamports
-JUP_API = "https://quote-api.jup.ag/v6"
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Apply pending Alembic migrations when the app starts (never drops data)
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Replace connections older than this
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "5"))  # Connections opened at startup
+
+# Workers
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))  # uvicorn processes serving webhooks
+# Jobs and the Telegram client run on one worker, elected through a Postgres advisory lock.
+# Also worth enabling for several single-worker instances sharing a database.
+LEADER_ELECTION = os.getenv("LEADER_ELECTION", str(WEB_WORKERS > 1)).lower() == "true"
+LEADER_LOCK_ID = int(os.getenv("LEADER_LOCK_ID", "7240002"))
+LEADER_POLL_INTERVAL = float(os.getenv("LEADER_POLL_INTERVAL", "5"))  # Seconds between lock attempts and leader liveness checks, the failover time
+HANDOFF_BATCH_SIZE = int(os.getenv("HANDOFF_BATCH_SIZE", "100"))  # Alerts the leader takes from pending_alerts per query
 
 # Jupiter
 client = Client(SOLANA_RPC_NODE)
@@ -41,4 +57,47 @@ HELIUS_API_KEY = os.getenv("HELIUS_API_KEY")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
 WEBHOOK_ID = os.getenv("WEBHOOK_ID")
-WALLETS = os.getenv("WALLETS")
+WEBHOOK_SYNC_STATE_PATH = os.getenv("WEBHOOK_SYNC_STATE_PATH", "data/webhook_sync.json")  # Last known addresses per webhook
+HELIUS_WEBHOOK_MAX_ADDRESSES = int(os.getenv("HELIUS_WEBHOOK_MAX_ADDRESSES", "100000"))  # Addresses per webhook before another one is created
+WEBHOOK_SYNC_DEBOUNCE_MS = int(os.getenv("WEBHOOK_SYNC_DEBOUNCE_MS", "5000"))  # Wallet changes within this window go out as one update
+WEBHOOK_SYNC_INTERVAL = int(os.getenv("WEBHOOK_SYNC_INTERVAL", "300"))  # Seconds between checks for wallets added or removed in the database
+WALLETS = json.loads(os.getenv("WALLETS") or "[]")  # [{"address": ..., "name": ...}]
+BALANCE_CONCURRENCY = int(os.getenv("BALANCE_CONCURRENCY", "8"))  # Max Helius balance requests in flight
+
+# Buffered writers
+METRICS_FLUSH_INTERVAL_MS = int(os.getenv("METRICS_FLUSH_INTERVAL_MS", "1000"))
+METRICS_FLUSH_MAX_ROWS = int(os.getenv("METRICS_FLUSH_MAX_ROWS", "500"))
+TOKEN_FLUSH_INTERVAL_MS = int(os.getenv("TOKEN_FLUSH_INTERVAL_MS", "500"))
+TOKEN_FLUSH_MAX_ROWS = int(os.getenv("TOKEN_FLUSH_MAX_ROWS", "200"))
+
+# Retention
+# Must cover the longest PNL lookback, calculate_wallet_pnl reads first_seen within `days`
+HOLDING_HISTORY_RETENTION_DAYS = int(os.getenv("HOLDING_HISTORY_RETENTION_DAYS", "30"))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "5000"))
+SIGNATURE_RETENTION_HOURS = int(os.getenv("SIGNATURE_RETENTION_HOURS", "48"))  # processed_signatures rows kept for dedupe across restarts
+
+# Local caches
+TOKEN_INDEX_PATH = os.getenv("TOKEN_INDEX_PATH", "data/token_index.sqlite3")
+TOKEN_INDEX_MMAP_SIZE = int(os.getenv("TOKEN_INDEX_MMAP_SIZE", str(64 * 1024 * 1024)))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+SIGNATURE_DEDUPE_SIZE = int(os.getenv("SIGNATURE_DEDUPE_SIZE", "50000"))  # Recent webhook signatures remembered in memory
+SIGNATURE_DEDUPE_TTL = int(os.getenv("SIGNATURE_DEDUPE_TTL", "3600"))  # Seconds a signature stays in memory, older retries hit the table
+WALLET_STATS_CACHE_SIZE = int(os.getenv("WALLET_STATS_CACHE_SIZE", "2048"))
+WALLET_STATS_TTL = int(os.getenv("WALLET_STATS_TTL", "600"))  # Seconds before cached GMGN wallet stats count as stale
+WALLET_STATS_REFRESH_INTERVAL = int(os.getenv("WALLET_STATS_REFRESH_INTERVAL", "300"))  # One full pre-warm rotation over all wallets
+WALLET_STATS_PREWARM_TICK = int(os.getenv("WALLET_STATS_PREWARM_TICK", "10"))  # Seconds between pre-warm batches
+
+# JSON
+# JSON_BACKEND ("json" disables orjson/msgspec) is read by bot/utils/fastjson.py, which must import without a wallet key
+
+# Tracing
+TRACE_SLOW_MS = int(os.getenv("TRACE_SLOW_MS", "2000"))  # Traces slower than this are exported
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")  # JSONL file for slow traces, empty disables export
+
+# Telegram outbound queue
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "0.33"))  # Messages per second per chat, groups allow ~20/min
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))  # Messages per second across all chats, Telegram caps bots at ~30
+OUTBOUND_NOTICE_LINGER_MS = int(os.getenv("OUTBOUND_NOTICE_LINGER_MS", "2000"))  # Notices wait this long to be batched together
+OUTBOUND_DRAIN_TIMEOUT = float(os.getenv("OUTBOUND_DRAIN_TIMEOUT", "10"))  # Seconds to deliver queued messages on shutdown
+ALERT_AGGREGATION_WINDOW = int(os.getenv("ALERT_AGGREGATION_WINDOW", "60"))  # Seconds later buys of a mint edit the first alert instead of sending a new one
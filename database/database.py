@@ -1,12 +1,22 @@
-from config.settings import DATABASE_URL, HELIUS_API_KEY
+from config.settings import DATABASE_URL, HELIUS_API_KEY, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_WARM
+from logger.logger import get_logger
 
-from sqlalchemy import create_engine, Column, Integer, Float, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import create_engine, event, inspect, Column, BigInteger, Integer, Float, REAL, String, Text, Boolean, Date, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from contextlib import AsyncExitStack
 from datetime import datetime, UTC
 from typing import AsyncGenerator
+from pathlib import Path
+import asyncio
 import base58
+import time
+
+logger = get_logger("database")
 
 Base = declarative_base()
 
@@ -19,7 +29,7 @@ class User(Base):
     first_name = Column(String)
     last_name = Column(String, nullable=True)
     language = Column(String, default='en')
-    joined_date = Column(DateTime, default=datetime.now(UTC))
+    joined_date = Column(DateTime, default=datetime.utcnow)  # naive UTC, evaluated per row
     is_active = Column(Boolean, default=True)
 
 class SmartWalletHolding(Base):
@@ -48,7 +58,7 @@ class Token(Base):
     __tablename__ = "tokens"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ca = Column(String, unique=True)
+    ca = Column(String)
     symbol = Column(String, nullable=True)  # Ensure nullable=True exists
     holders = Column(Integer)
     bc_owners_percent = Column(Float)
@@ -65,6 +75,14 @@ class Token(Base):
     github = Column(String, nullable=True)
     telegram = Column(String, nullable=True)
     website = Column(String, nullable=True)
+    # Latest snapshot from get_token_profile
+    name = Column(String, nullable=True)
+    logo = Column(String, nullable=True)
+    price = Column(Float, nullable=True)
+    liquidity = Column(Float, nullable=True)
+    volume_1h = Column(Float, nullable=True)
+    volume_5m = Column(Float, nullable=True)
+    top_10_holder_rate = Column(Float, nullable=True)
     created_date = Column(DateTime(timezone=False), default=datetime.utcnow)  # Change to naive datetime
     is_active = Column(Boolean, default=True)
     # Update relationships
@@ -81,14 +99,34 @@ class Token(Base):
         overlaps="holdings,token"
     )
 
+    # Unique on ca (upsert target) and covering symbol for index-only lookups
+    __table_args__ = (
+        Index('uq_tokens_ca', 'ca', unique=True, postgresql_include=['symbol']),
+    )
+
+class TokenMetric(Base):
+    """Append-only snapshots of a token's metrics, one row per (mint, ts)"""
+    __tablename__ = "token_metrics"
+
+    mint = Column(String, primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True)
+    holders = Column(Integer)
+    # 4-byte floats keep rows compact; snapshots don't need double precision
+    price = Column(REAL)
+    liquidity = Column(REAL)
+    volume_1h = Column(REAL)
+    volume_5m = Column(REAL)
+    insiders_percent = Column(REAL)
+    bc_owners_percent = Column(REAL)
+    top_10_holder_rate = Column(REAL)
+
 class WalletHoldingHistory(Base):
     __tablename__ = "wallet_holding_history"
     
     id = Column(Integer, primary_key=True)
     wallet_address = Column(
         String, 
-        ForeignKey('smart_wallets.address'),  # Add this foreign key
-        index=True
+        ForeignKey('smart_wallets.address')  # Add this foreign key
     )
     token_mint = Column(String, index=True)  # Store token CA directly
     first_seen = Column(DateTime(timezone=True), default=datetime.now(UTC))
@@ -100,6 +138,52 @@ class WalletHoldingHistory(Base):
         foreign_keys=[wallet_address]  # Add this relationship
     )
 
+    # One row per wallet/mint so monitor_wallets can upsert instead of appending.
+    # The unique index also serves plain wallet_address lookups; the composite
+    # indexes cover the recent-holdings and PNL queries without heap access.
+    __table_args__ = (
+        UniqueConstraint('wallet_address', 'token_mint', name='uq_wallet_holding_history_wallet_mint'),
+        Index(
+            'ix_wallet_holding_history_wallet_last_seen',
+            'wallet_address', 'last_seen',
+            postgresql_include=['token_mint']
+        ),
+        Index(
+            'ix_wallet_holding_history_wallet_first_seen',
+            'wallet_address', 'first_seen',
+            postgresql_include=['token_mint']
+        ),
+    )
+
+class WalletHoldingDaily(Base):
+    """Per-wallet daily rollup of holding history rows past the retention window"""
+    __tablename__ = "wallet_holding_daily"
+
+    wallet_address = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC day the holdings were first seen
+    token_count = Column(Integer, nullable=False, default=0)
+    token_mints = Column(ARRAY(String), nullable=False, default=list)
+    last_seen = Column(DateTime(timezone=True))
+
+class ProcessedSignature(Base):
+    """Webhook transactions already handled, so retried deliveries are dropped across restarts"""
+    __tablename__ = "processed_signatures"
+
+    signature = Column(String, primary_key=True)
+    received_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class PendingAlert(Base):
+    """Alerts enriched on a follower worker, waiting for the leader to send them (bot/utils/handoff.py)"""
+    __tablename__ = "pending_alerts"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    chat_id = Column(String, nullable=False)
+    mint = Column(String, nullable=False)
+    is_buy = Column(Boolean, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON of token_info and wallet_info
+    source = Column(String, nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=False)
+
 class SmartWallet(Base):
     __tablename__ = "smart_wallets"
     
@@ -148,22 +232,154 @@ class SmartWallet(Base):
         return True
 
 
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a usable connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidated = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connect(self):
+        # Includes queueing for a free slot, opening new connections and the pre-ping
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.__dict__.update({
+            key: getattr(self, key)
+            for key in ("checkouts", "timeouts", "invalidated", "wait_seconds_total", "wait_seconds_max")
+        })
+        return pool
+
+
 engine = create_async_engine(
     DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
     .replace("?sslmode=", "?ssl=")  # Convert sslmode param to asyncpg's format
     .replace("&sslmode=", "&ssl="),  # Handle cases where it's not first param
-    pool_size=20,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    # Test connections on checkout so a server-side idle disconnect costs a
+    # reconnect instead of a failed query
+    pool_pre_ping=True
 )
 
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _count_invalidated(dbapi_connection, connection_record, exception):
+    engine.pool.invalidated += 1
+
+
+def pool_stats() -> dict:
+    """Current pool usage and cumulative checkout wait times"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "invalidated": pool.invalidated,
+        "wait_seconds_total": pool.wait_seconds_total,
+        "wait_seconds_avg": pool.wait_seconds_total / pool.checkouts if pool.checkouts else 0.0,
+        "wait_seconds_max": pool.wait_seconds_max,
+    }
+
+
+async def warm_pool(connections: int = DB_POOL_WARM) -> int:
+    """
+    Opens `connections` pooled connections and returns them to the pool,
+    so the first webhooks after startup don't pay for connection setup.
+
+    Returns:
+        int: Number of connections opened, 0 if the database was unreachable.
+    """
+    connections = min(connections, DB_POOL_SIZE)
+    if connections <= 0:
+        return 0
+    try:
+        async with AsyncExitStack() as stack:
+            # Hold every connection until all are open, otherwise the pool hands back the same one
+            conns = [await stack.enter_async_context(engine.connect()) for _ in range(connections)]
+            await asyncio.gather(*(conn.exec_driver_sql("SELECT 1") for conn in conns))
+    except Exception as e:
+        logger.error(f"Error warming the connection pool: {e}")
+        return 0
+    logger.info(f"Connection pool warmed ({connections} connections)")
+    return connections
+
+async def connect_raw():
+    """
+    A dedicated asyncpg connection outside the pool, for state that lives as
+    long as the session: advisory locks and LISTEN.
+    """
+    import asyncpg
+    return await asyncpg.connect(DATABASE_URL)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+BASELINE_REVISION = "0001_baseline"
+# Serializes migrations when several processes start at once
+MIGRATION_LOCK_ID = 7_240_001
+
+def _alembic_config():
+    from alembic.config import Config
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(Path(__file__).resolve().parent / "migrations"))
+    # Keep the app's logging setup, alembic.ini would otherwise replace it
+    config.attributes["configure_logger"] = False
+    return config
+
+async def run_migrations(revision: str = "head"):
+    """
+    Upgrade the schema to `revision` through Alembic. Nothing is dropped.
+
+    Databases created by the old create_all based init_db have tables but no
+    alembic_version; they are stamped at the baseline revision first.
+    """
+    from alembic import command
+    config = _alembic_config()
+
+    def upgrade(connection):
+        connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+        try:
+            tables = inspect(connection)
+            legacy = tables.has_table("smart_wallets") and not tables.has_table("alembic_version")
+            # Alembic manages its own transactions from here on
+            connection.commit()
+            config.attributes["connection"] = connection
+            if legacy:
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+        finally:
+            # The connection goes back to the app's pool, undo env.py's lock_timeout
+            connection.exec_driver_sql("RESET lock_timeout")
+            connection.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+            connection.commit()
+
+    async with engine.connect() as conn:
+        await conn.run_sync(upgrade)
+
 async def init_db():
-    async with engine.begin() as conn:
-        # Drop all tables first (only for development!)
-        await conn.run_sync(Base.metadata.drop_all)
-        # Create fresh tables with latest schema
-        await conn.run_sync(Base.metadata.create_all)
+    """Bring the schema up to date without touching existing data"""
+    await run_migrations()
 
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
@@ -0,0 +1,96 @@
+"""baseline schema
+
+The schema init_db created with Base.metadata.create_all before migrations
+existed. Databases created that way are brought under version control with
+`alembic stamp 0001_baseline`.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), unique=True),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('first_name', sa.String()),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('language', sa.String()),
+        sa.Column('joined_date', sa.DateTime()),
+        sa.Column('is_active', sa.Boolean()),
+    )
+    op.create_table(
+        'tokens',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('ca', sa.String(), unique=True),
+        sa.Column('symbol', sa.String(), nullable=True),
+        sa.Column('holders', sa.Integer()),
+        sa.Column('bc_owners_percent', sa.Float()),
+        sa.Column('insiders_percent', sa.Float()),
+        sa.Column('avg_profit_percent', sa.Float()),
+        sa.Column('fresh_wallets', sa.Integer()),
+        sa.Column('sold_wallets', sa.Integer()),
+        sa.Column('suspicious_wallets', sa.Integer()),
+        sa.Column('insiders_wallets', sa.Integer()),
+        sa.Column('phishing_wallets', sa.Integer()),
+        sa.Column('profitable_wallets', sa.Integer()),
+        sa.Column('same_address_funded', sa.Integer()),
+        sa.Column('twitter', sa.String(), nullable=True),
+        sa.Column('github', sa.String(), nullable=True),
+        sa.Column('telegram', sa.String(), nullable=True),
+        sa.Column('website', sa.String(), nullable=True),
+        sa.Column('created_date', sa.DateTime(timezone=False)),
+        sa.Column('is_active', sa.Boolean()),
+    )
+    op.create_table(
+        'smart_wallets',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('address', sa.String(), unique=True),
+        sa.Column('name', sa.String(), nullable=True, unique=True),
+        sa.Column('first_seen', sa.DateTime()),
+        sa.Column('last_active', sa.DateTime()),
+        sa.Column('profit_rate', sa.Float()),
+        sa.Column('total_trades', sa.Integer()),
+    )
+    op.create_table(
+        'smart_wallet_holding',
+        sa.Column('token_id', sa.Integer(), sa.ForeignKey('tokens.id'), primary_key=True),
+        sa.Column('wallet_id', sa.Integer(), sa.ForeignKey('smart_wallets.id'), primary_key=True),
+        sa.Column('amount', sa.Float()),
+        sa.Column('buy_price', sa.Float()),
+        sa.Column('buy_timestamp', sa.DateTime()),
+        sa.Column('sell_price', sa.Float(), nullable=True),
+        sa.Column('sell_timestamp', sa.DateTime(), nullable=True),
+    )
+    op.create_index('idx_wallet_token', 'smart_wallet_holding', ['wallet_id', 'token_id'])
+    op.create_table(
+        'wallet_holding_history',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('wallet_address', sa.String(), sa.ForeignKey('smart_wallets.address')),
+        sa.Column('token_mint', sa.String()),
+        sa.Column('first_seen', sa.DateTime(timezone=True)),
+        sa.Column('last_seen', sa.DateTime(timezone=True)),
+    )
+    op.create_index('ix_wallet_holding_history_wallet_address', 'wallet_holding_history', ['wallet_address'])
+    op.create_index('ix_wallet_holding_history_token_mint', 'wallet_holding_history', ['token_mint'])
+
+
+def downgrade() -> None:
+    op.drop_table('wallet_holding_history')
+    op.drop_table('smart_wallet_holding')
+    op.drop_table('smart_wallets')
+    op.drop_table('tokens')
+    op.drop_table('users')
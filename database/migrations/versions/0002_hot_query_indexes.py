@@ -0,0 +1,150 @@
+"""composite covering indexes for hot holding history and token queries
+
+- (wallet_address, last_seen) INCLUDE (token_mint): monitor_wallets' recent holdings
+- (wallet_address, first_seen) INCLUDE (token_mint): calculate_wallet_pnl's DISTINCT mints
+- UNIQUE (wallet_address, token_mint): upsert target, also serves wallet_address lookups,
+  so the single column wallet_address index is dropped
+- UNIQUE (ca) INCLUDE (symbol) on tokens: Token.ca lookups that only need the symbol
+  become index-only scans; it replaces the plain unique constraint on ca
+
+Every index is built CONCURRENTLY so the tables stay writable during the upgrade.
+An INVALID index left by an earlier failed build is dropped and built again, and
+the unique build folds duplicates and retries when the running release inserts
+one mid-build.
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+revision: str = '0002_hot_query_indexes'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The running release keeps inserting while the unique index builds, a duplicate
+# landing after the dedupe fails the build and is folded by the next attempt
+UNIQUE_BUILD_ATTEMPTS = 5
+
+# Fold duplicate (wallet, mint) rows into the oldest one before enforcing uniqueness
+DEDUPE_SQL = (
+    """
+    UPDATE wallet_holding_history h
+    SET first_seen = d.first_seen, last_seen = d.last_seen
+    FROM (
+        SELECT min(id) AS id, min(first_seen) AS first_seen, max(last_seen) AS last_seen
+        FROM wallet_holding_history
+        GROUP BY wallet_address, token_mint
+        HAVING count(*) > 1
+    ) d
+    WHERE h.id = d.id
+    """,
+    """
+    DELETE FROM wallet_holding_history a
+    USING wallet_holding_history b
+    WHERE a.wallet_address = b.wallet_address
+      AND a.token_mint = b.token_mint
+      AND a.id > b.id
+    """,
+)
+
+INVALID_INDEX_SQL = """
+    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND NOT i.indisvalid
+"""
+
+
+def _drop_invalid_index(name: str) -> None:
+    """
+    A failed or interrupted CONCURRENTLY build leaves an INVALID index behind,
+    which IF NOT EXISTS would keep and ADD CONSTRAINT ... USING INDEX rejects.
+    Must run inside an autocommit block.
+    """
+    if context.is_offline_mode():
+        # No connection to look first, the script checks when it runs
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF EXISTS ({INVALID_INDEX_SQL.replace(':name', "'" + name + "'")}) THEN
+                    DROP INDEX {name};
+                END IF;
+            END $$
+        """)
+        return
+    if op.get_bind().execute(text(INVALID_INDEX_SQL), {"name": name}).scalar():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _create_index(name: str, definition: str, unique: bool = False) -> None:
+    _drop_invalid_index(name)
+    op.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def _create_holding_history_unique_index() -> None:
+    for attempt in range(1, UNIQUE_BUILD_ATTEMPTS + 1):
+        for statement in DEDUPE_SQL:
+            op.execute(statement)
+        try:
+            _create_index(
+                "uq_wallet_holding_history_wallet_mint",
+                "ON wallet_holding_history (wallet_address, token_mint)",
+                unique=True,
+            )
+            return
+        except IntegrityError:
+            # The failed build is left INVALID, the next attempt drops it
+            if attempt == UNIQUE_BUILD_ATTEMPTS or context.is_offline_mode():
+                raise
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        _create_holding_history_unique_index()
+        _create_index(
+            "ix_wallet_holding_history_wallet_last_seen",
+            "ON wallet_holding_history (wallet_address, last_seen) INCLUDE (token_mint)",
+        )
+        _create_index(
+            "ix_wallet_holding_history_wallet_first_seen",
+            "ON wallet_holding_history (wallet_address, first_seen) INCLUDE (token_mint)",
+        )
+        _create_index("uq_tokens_ca", "ON tokens (ca) INCLUDE (symbol)", unique=True)
+
+    # Attaching a prebuilt index as the constraint only takes a brief lock
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_wallet_holding_history_wallet_mint'
+            ) THEN
+                ALTER TABLE wallet_holding_history
+                ADD CONSTRAINT uq_wallet_holding_history_wallet_mint
+                UNIQUE USING INDEX uq_wallet_holding_history_wallet_mint;
+            END IF;
+        END $$
+    """)
+    op.execute("ALTER TABLE tokens DROP CONSTRAINT IF EXISTS tokens_ca_key")
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_wallet_holding_history_wallet_address")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_wallet_holding_history_wallet_address
+            ON wallet_holding_history (wallet_address)
+        """)
+    op.execute("ALTER TABLE tokens ADD CONSTRAINT tokens_ca_key UNIQUE (ca)")
+    op.execute("DROP INDEX IF EXISTS uq_tokens_ca")
+    op.execute("DROP INDEX IF EXISTS ix_wallet_holding_history_wallet_first_seen")
+    op.execute("DROP INDEX IF EXISTS ix_wallet_holding_history_wallet_last_seen")
+    op.execute(
+        "ALTER TABLE wallet_holding_history DROP CONSTRAINT IF EXISTS uq_wallet_holding_history_wallet_mint"
+    )
@@ -0,0 +1,32 @@
+"""daily rollup table for expired wallet holding history
+
+Revision ID: 0003_wallet_holding_daily
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0003_wallet_holding_daily'
+down_revision: Union[str, None] = '0002_hot_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'wallet_holding_daily',
+        sa.Column('wallet_address', sa.String(), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('token_count', sa.Integer(), nullable=False),
+        sa.Column('token_mints', postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column('last_seen', sa.DateTime(timezone=True)),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('wallet_holding_daily')
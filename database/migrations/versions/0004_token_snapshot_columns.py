@@ -0,0 +1,39 @@
+"""token profile snapshot columns written by save_token_info
+
+Nullable columns without defaults are a catalog-only change in Postgres, so
+this is safe to run while the bot is writing to tokens.
+
+Revision ID: 0004_token_snapshot_columns
+Revises: 0003_wallet_holding_daily
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0004_token_snapshot_columns'
+down_revision: Union[str, None] = '0003_wallet_holding_daily'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    ('name', sa.String()),
+    ('logo', sa.String()),
+    ('price', sa.Float()),
+    ('liquidity', sa.Float()),
+    ('volume_1h', sa.Float()),
+    ('volume_5m', sa.Float()),
+    ('top_10_holder_rate', sa.Float()),
+]
+
+
+def upgrade() -> None:
+    for name, type_ in COLUMNS:
+        op.add_column('tokens', sa.Column(name, type_, nullable=True))
+
+
+def downgrade() -> None:
+    for name, _ in reversed(COLUMNS):
+        op.drop_column('tokens', name)
@@ -0,0 +1,36 @@
+"""append-only token metrics time series
+
+Revision ID: 0005_token_metrics
+Revises: 0004_token_snapshot_columns
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0005_token_metrics'
+down_revision: Union[str, None] = '0004_token_snapshot_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'token_metrics',
+        sa.Column('mint', sa.String(), primary_key=True),
+        sa.Column('ts', sa.DateTime(timezone=True), primary_key=True),
+        sa.Column('holders', sa.Integer()),
+        sa.Column('price', sa.REAL()),
+        sa.Column('liquidity', sa.REAL()),
+        sa.Column('volume_1h', sa.REAL()),
+        sa.Column('volume_5m', sa.REAL()),
+        sa.Column('insiders_percent', sa.REAL()),
+        sa.Column('bc_owners_percent', sa.REAL()),
+        sa.Column('top_10_holder_rate', sa.REAL()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('token_metrics')
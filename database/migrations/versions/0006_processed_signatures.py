@@ -0,0 +1,31 @@
+"""processed webhook signatures for delivery dedupe
+
+Revision ID: 0006_processed_signatures
+Revises: 0005_token_metrics
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0006_processed_signatures'
+down_revision: Union[str, None] = '0005_token_metrics'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'processed_signatures',
+        sa.Column('signature', sa.String(), primary_key=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    # Pruning deletes by age
+    op.create_index('ix_processed_signatures_received_at', 'processed_signatures', ['received_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_processed_signatures_received_at', table_name='processed_signatures')
+    op.drop_table('processed_signatures')
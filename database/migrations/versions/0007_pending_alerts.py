@@ -0,0 +1,34 @@
+"""pending alerts handed from follower workers to the leader
+
+Revision ID: 0007_pending_alerts
+Revises: 0006_processed_signatures
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0007_pending_alerts'
+down_revision: Union[str, None] = '0006_processed_signatures'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The leader takes rows in id order, the primary key is all the index it needs
+    op.create_table(
+        'pending_alerts',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('chat_id', sa.String(), nullable=False),
+        sa.Column('mint', sa.String(), nullable=False),
+        sa.Column('is_buy', sa.Boolean(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('pending_alerts')
@@ -1,15 +1,21 @@
 import random
 import tls_client
 from fake_useragent import UserAgent
+from config.endpoints import GMGN_HOST
+# Parses the bytes straight away, with the backend JSON_BACKEND picks
+from bot.utils.fastjson import loads
 
 # author - 1f1n
 # date - 05/06/2024
 
 class gmgn:
-    BASE_URL = "https://gmgn.ai/defi/quotation"
+    # https://gmgn.ai, or the local stub with USE_LOCAL_STUBS=true
+    HOST = GMGN_HOST
 
-    def __init__(self):
-        pass
+    def __init__(self, host: str = None):
+        # Another host serving the same API, e.g. a local stub
+        self.host = (host or self.HOST).rstrip('/')
+        self.BASE_URL = f"{self.host}/defi/quotation"
 
     def randomiseRequest(self):
         self.identifier = random.choice(
@@ -56,7 +62,7 @@ class gmgn:
         if not contractAddress:
             return "You must input a contract address."
         
-        url = "https://gmgn.ai/api/v1/mutil_window_token_info"
+        url = f"{self.host}/api/v1/mutil_window_token_info"
         payload = {
             "chain": "sol",
             "addresses": [contractAddress]
@@ -64,7 +70,7 @@ class gmgn:
 
         request = self.sendRequest.post(url, headers=self.headers, json=payload)
 
-        jsonResponse = request.json()
+        jsonResponse = loads(request.content)
         
         # Return the first element from the data array
         if jsonResponse.get('data') and len(jsonResponse['data']) > 0:
@@ -86,7 +92,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -118,7 +124,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -149,7 +155,7 @@ class gmgn:
         
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
 
@@ -169,7 +175,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -189,7 +195,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
 
@@ -202,7 +208,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -218,7 +224,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
 
@@ -234,7 +240,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
 
@@ -250,7 +256,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -269,11 +275,11 @@ class gmgn:
         if not contractAddress:
             return "You must input a contract address."
         
-        url = f"https://gmgn.ai/api/v1/mutil_window_token_link_rug_vote/sol/{contractAddress}"
+        url = f"{self.host}/api/v1/mutil_window_token_link_rug_vote/sol/{contractAddress}"
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()
+        jsonResponse = loads(request.content)
         
         # Return the link data from the response
         if jsonResponse.get('data') and jsonResponse['data'].get('link'):
@@ -299,7 +305,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -318,7 +324,7 @@ class gmgn:
         url = f"{self.BASE_URL}/v1/rank/sol/wallets/{walletAddress}/unique_token_7d?interval={period}"
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -331,11 +337,11 @@ class gmgn:
         if not contractAddress:
             return "You must input a contract address."
         
-        url = f"https://gmgn.ai/api/v1/token_stat/sol/{contractAddress}"
+        url = f"{self.host}/api/v1/token_stat/sol/{contractAddress}"
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()['data']
+        jsonResponse = loads(request.content)['data']
 
         return jsonResponse
     
@@ -376,7 +382,7 @@ class gmgn:
                 return f"Invalid trend type: {trend_type}. Valid options: {valid_trends}"
         
         # Build URL with trend type parameters
-        url = f"https://gmgn.ai/api/v1/token_trends/sol/{contractAddress}"
+        url = f"{self.host}/api/v1/token_trends/sol/{contractAddress}"
         params = []
         for trend_type in trends_types:
             params.append(f"trends_type={trend_type}")
@@ -386,7 +392,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()
+        jsonResponse = loads(request.content)
         
         # Return the trends object from the response data
         if jsonResponse.get('data') and jsonResponse['data'].get('trends'):
@@ -436,7 +442,7 @@ class gmgn:
             return f"Invalid orderby: {orderby}. Valid options: {valid_orderby}"
         
         # Build URL with query parameters
-        url = f"https://gmgn.ai/vas/api/v1/token_holders/sol/{contractAddress}"
+        url = f"{self.host}/vas/api/v1/token_holders/sol/{contractAddress}"
         params = [
             f"limit={limit}",
             f"cost={cost}",
@@ -449,7 +455,7 @@ class gmgn:
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()
+        jsonResponse = loads(request.content)
         
         # Return the list array from the response data
         if jsonResponse.get('data') and jsonResponse['data'].get('list'):
@@ -480,11 +486,11 @@ class gmgn:
         if not contractAddress:
             return "You must input a contract address."
         
-        url = f"https://gmgn.ai/defi/quotation/v1/smartmoney/sol/walletstat/{walletAddress}?token_address={contractAddress}"
+        url = f"{self.host}/defi/quotation/v1/smartmoney/sol/walletstat/{walletAddress}?token_address={contractAddress}"
 
         request = self.sendRequest.get(url, headers=self.headers)
 
-        jsonResponse = request.json()
+        jsonResponse = loads(request.content)
         
         # Return the data object from the response
         if jsonResponse.get('data'):
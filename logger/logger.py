@@ -1,32 +1,131 @@
-from logging.handlers import RotatingFileHandler
+"""
+Application logging.
+
+Records are put on a queue by a QueueHandler and written to the console and
+the rotating file by a QueueListener thread, so logging never blocks the event
+loop on disk or terminal I/O.
+
+With several uvicorn workers (WEB_WORKERS > 1) the processes can't share one
+rotating file, each would rotate it under the others. They log to the console
+only, and every record carries the pid of the worker that wrote it.
+
+Environment:
+    LOG_LEVEL: Level of the "TelegramBot" logger (default INFO).
+    LOG_LEVELS: Per-module overrides, e.g. "pnl=DEBUG,monitor=WARNING". Module
+        loggers come from get_logger("pnl") and are children of "TelegramBot".
+    LOG_FORMAT: "json" (default) for one JSON object per line, "text" for the
+        classic "time - name - level - message" lines.
+
+Hot paths should log with %-style arguments, logger.debug("Booked %s", sig),
+so disabled records are dropped before the message is ever formatted.
+"""
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, UTC
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
 
-# Create logs directory if it doesn't exist
-if not os.path.exists('logger/logs'):
-    os.makedirs('logger/logs')
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+MULTI_WORKER = int(os.getenv("WEB_WORKERS", "1")) > 1
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with `extra=` fields and exceptions inlined"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "func": record.funcName,
+            "line": record.lineno,
+        }
+        if MULTI_WORKER:
+            entry["pid"] = record.process
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _formatter() -> logging.Formatter:
+    if LOG_FORMAT == "text":
+        if MULTI_WORKER:
+            return logging.Formatter('%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s')
+        return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return JsonFormatter()
 
-# Configure logger
-logger = logging.getLogger("TelegramBot")
-logger.setLevel(logging.INFO)
 
 # Console handler
 console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(console_format)
-
-# File handler
-file_handler = RotatingFileHandler(
-    'logger/logs/bot.log',
-    maxBytes=5 * 1024 * 1024,  # 5MB
-    backupCount=5,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.INFO)
-file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(file_format)
-
-# Add handlers to logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler) 
+console_handler.setFormatter(_formatter())
+
+handlers = [console_handler]
+
+# File handler, single process only
+if not MULTI_WORKER:
+    # Create logs directory if it doesn't exist
+    if not os.path.exists('logger/logs'):
+        os.makedirs('logger/logs')
+    file_handler = RotatingFileHandler(
+        'logger/logs/bot.log',
+        maxBytes=5 * 1024 * 1024,  # 5MB
+        backupCount=5,
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(_formatter())
+    handlers.append(file_handler)
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (both may reference objects that
+        # change later), but keep them apart so the JSON record has an exc_info field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# The loop only enqueues; the listener thread formats and writes
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+queue_handler = _QueueHandler(log_queue)
+listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+# Configure logger
+logger = logging.getLogger("TelegramBot")
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(queue_handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Module logger "TelegramBot.<name>", its level can be set through LOG_LEVELS"""
+    return logger.getChild(name)
+
+
+for override in filter(None, (part.strip() for part in LOG_LEVELS.split(","))):
+    module, _, level = override.partition("=")
+    try:
+        get_logger(module.strip()).setLevel(level.strip().upper())
+    except ValueError:
+        logger.warning("Ignoring LOG_LEVELS entry %r", override)
@@ -1,66 +1,114 @@
-from config.settings import API_ID, API_HASH, WEBHOOK_SECRET, SESSION_STRING, WEBHOOK_ID, BOT_TOKEN
+from config.settings import API_ID, API_HASH, WEBHOOK_SECRET, SESSION_STRING, BOT_TOKEN, RUN_MIGRATIONS_ON_STARTUP, WEB_WORKERS
 from bot.handlers import register_handlers
 from bot.tasks import register_tasks
 from logger.logger import logger
-from bot.utils.monitor import edit_webhook, process_webhook
+from bot.utils.monitor import deliver_alert, process_webhook
+from bot.utils.webhook_sync import webhook_sync
+from database.database import init_db, warm_pool
+from bot.utils.token_metrics import token_metrics_writer
+from bot.utils.token import token_writer
+from bot.utils.outbound import outbound_queue
+from bot.utils.leader import leader
+from bot.utils.handoff import alert_relay
+from bot.utils.metrics import enable_multiprocess, render_metrics, stats_publisher, WEBHOOKS_RECEIVED, WEBHOOK_PROCESSING_SECONDS
+from bot.utils.tracing import start_trace
+from bot.utils.dedupe import claim_signature
+from bot.utils.fastjson import decode_transactions, FastJSONResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pyrogram import Client
 import asyncio
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Response
 import uvicorn
 from contextlib import asynccontextmanager
 import os
+import shutil
+import time
 
 PORT = 8000 if not os.getenv('RENDER') else int(os.getenv('PORT', '10000'))
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Environment detection
-    is_production = os.getenv('environment') == 'production'
-    
-    if is_production:
+# Set while this worker is the leader (bot/utils/leader.py), None on followers
+client = None
+scheduler = None
+
+def is_production() -> bool:
+    return os.getenv('environment') == 'production'
+
+def public_webhook_url() -> str:
+    if is_production():
         domain = os.getenv('RENDER_EXTERNAL_URL')
-        webhook_url = f"{domain}/webhooks"
     else:
         # Local development with ngrok
         from pyngrok import ngrok
         tunnel = ngrok.connect(PORT, bind_tls=True)
         domain = tunnel.public_url
-        webhook_url = f"{domain}/webhooks"
-    
+    return f"{domain}/webhooks"
+
+async def start_leader_duties():
+    """Everything that must run once across workers: webhook sync, the Telegram client and the jobs"""
+    global client, scheduler
+    webhook_url = public_webhook_url()
     logger.info(f"Webhook endpoint: {webhook_url}")
-    
-    # Update Helius webhook
-    await edit_webhook(
-        webhook_id=WEBHOOK_ID,
-        url=webhook_url
-    )
+
+    # Point the Helius webhooks at this endpoint, a no-op when wallets and URL are unchanged
+    await webhook_sync.sync(webhook_url)
 
     # Initialize and START client first
-    global client
     client = Client(
         "pump-not-fun",
         api_id=API_ID,
         api_hash=API_HASH,
         bot_token=BOT_TOKEN,
     )
-    await client.start()  # <-- ADD THIS LINE
-    
+    await client.start()
+    await outbound_queue.start(client)
+    # Alerts the followers enriched, including any left by the previous leader
+    await alert_relay.start(deliver_alert)
+
     # Start scheduler AFTER client is ready
     scheduler = AsyncIOScheduler()
     register_tasks(client, scheduler)
     scheduler.start()
+
+async def stop_leader_duties():
+    global client, scheduler
+    if scheduler is not None:
+        scheduler.shutdown()
+        scheduler = None
+    await alert_relay.stop()
+    await webhook_sync.stop()
+    # Deliver queued alerts while the client can still send
+    await outbound_queue.stop()
+    if client is not None:
+        await client.stop()
+        client = None
+    if not is_production():
+        from pyngrok import ngrok
+        ngrok.kill()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await init_db()
+    await warm_pool()
+    await token_writer.start()
+    await token_metrics_writer.start()
+    await stats_publisher.start()
+
+    # Every worker serves webhooks, one of them also runs start_leader_duties()
+    await leader.start(start_leader_duties, stop_leader_duties)
     
     yield
     
     # Cleanup
-    await client.stop()
-    scheduler.shutdown()
-    if not is_production:
-        ngrok.kill()
+    await leader.stop()
+    # Flush buffered writes before the event loop goes away
+    await token_writer.stop()
+    await token_metrics_writer.stop()
+    # Last, nothing updates this worker's gauges after it
+    await stats_publisher.stop()
 
 # Create FastAPI app instance
-web_app = FastAPI(lifespan=lifespan)
+web_app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 @web_app.post("/webhooks")
 async def handle_webhook(request: Request):
@@ -68,11 +116,28 @@ async def handle_webhook(request: Request):
     if request.headers.get("Authorization") != WEBHOOK_SECRET:
         raise HTTPException(status_code=403, detail="Invalid auth header")
     
-    await process_webhook(await request.json(), client)
+    received_at = time.perf_counter()
+    WEBHOOKS_RECEIVED.inc()
+    try:
+        payload = decode_transactions(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    # The first transaction's signature ties the trace to the swap on-chain
+    signature = payload[0].get("signature") if isinstance(payload, list) and payload else None
+    # Helius retries slow deliveries; answer retries with 200 so it stops, but skip the work
+    if signature and not await claim_signature(signature):
+        return {"status": "duplicate"}
+    with WEBHOOK_PROCESSING_SECONDS.time(), start_trace(signature or "unknown", "webhook", started=received_at):
+        await process_webhook(payload, client, received_at=received_at)
     
     return {"status": "ok"}
 
-async def main():
+@web_app.get("/metrics")
+async def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+async def serve():
     from database.database import engine
     await engine.dispose()  # Clean initial connection
 
@@ -86,5 +151,24 @@ async def main():
     server = uvicorn.Server(config)
     await server.serve()
 
+def main():
+    if WEB_WORKERS > 1:
+        # The workers write their metrics to one directory, /metrics merges them
+        metrics_dir = enable_multiprocess()
+        try:
+            # Each worker process imports this module and runs its own lifespan
+            uvicorn.run(
+                "main:web_app",
+                host="0.0.0.0",
+                port=PORT,
+                workers=WEB_WORKERS,
+                log_level="info",
+                loop="asyncio"
+            )
+        finally:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+    else:
+        asyncio.run(serve())
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+import asyncio
+from bot.utils.token_index import get_token_index, refresh_token_index
+
+async def build_token_index():
+    index = get_token_index()
+    count = await refresh_token_index(index)
+    if count:
+        print(f"✅ Token index at {index.path}: {len(index)} mints")
+    else:
+        print("🚨 Token index refresh failed, existing rows were kept")
+    index.close()
+
+if __name__ == "__main__":
+    asyncio.run(build_token_index())
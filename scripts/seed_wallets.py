@@ -6,12 +6,14 @@ from datetime import datetime
 from config.settings import WALLETS
 
 async def seed_smart_wallets():
+    # Migrates the schema up to date, existing wallets and history are kept
     await init_db()
     
     async with AsyncSessionFactory() as session:
         try:
-            valid_count = 0
+            rows = {}
             invalid_count = 0
+            now = datetime.utcnow()
             
             for wallet_data in WALLETS:
                 address = wallet_data['address']
@@ -21,26 +23,30 @@ async def seed_smart_wallets():
                     print(f"❌ Invalid address: {address}")
                     invalid_count += 1
                     continue
-                    
-                stmt = insert(SmartWallet).values(
+
+                # Last entry wins if an address is listed twice
+                rows[address] = dict(
                     address=address,
                     name=wallet_data['name'],
-                    first_seen=datetime.utcnow(),
-                    last_active=datetime.utcnow(),
+                    first_seen=now,
+                    last_active=now,
                     profit_rate=0.0,
                     total_trades=0
-                ).on_conflict_do_update(
+                )
+
+            if rows:
+                stmt = insert(SmartWallet).values(list(rows.values()))
+                stmt = stmt.on_conflict_do_update(
                     index_elements=['address'],
                     set_=dict(
-                        name=wallet_data['name'],
-                        last_active=datetime.utcnow()
+                        name=stmt.excluded.name,
+                        last_active=stmt.excluded.last_active
                     )
                 )
                 await session.execute(stmt)
-                valid_count += 1
                                 
             await session.commit()
-            print(f"✅ Seeding complete: {valid_count} valid wallets added/updated")
+            print(f"✅ Seeding complete: {len(rows)} valid wallets added/updated")
             if invalid_count > 0:
                 print(f"⚠️  Skipped {invalid_count} invalid addresses")
             
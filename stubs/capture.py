@@ -0,0 +1,90 @@
+"""
+Records real gmgn.ai answers as GMGN stub fixtures.
+
+    python -m stubs.capture --token 5dpN5wMH8j8au29Rp91qn4WfNq6t6xJfcjQNcFeDJ8Ct \\
+        --wallet DfMxre4cKmvogbLrPigxmibVTTQDuzjdXojWzjCXXhzj
+
+Writes stubs/fixtures/gmgn/<address>.json with the `data` of every endpoint
+the stub serves from fixtures, fetched through the same tls_client session
+gmgn/client.py uses. Endpoints that fail are left out and logged, the stub
+answers those synthetically.
+"""
+from gmgn.client import gmgn
+from pathlib import Path
+from stubs.gmgn import FIXTURES
+from typing import Callable, Dict, Optional
+import argparse
+import json
+import time
+
+TOKEN_ENDPOINTS: Dict[str, Callable[[str], str]] = {
+    "token_links": lambda mint: f"/api/v1/mutil_window_token_link_rug_vote/sol/{mint}",
+    "token_stat": lambda mint: f"/api/v1/token_stat/sol/{mint}",
+    "token_holders": lambda mint: (f"/vas/api/v1/token_holders/sol/{mint}"
+                                   "?limit=100&cost=20&tag=renowned&orderby=amount_percentage&direction=desc"),
+    "top_buyers": lambda mint: f"/defi/quotation/v1/tokens/top_buyers/sol/{mint}",
+}
+WALLET_ENDPOINTS: Dict[str, Callable[[str], str]] = {
+    "wallet_info": lambda wallet: f"/defi/quotation/v1/smartmoney/sol/walletNew/{wallet}?period=7d",
+}
+
+
+def fetch(client: gmgn, path: str, payload: Optional[dict] = None):
+    """`data` of one gmgn.ai answer, None when the request or the answer failed"""
+    client.randomiseRequest()
+    url = f"{client.host}{path}"
+    try:
+        if payload is None:
+            response = client.sendRequest.get(url, headers=client.headers)
+        else:
+            response = client.sendRequest.post(url, headers=client.headers, json=payload)
+        body = json.loads(response.content)
+    except Exception as e:
+        print(f"❌ {path}: {e}")
+        return None
+    if response.status_code != 200 or body.get("code", 0) != 0 or body.get("data") is None:
+        print(f"❌ {path}: {response.status_code} {str(body)[:200]}")
+        return None
+    return body["data"]
+
+
+def capture(client: gmgn, address: str, endpoints: Dict[str, Callable[[str], str]], token: bool,
+            delay: float, directory: Path) -> Path:
+    """Fetches every endpoint for one address and writes its fixture file"""
+    recorded = {}
+    if token:
+        tokens = fetch(client, "/api/v1/mutil_window_token_info", {"chain": "sol", "addresses": [address]})
+        if tokens:
+            recorded["token_info"] = tokens[0]
+    for name, path in endpoints.items():
+        time.sleep(delay)
+        data = fetch(client, path(address))
+        if data is not None:
+            recorded[name] = data
+    path = directory / f"{address}.json"
+    path.write_text(json.dumps(recorded, indent=1, ensure_ascii=False) + "\n")
+    print(f"✅ {address}: {', '.join(recorded) or 'nothing'} -> {path}")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", action="append", default=[], help="Mint to record, repeatable")
+    parser.add_argument("--wallet", action="append", default=[], help="Wallet to record, repeatable")
+    parser.add_argument("--host", default="https://gmgn.ai", help="Recorded even when USE_LOCAL_STUBS is set")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between requests, gmgn.ai rate limits")
+    parser.add_argument("--out", type=Path, default=FIXTURES)
+    args = parser.parse_args()
+    if not args.token and not args.wallet:
+        parser.error("nothing to record, pass --token or --wallet")
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    client = gmgn(args.host)
+    for mint in args.token:
+        capture(client, mint, TOKEN_ENDPOINTS, True, args.delay, args.out)
+    for wallet in args.wallet:
+        capture(client, wallet, WALLET_ENDPOINTS, False, args.delay, args.out)
+
+
+if __name__ == "__main__":
+    main()
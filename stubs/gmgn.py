@@ -0,0 +1,218 @@
+"""
+GMGN stub: the token and wallet endpoints of gmgn/client.py. Addresses with a
+file in stubs/fixtures/gmgn (written by stubs/capture.py) get the recorded
+answers, anything else a synthetic one shaped like gmgn.ai's and derived from
+the address, so the same mint always gets the same report.
+"""
+from aiohttp import web
+from pathlib import Path
+from stubs.server import StubServer
+from typing import Optional
+import json
+import random
+import zlib
+
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+FIXTURES = Path(__file__).parent / "fixtures" / "gmgn"
+
+
+def seeded(address: str) -> random.Random:
+    return random.Random(zlib.crc32(address.encode()))
+
+
+def pubkey(rng: random.Random) -> str:
+    return "".join(rng.choices(BASE58, k=44))
+
+
+def ok(data) -> web.Response:
+    return web.json_response({"code": 0, "msg": "success", "data": data})
+
+
+def load_fixtures(directory: Path = FIXTURES) -> dict:
+    """{address: {endpoint: data}} from the fixture files"""
+    return {path.stem: json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))}
+
+
+class GMGNStub(StubServer):
+    name = "gmgn"
+
+    def __init__(self, *args, fixtures: Optional[dict] = None, **kwargs):
+        """
+        Args:
+            fixtures (dict): {address: {endpoint: data}}, the files in stubs/fixtures/gmgn by default.
+        """
+        self.fixtures = load_fixtures() if fixtures is None else fixtures
+        super().__init__(*args, **kwargs)
+
+    def routes(self, router: web.UrlDispatcher) -> None:
+        router.add_post("/api/v1/mutil_window_token_info", self.token_info)
+        router.add_get("/api/v1/mutil_window_token_link_rug_vote/sol/{mint}", self.token_links)
+        router.add_get("/api/v1/token_stat/sol/{mint}", self.token_stat)
+        router.add_get("/api/v1/token_trends/sol/{mint}", self.token_trends)
+        router.add_get("/vas/api/v1/token_holders/sol/{mint}", self.token_holders)
+        router.add_get("/defi/quotation/v1/tokens/top_buyers/sol/{mint}", self.top_buyers)
+        router.add_get("/defi/quotation/v1/tokens/security/sol/{mint}", self.security)
+        router.add_get("/defi/quotation/v1/sol/tokens/realtime_token_price", self.token_price)
+        router.add_get("/defi/quotation/v1/smartmoney/sol/walletNew/{wallet}", self.wallet_info)
+        router.add_get("/defi/quotation/v1/smartmoney/sol/walletstat/{wallet}", self.wallet_token_stat)
+
+    def recorded(self, address: str, endpoint: str):
+        """The captured `data` of an endpoint for an address, None when there is none"""
+        return self.fixtures.get(address, {}).get(endpoint)
+
+    async def token_info(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        tokens = []
+        for mint in body.get("addresses", []):
+            recorded = self.recorded(mint, "token_info")
+            if recorded is not None:
+                tokens.append(recorded)
+                continue
+            rng = seeded(mint)
+            symbol = "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=4))
+            tokens.append({
+                "address": mint,
+                "symbol": symbol,
+                "name": f"{symbol.title()} Coin",
+                "logo": "",
+                "holder_count": rng.randint(50, 20000),
+                "liquidity": str(round(rng.uniform(1e3, 5e6), 2)),
+                "price": {
+                    "price": str(rng.uniform(1e-7, 1e-2)),
+                    "volume_1h": str(round(rng.uniform(0, 1e6), 2)),
+                    "volume_5m": str(round(rng.uniform(0, 1e5), 2)),
+                },
+                "dev": {"top_10_holder_rate": str(round(rng.uniform(0.05, 0.6), 4))},
+            })
+        return ok(tokens)
+
+    async def token_links(self, request: web.Request) -> web.Response:
+        mint = request.match_info["mint"]
+        recorded = self.recorded(mint, "token_links")
+        if recorded is not None:
+            return ok(recorded)
+        rng = seeded(mint)
+        handle = f"token{rng.randint(100, 99999)}"
+        return ok({
+            "link": {
+                "address": mint,
+                "twitter_username": handle,
+                "website": f"https://{handle}.example",
+                "telegram": f"https://t.me/{handle}",
+                "github": "",
+                "discord": "",
+                "description": "",
+                "verify_status": 0,
+            },
+            "rug_vote": {"rug_count": 0, "not_rug_count": 0},
+        })
+
+    async def token_stat(self, request: web.Request) -> web.Response:
+        recorded = self.recorded(request.match_info["mint"], "token_stat")
+        if recorded is not None:
+            return ok(recorded)
+        rng = seeded(request.match_info["mint"])
+        return ok({
+            "holder_count": rng.randint(50, 20000),
+            "bluechip_owner_count": rng.randint(0, 50),
+            "bluechip_owner_percentage": str(round(rng.uniform(0, 0.1), 4)),
+            "top_rat_trader_percentage": str(round(rng.uniform(0, 0.3), 4)),
+        })
+
+    async def token_holders(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 100))
+        recorded = self.recorded(request.match_info["mint"], "token_holders")
+        if recorded is not None:
+            return ok(dict(recorded, list=recorded["list"][:limit]))
+        rng = seeded(request.match_info["mint"])
+        funders = [pubkey(rng) for _ in range(max(limit // 10, 1))]
+        holders = []
+        for _ in range(limit):
+            cost = round(rng.uniform(0, 5000), 2)
+            holders.append({
+                "address": pubkey(rng),
+                "account_address": rng.choice(funders),
+                "amount_percentage": round(rng.uniform(0, 0.05), 6),
+                "cost_cur": cost,
+                "profit": round(rng.uniform(-cost, cost * 3), 2),
+                "sell_tx_count_cur": rng.randint(0, 3),
+                "is_new": rng.random() < 0.2,
+                "is_suspicious": rng.random() < 0.05,
+                "wallet_tag_v2": rng.choice(["", "TOP1", "rat_trader", "transfer_in"]),
+            })
+        return ok({"list": holders})
+
+    async def wallet_info(self, request: web.Request) -> web.Response:
+        recorded = self.recorded(request.match_info["wallet"], "wallet_info")
+        if recorded is not None:
+            return ok(recorded)
+        rng = seeded(request.match_info["wallet"])
+        realized = round(rng.uniform(-5e4, 2e5), 2)
+        unrealized = round(rng.uniform(-1e4, 5e4), 2)
+        return ok({
+            "pnl": round(rng.uniform(-0.5, 3), 4),
+            "realized_profit": realized,
+            "unrealized_profit": unrealized,
+            "total_trades": rng.randint(10, 5000),
+            "winrate": round(rng.uniform(0.2, 0.8), 4),
+        })
+
+    async def token_trends(self, request: web.Request) -> web.Response:
+        rng = seeded(request.match_info["mint"])
+        start = 1730419200
+        trends = {
+            trend: [{"timestamp": start + hour * 3600, "value": str(round(rng.uniform(0, 1) * scale, 4))} for hour in range(24)]
+            for trend, scale in (("avg_holding_balance", 500), ("holder_count", 5000),
+                                 ("top10_holder_percent", 1), ("top100_holder_percent", 1))
+            if trend in request.query.getall("trends_type", [trend])
+        }
+        return ok({"trends": trends})
+
+    async def top_buyers(self, request: web.Request) -> web.Response:
+        mint = request.match_info["mint"]
+        recorded = self.recorded(mint, "top_buyers")
+        if recorded is not None:
+            return ok(recorded)
+        rng = seeded(mint)
+        buyers = [
+            {"wallet_address": pubkey(rng), "status": rng.choice(["hold", "sold", "sold_part", "bought_more"]),
+             "is_new": rng.random() < 0.2, "maker_token_tags": [], "tags": []}
+            for _ in range(100)
+        ]
+        status = {name: sum(buyer["status"] == name for buyer in buyers) for name in ("hold", "bought_more", "sold_part", "sold")}
+        status["top_10_holder_rate"] = round(rng.uniform(0.05, 0.6), 4)
+        return ok({"holders": {"chain": "sol", "holder_count": rng.randint(50, 20000), "statusNow": status, "holderInfo": buyers}})
+
+    async def security(self, request: web.Request) -> web.Response:
+        mint = request.match_info["mint"]
+        rng = seeded(mint)
+        return ok({
+            "address": mint,
+            "is_show_alert": False,
+            "top_10_holder_rate": str(round(rng.uniform(0.05, 0.6), 4)),
+            "renounced_mint": True,
+            "renounced_freeze_account": True,
+            "burn_ratio": "1",
+            "burn_status": "burn",
+        })
+
+    async def token_price(self, request: web.Request) -> web.Response:
+        mint = request.query.get("address", "")
+        recorded = self.recorded(mint, "token_info")
+        price = recorded["price"]["price"] if recorded else str(seeded(mint).uniform(1e-7, 1e-2))
+        return ok({"address": mint, "usd_price": price})
+
+    async def wallet_token_stat(self, request: web.Request) -> web.Response:
+        rng = seeded(request.match_info["wallet"] + request.query.get("token_address", ""))
+        bought = round(rng.uniform(10, 5000), 2)
+        sold = round(bought * rng.uniform(0, 3), 2)
+        return ok({
+            "holding_cost": round(bought * rng.uniform(0, 0.5), 2),
+            "history_bought_cost": bought,
+            "history_sold_income": sold,
+            "realized_profit": round(sold - bought, 2),
+            "unrealized_profit": 0,
+            "total_profit": round(sold - bought, 2),
+            "buy_30d": rng.randint(1, 20),
+            "sell_30d": rng.randint(0, 20),
+        })
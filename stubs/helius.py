@@ -0,0 +1,73 @@
+"""
+Helius stub: the webhooks API kept in memory, wallet balances, and the
+transactions API answering with the swap fixtures in tests/fixtures.
+"""
+from aiohttp import web
+from pathlib import Path
+from stubs.server import StubServer
+from stubs.gmgn import pubkey, seeded
+import json
+import uuid
+
+SWAP_FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "helius_swaps.json"
+
+
+class HeliusStub(StubServer):
+    name = "helius"
+
+    def __init__(self, *args, **kwargs):
+        self.webhooks = {}
+        self.transactions = json.loads(SWAP_FIXTURES.read_text())
+        super().__init__(*args, **kwargs)
+
+    def routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/v0/webhooks", self.list_webhooks)
+        router.add_post("/v0/webhooks", self.create_webhook)
+        router.add_get("/v0/webhooks/{webhook_id}", self.get_webhook)
+        router.add_put("/v0/webhooks/{webhook_id}", self.edit_webhook)
+        router.add_delete("/v0/webhooks/{webhook_id}", self.delete_webhook)
+        router.add_get("/v0/addresses/{address}/balances", self.balances)
+        router.add_get("/v0/addresses/{address}/transactions", self.address_transactions)
+
+    async def list_webhooks(self, request: web.Request) -> web.Response:
+        return web.json_response(list(self.webhooks.values()))
+
+    async def create_webhook(self, request: web.Request) -> web.Response:
+        webhook = await request.json()
+        webhook["webhookId"] = str(uuid.uuid4())
+        webhook["wallet"] = "stub"
+        self.webhooks[webhook["webhookId"]] = webhook
+        return web.json_response(webhook)
+
+    async def get_webhook(self, request: web.Request) -> web.Response:
+        webhook = self.webhooks.get(request.match_info["webhook_id"])
+        if webhook is None:
+            return web.json_response({"error": "Webhook not found"}, status=404)
+        return web.json_response(webhook)
+
+    async def edit_webhook(self, request: web.Request) -> web.Response:
+        webhook_id = request.match_info["webhook_id"]
+        webhook = self.webhooks.get(webhook_id)
+        if webhook is None:
+            return web.json_response({"error": "Webhook not found"}, status=404)
+        webhook.update(await request.json())
+        return web.json_response(webhook)
+
+    async def delete_webhook(self, request: web.Request) -> web.Response:
+        self.webhooks.pop(request.match_info["webhook_id"], None)
+        return web.Response(status=200)
+
+    async def balances(self, request: web.Request) -> web.Response:
+        rng = seeded(request.match_info["address"])
+        tokens = [
+            {"mint": pubkey(rng), "amount": rng.randint(1, 10**12), "decimals": rng.choice([6, 9]),
+             "tokenAccount": pubkey(rng)}
+            for _ in range(rng.randint(0, 20))
+        ]
+        return web.json_response({"tokens": tokens, "nativeBalance": rng.randint(0, 10**11)})
+
+    async def address_transactions(self, request: web.Request) -> web.Response:
+        address = request.match_info["address"]
+        # The fixtures' fee payer stands in for whichever wallet is asked about
+        body = json.dumps(self.transactions).replace(self.transactions[0]["feePayer"], address)
+        return web.Response(text=body, content_type="application/json")
@@ -0,0 +1,58 @@
+"""
+Jupiter stub: /quote and /swap of the v6 API. The swap transaction is a
+zero-lamport self transfer by userPublicKey, unsigned and with a default
+blockhash, so jupiter_swap() can decode and sign it like a real one.
+"""
+from aiohttp import web
+from solders.hash import Hash
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import transfer, TransferParams
+from solders.transaction import VersionedTransaction
+from stubs.server import StubServer
+import base64
+
+
+class JupiterStub(StubServer):
+    name = "jupiter"
+
+    def routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/quote", self.quote)
+        router.add_post("/swap", self.swap)
+
+    async def quote(self, request: web.Request) -> web.Response:
+        params = request.query
+        if not params.get("inputMint") or not params.get("outputMint") or not params.get("amount"):
+            return web.json_response({"error": "Missing inputMint, outputMint or amount"}, status=422)
+        amount = int(params["amount"])
+        out_amount = str(amount * 1000)
+        return web.json_response({
+            "inputMint": params["inputMint"],
+            "inAmount": str(amount),
+            "outputMint": params["outputMint"],
+            "outAmount": out_amount,
+            "otherAmountThreshold": out_amount,
+            "swapMode": "ExactIn",
+            "slippageBps": int(params.get("slippageBps", 50)),
+            "priceImpactPct": "0",
+            "routePlan": [],
+            "contextSlot": 0,
+            "timeTaken": 0.001,
+        })
+
+    async def swap(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        try:
+            owner = Pubkey.from_string(body["userPublicKey"])
+        except (KeyError, ValueError):
+            return web.json_response({"error": "Invalid userPublicKey"}, status=422)
+        message = Message.new_with_blockhash(
+            [transfer(TransferParams(from_pubkey=owner, to_pubkey=owner, lamports=0))], owner, Hash.default()
+        )
+        transaction = VersionedTransaction.populate(message, [Signature.default()])
+        return web.json_response({
+            "swapTransaction": base64.b64encode(bytes(transaction)).decode(),
+            "lastValidBlockHeight": 0,
+            "prioritizationFeeLamports": 0,
+        })
@@ -0,0 +1,72 @@
+"""
+Solana JSON-RPC stub: the methods jupiter_swap() and the solana clients call.
+Sent transactions are kept by signature and reported as finalized, so a swap
+through the Jupiter stub can be sent and confirmed without a validator.
+"""
+from aiohttp import web
+from solders.hash import Hash
+from solders.transaction import VersionedTransaction
+from stubs.server import StubServer
+import base64
+
+BLOCKHASH = str(Hash.new_unique())
+
+
+class RPCStub(StubServer):
+    name = "rpc"
+
+    def __init__(self, *args, balance: int = 10 ** 9, **kwargs):
+        """
+        Args:
+            balance (int): Lamports getBalance reports for every account.
+        """
+        self.balance = balance
+        self.slot = 300_000_000
+        self.transactions = {}
+        super().__init__(*args, **kwargs)
+
+    def routes(self, router: web.UrlDispatcher) -> None:
+        router.add_post("/", self.dispatch)
+
+    def _context(self, value) -> dict:
+        return {"context": {"slot": self.slot}, "value": value}
+
+    def _result(self, method: str, params: list):
+        if method == "getHealth":
+            return "ok"
+        if method == "getSlot":
+            return self.slot
+        if method == "getLatestBlockhash":
+            return self._context({"blockhash": BLOCKHASH, "lastValidBlockHeight": self.slot + 150})
+        if method == "getBalance":
+            return self._context(self.balance)
+        if method == "getRecentPrioritizationFees":
+            return [{"slot": self.slot - n, "prioritizationFee": 1000 * (n % 5)} for n in range(150)]
+        if method == "sendTransaction":
+            transaction = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            signature = str(transaction.signatures[0])
+            self.transactions[signature] = self.slot
+            return signature
+        if method == "getSignatureStatuses":
+            return self._context([
+                {"slot": self.transactions[signature], "confirmations": None, "err": None,
+                 "status": {"Ok": None}, "confirmationStatus": "finalized"}
+                if signature in self.transactions else None
+                for signature in params[0]
+            ])
+        raise KeyError(method)
+
+    def _answer(self, call: dict) -> dict:
+        try:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": self._result(call["method"], call.get("params") or [])}
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        except (ValueError, IndexError) as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32602, "message": f"Invalid params: {e}"}}
+
+    async def dispatch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.slot += 1
+        if isinstance(body, list):
+            return web.json_response([self._answer(call) for call in body])
+        return web.json_response(self._answer(body))
@@ -0,0 +1,103 @@
+"""
+Starts the GMGN, Helius, Jupiter, Solana RPC and Telegram stubs.
+
+    python -m stubs.run --gmgn-latency-ms 300 --gmgn-error-rate 0.02 --gmgn-rate-limit 5
+
+They listen on the fixed ports USE_LOCAL_STUBS=true points the clients at
+(config/endpoints.py), and the explicit settings are printed as well. The
+load test (benchmarks/webhook_load.py) starts them the same way in a process
+of their own, on free ports.
+"""
+from stubs.server import StubServer
+from stubs.gmgn import GMGNStub
+from stubs.helius import HeliusStub
+from stubs.jupiter import JupiterStub
+from stubs.rpc import RPCStub
+from stubs.telegram import TelegramStub
+from typing import Dict, Optional
+import argparse
+import asyncio
+import signal
+
+SERVICES = {"gmgn": GMGNStub, "helius": HeliusStub, "jupiter": JupiterStub, "rpc": RPCStub, "telegram": TelegramStub}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Latency, failure and rate limit options for every stub"""
+    for name in SERVICES:
+        parser.add_argument(f"--{name}-latency-ms", type=float, default=0.0, help=f"Mean added latency of {name} requests")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0, help=f"Fraction of {name} requests failed with a 500")
+        parser.add_argument(f"--{name}-rate-limit", type=float, default=0.0, help=f"{name} requests served per second, the rest get a 429")
+    parser.add_argument("--telegram-flood-rate", type=float, default=0.0, help="Fraction of Telegram sends answered with a FloodWait")
+    parser.add_argument("--telegram-flood-wait", type=int, default=1, help="Seconds each FloodWait asks for")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def stub_env(urls: Dict[str, str]) -> Dict[str, str]:
+    """Settings that send the bot's HTTP calls to the stubs"""
+    return {
+        "GMGN_HOST": urls["gmgn"], "HELIUS_API_URL": urls["helius"],
+        "JUP_API": urls["jupiter"], "SOLANA_RPC_NODE": urls["rpc"],
+    }
+
+
+async def start_stubs(options: argparse.Namespace, ports: Optional[Dict[str, int]] = None) -> Dict[str, StubServer]:
+    """Starts every stub with the latencies and error rates in `options`"""
+    servers = {}
+    for name, stub in SERVICES.items():
+        kwargs = dict(
+            latency_ms=getattr(options, f"{name}_latency_ms"),
+            error_rate=getattr(options, f"{name}_error_rate"),
+            rate_limit=getattr(options, f"{name}_rate_limit"),
+            seed=options.seed,
+        )
+        if name == "telegram":
+            kwargs.update(flood_rate=options.telegram_flood_rate, flood_wait=options.telegram_flood_wait)
+        servers[name] = stub(**kwargs)
+        await servers[name].start(port=(ports or {}).get(name, 0))
+    return servers
+
+
+async def serve(options: argparse.Namespace, ready=None) -> None:
+    """
+    Runs the stubs until SIGINT or SIGTERM.
+
+    Args:
+        ready: Queue that receives {name: url} once every stub is listening. Without
+            one the stubs take the fixed ports of USE_LOCAL_STUBS.
+    """
+    # Imported here, the load test imports this module before setting the environment config.endpoints reads
+    from config.endpoints import STUB_PORTS
+
+    servers = await start_stubs(options, None if ready is not None else STUB_PORTS)
+    urls = {name: server.url for name, server in servers.items()}
+    if ready is not None:
+        ready.put(urls)
+    else:
+        print("# USE_LOCAL_STUBS=true, or:")
+        for key, value in stub_env(urls).items():
+            print(f"export {key}={value}")
+        print(f"# Telegram stub: {urls['telegram']}")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+    await stopped.wait()
+    for server in servers.values():
+        await server.stop()
+
+
+def run(options: argparse.Namespace, ready=None) -> None:
+    """Process entry point, see serve()"""
+    asyncio.run(serve(options, ready))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Base for the local stand-ins of the external APIs the bot calls.
+
+Every stub is an aiohttp application bound to 127.0.0.1. A middleware delays
+each request by `latency_ms` (±20% jitter) and fails `error_rate` of them with
+a 500, so benchmarks can see how the webhook path behaves when GMGN or
+Telegram is slow or flaky. With `rate_limit` set, requests beyond that many
+per second are answered with a 429 and a Retry-After header, the way the real
+APIs throttle. GET /_stub/stats reports what a stub has served and
+is never delayed or failed.
+"""
+from aiohttp import web
+from collections import deque
+from typing import Optional
+import asyncio
+import random
+import time
+
+
+class StubServer:
+    name = "stub"
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None,
+                 rate_limit: float = 0.0):
+        """
+        Args:
+            latency_ms (float): Mean delay added to every request.
+            error_rate (float): Fraction of requests answered with a 500.
+            seed (int): Seed for the jitter and the injected errors.
+            rate_limit (float): Requests served per second, 0 for no limit.
+        """
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self._window = deque()
+        self.url: Optional[str] = None
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.app = web.Application(middlewares=[self._faults])
+        self.app.router.add_get("/_stub/stats", self._stats)
+        self.routes(self.app.router)
+
+    def routes(self, router: web.UrlDispatcher) -> None:
+        """Registers the endpoints the stub serves"""
+        raise NotImplementedError
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler):
+        if request.path.startswith("/_stub/"):
+            return await handler(request)
+        self.requests += 1
+        if self.rate_limit:
+            retry_after = self._throttle()
+            if retry_after:
+                self.throttled += 1
+                return web.json_response(
+                    {"code": 429, "msg": "too many requests"}, status=429,
+                    headers={"Retry-After": str(retry_after)},
+                )
+        if self.latency_ms:
+            await asyncio.sleep(max(self._random.gauss(self.latency_ms, self.latency_ms * 0.2), 0) / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        return await handler(request)
+
+    def _throttle(self) -> int:
+        """Seconds the client should wait before retrying, 0 when this request fits in the window"""
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= 1:
+            self._window.popleft()
+        if len(self._window) >= self.rate_limit:
+            return 1
+        self._window.append(now)
+        return 0
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        return {"name": self.name, "requests": self.requests, "errors": self.errors, "throttled": self.throttled}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts serving, on a free port unless one is given. Returns the base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
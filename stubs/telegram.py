@@ -0,0 +1,108 @@
+"""
+Telegram stub.
+
+Pyrogram talks MTProto, not HTTP, so the bot side is StubTelegramClient: the
+two Client methods the outbound queue calls, forwarded to TelegramStub as Bot
+API style requests. The server records every delivery with its wall-clock
+time, which is what the load test reads back as the moment an alert arrived,
+and answers `flood_rate` of them with a 429 that the client raises as
+FloodWait.
+"""
+from aiohttp import web
+from pyrogram.errors import FloodWait
+from stubs.server import StubServer
+from types import SimpleNamespace
+from typing import Any, Optional
+import aiohttp
+import time
+
+
+class TelegramStub(StubServer):
+    name = "telegram"
+
+    def __init__(self, *args, flood_rate: float = 0.0, flood_wait: int = 1, **kwargs):
+        """
+        Args:
+            flood_rate (float): Fraction of sends answered with a FloodWait.
+            flood_wait (int): Seconds the FloodWait asks for.
+        """
+        self.flood_rate = flood_rate
+        self.flood_wait = flood_wait
+        self.flood_waits = 0
+        self.deliveries = []
+        self._message_id = 0
+        super().__init__(*args, **kwargs)
+
+    def routes(self, router: web.UrlDispatcher) -> None:
+        router.add_post("/bot{token}/sendMessage", self.send_message)
+        router.add_post("/bot{token}/editMessageText", self.edit_message_text)
+        router.add_get("/_stub/deliveries", self.list_deliveries)
+
+    def _flooded(self) -> Optional[web.Response]:
+        if self.flood_rate and self._random.random() < self.flood_rate:
+            self.flood_waits += 1
+            return web.json_response(
+                {"ok": False, "error_code": 429, "parameters": {"retry_after": self.flood_wait}}, status=429
+            )
+        return None
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        flooded = self._flooded()
+        if flooded is not None:
+            return flooded
+        self._message_id += 1
+        self.deliveries.append({
+            "method": "send", "at": time.time(), "chat_id": body.get("chat_id"),
+            "message_id": self._message_id, "text": body.get("text", ""),
+        })
+        return web.json_response({"ok": True, "result": {"message_id": self._message_id}})
+
+    async def edit_message_text(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        flooded = self._flooded()
+        if flooded is not None:
+            return flooded
+        self.deliveries.append({
+            "method": "edit", "at": time.time(), "chat_id": body.get("chat_id"),
+            "message_id": body.get("message_id"), "text": body.get("text", ""),
+        })
+        return web.json_response({"ok": True, "result": {"message_id": body.get("message_id")}})
+
+    async def list_deliveries(self, request: web.Request) -> web.Response:
+        return web.json_response(self.deliveries)
+
+    def stats(self) -> dict:
+        return dict(super().stats(), deliveries=len(self.deliveries), flood_waits=self.flood_waits)
+
+
+class StubTelegramClient:
+    """Stands in for pyrogram.Client on the bot side, sending to a TelegramStub"""
+
+    def __init__(self, url: str, token: str = "stub"):
+        self.url = f"{url.rstrip('/')}/bot{token}"
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+
+    async def stop(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _call(self, method: str, chat_id: Any, **fields) -> SimpleNamespace:
+        async with self._session.post(f"{self.url}/{method}", json={"chat_id": chat_id, **fields}) as response:
+            body = await response.json()
+            if response.status == 429:
+                raise FloodWait(value=body["parameters"]["retry_after"])
+            if response.status != 200:
+                raise RuntimeError(f"Telegram stub answered {response.status}: {body}")
+            return SimpleNamespace(id=body["result"]["message_id"], chat=SimpleNamespace(id=chat_id))
+
+    async def send_message(self, chat_id: Any, text: str, **kwargs) -> SimpleNamespace:
+        # reply_markup and the other options only change how Telegram renders the message
+        return await self._call("sendMessage", chat_id, text=text)
+
+    async def edit_message_text(self, chat_id: Any, message_id: int, text: str, **kwargs) -> SimpleNamespace:
+        return await self._call("editMessageText", chat_id, message_id=message_id, text=text)
@@ -0,0 +1,37 @@
+"""
+With USE_LOCAL_STUBS=true the tests that call gmgn.ai and the other APIs talk
+to the stubs instead. They are started here, on their fixed ports, unless
+`python -m stubs.run` already has them up.
+"""
+import argparse
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.endpoints import STUB_PORTS, USE_LOCAL_STUBS
+
+
+def _serve_stubs(started: threading.Event) -> None:
+    from stubs.run import add_arguments, start_stubs
+
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(start_stubs(parser.parse_args([]), STUB_PORTS))
+    except OSError:
+        # Ports taken, the stubs are already running
+        started.set()
+        return
+    started.set()
+    loop.run_forever()
+
+
+def pytest_configure(config):
+    if USE_LOCAL_STUBS:
+        started = threading.Event()
+        threading.Thread(target=_serve_stubs, args=(started,), daemon=True).start()
+        started.wait(30)
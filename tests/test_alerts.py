@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Test buy alert aggregation - offline, the Telegram client is a stub"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.alerts as alerts
+from bot.utils.alerts import AlertAggregator
+from bot.utils.outbound import OutboundQueue
+
+TOKEN_INFO = {
+    "profile": {"ca": "MINT", "name": "Tok", "symbol": "TOK"},
+    "stats": {}, "holders": {}, "links": {},
+}
+
+
+class StubClient:
+    def __init__(self):
+        self.calls = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls.append(("send", text))
+        return SimpleNamespace(id=1, text=text)
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        self.calls.append(("edit", text))
+        return SimpleNamespace(id=message_id, text=text)
+
+
+def wallet(name):
+    return {"name": name, "address": name, "description": f"🟢 Bought 1.00 SOL for 10.00 **Tok**\n", "pnl": {"pnl": 5}}
+
+
+def run(scenario, window=60):
+    client = StubClient()
+    original = alerts.outbound_queue
+
+    async def main():
+        alerts.outbound_queue = OutboundQueue(chat_rate=100, chat_burst=5, global_rate=1000, notice_linger=0)
+        await alerts.outbound_queue.start(client)
+        aggregator = AlertAggregator(window=window)
+        await scenario(aggregator)
+        await alerts.outbound_queue.stop()
+
+    try:
+        asyncio.run(main())
+    finally:
+        alerts.outbound_queue = original
+    return client.calls
+
+
+def test_later_buys_edit_the_first_alert():
+    async def scenario(aggregator):
+        assert aggregator.active("chat", "MINT") is None
+        await aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("alpha"))
+        assert aggregator.active("chat", "MINT").token_info is TOKEN_INFO
+        await aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("beta"))
+
+    calls = run(scenario)
+    assert [kind for kind, _ in calls] == ["send", "edit"]
+    assert calls[0][1].startswith("**#alpha**")
+    assert "Wallets in: 2" in calls[1][1] and "#alpha" in calls[1][1] and "#beta" in calls[1][1]
+
+
+def test_buys_before_delivery_are_folded_into_one_edit():
+    async def scenario(aggregator):
+        first = aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("alpha"))
+        # Not delivered yet, nothing to edit
+        assert aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("beta")) is None
+        assert aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("gamma")) is None
+        await first
+        await asyncio.sleep(0.05)
+
+    calls = run(scenario)
+    assert [kind for kind, _ in calls] == ["send", "edit"]
+    assert "Wallets in: 3" in calls[1][1]
+
+
+def test_window_expiry_opens_a_new_alert():
+    async def scenario(aggregator):
+        await aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("alpha"))
+        assert aggregator.active("chat", "MINT") is None
+        await aggregator.publish("chat", "MINT", TOKEN_INFO, wallet("beta"))
+
+    calls = run(scenario, window=0)
+    assert [kind for kind, _ in calls] == ["send", "send"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Test the in-process caches - offline, no API calls"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.cache import LRUCache, TTLCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"  # 2 is now the oldest
+    cache.set(3, "c")
+    assert 2 not in cache and cache.get(1) == "a" and cache.get(3) == "c"
+
+
+def test_lru_pop_and_stats():
+    cache = LRUCache(maxsize=4)
+    cache.set("user", {"language": "en"})
+    assert cache.get("user") == {"language": "en"}
+    assert cache.pop("user") == {"language": "en"}
+    assert cache.get("user") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_ttl_serves_stale_values_as_not_fresh():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("wallet", {"pnl": 1})
+    assert cache.lookup("wallet") == ({"pnl": 1}, True)
+    cache.ttl = 0
+    cache.set("wallet", {"pnl": 2})
+    assert cache.lookup("wallet") == ({"pnl": 2}, False)
+    assert cache.get("wallet") is None
+    assert cache.lookup("missing") == (None, False)
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["stale_hits"] == 2 and stats["misses"] == 3
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
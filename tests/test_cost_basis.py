@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Test the lot-based cost basis ledger - offline, no API calls"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.cost_basis import CostBasisLedger, FIFO, AVERAGE
+
+
+def approx(a: float, b: float) -> bool:
+    return abs(a - b) < 1e-9
+
+
+def test_fifo_partial_sells():
+    ledger = CostBasisLedger(FIFO)
+    ledger.buy("MINT", 100, 1.0)   # 0.01 SOL/token
+    ledger.buy("MINT", 100, 3.0)   # 0.03 SOL/token
+
+    # Sells consume the oldest lot first, splitting it when needed
+    assert approx(ledger.sell("MINT", 50, 1.5), 1.0)
+    assert approx(ledger.sell("MINT", 100, 4.0), 4.0 - (0.5 + 1.5))
+
+    position = ledger.get("MINT")
+    assert approx(position.amount, 50)
+    assert approx(position.cost, 1.5)
+    assert approx(position.realized, 3.0)
+    assert position.buys == 2 and position.sells == 2
+    assert len(position.lots) == 1
+
+
+def test_average_cost():
+    ledger = CostBasisLedger(AVERAGE)
+    ledger.buy("MINT", 100, 1.0)
+    ledger.buy("MINT", 100, 3.0)
+
+    assert approx(ledger.sell("MINT", 50, 1.5), 1.5 - 1.0)
+    position = ledger.get("MINT")
+    assert position.lots is None
+    assert approx(position.cost, 3.0)
+    assert approx(position.unrealized(0.04), 150 * 0.04 - 3.0)
+
+
+def test_route_carries_basis():
+    ledger = CostBasisLedger(FIFO)
+    ledger.buy("A", 10, 2.0)
+    ledger.route("A", 5, "B", 1000)
+
+    assert approx(ledger.get("A").cost, 1.0)
+    assert approx(ledger.get("A").realized, 0.0)
+    assert approx(ledger.get("B").cost, 1.0)
+
+    # Selling B realizes against the basis carried over from A
+    assert approx(ledger.sell("B", 1000, 1.8), 0.8)
+
+
+def test_oversell_has_no_basis():
+    ledger = CostBasisLedger(FIFO)
+    ledger.buy("MINT", 10, 1.0)
+    assert approx(ledger.sell("MINT", 20, 3.0), 2.0)
+    assert ledger.get("MINT").amount == 0
+
+
+def test_transfers_open_zero_cost_lots():
+    ledger = CostBasisLedger(FIFO)
+    ledger.receive("MINT", 10)
+    assert approx(ledger.sell("MINT", 10, 0.5), 0.5)
+    ledger.buy("MINT", 10, 1.0)
+    ledger.send("MINT", 10)
+    position = ledger.get("MINT")
+    assert position.amount == 0 and approx(position.realized, 0.5)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
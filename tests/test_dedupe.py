@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test webhook signature dedupe - offline, the database session is a stub"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.dedupe as dedupe
+
+
+class StubSession:
+    """Stands in for processed_signatures: INSERT ... ON CONFLICT DO NOTHING RETURNING"""
+    table = set()
+    inserts = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        StubSession.inserts += 1
+        signature = stmt.compile().params["signature"]
+        claimed = None if signature in self.table else signature
+        self.table.add(signature)
+        return SimpleNamespace(scalar_one_or_none=lambda: claimed)
+
+    async def commit(self):
+        pass
+
+
+def run(coro_fn):
+    original = dedupe.AsyncSessionFactory
+    dedupe.AsyncSessionFactory = StubSession
+    StubSession.table, StubSession.inserts = set(), 0
+    dedupe.signature_cache.clear()
+    try:
+        return asyncio.run(coro_fn())
+    finally:
+        dedupe.AsyncSessionFactory = original
+
+
+def test_retry_is_caught_in_memory():
+    async def scenario():
+        return [await dedupe.claim_signature("sig") for _ in range(3)]
+
+    assert run(scenario) == [True, False, False]
+    # Retries never reach the database
+    assert StubSession.inserts == 1
+
+
+def test_concurrent_retry_is_caught_before_insert_finishes():
+    async def scenario():
+        return await asyncio.gather(dedupe.claim_signature("sig"), dedupe.claim_signature("sig"))
+
+    assert sorted(run(scenario)) == [False, True]
+
+
+def test_retry_after_restart_is_caught_by_table():
+    async def scenario():
+        first = await dedupe.claim_signature("sig")
+        dedupe.signature_cache.clear()
+        return first, await dedupe.claim_signature("sig")
+
+    assert run(scenario) == (True, False)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
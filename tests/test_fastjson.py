@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test the fast JSON layer on the sample Helius payloads - offline"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.fastjson as fastjson
+from bot.utils.fastjson import FastJSONResponse, decode_transactions, dumps, loads
+from bot.utils.swaps import decode_swap
+
+SAMPLES = (Path(__file__).parent / "fixtures" / "helius_swaps.json").read_bytes()
+
+
+def test_round_trip():
+    data = {"mint": "MINT", "amount": 1.5, "holders": [1, 2], "name": "Ñandú"}
+    assert loads(dumps(data)) == data
+    assert loads(dumps(data).decode()) == data
+
+
+def test_typed_decode_keeps_what_the_pipeline_reads():
+    decoded = decode_transactions(SAMPLES)
+    full = json.loads(SAMPLES)
+    if fastjson._transactions_decoder is not None:
+        assert "accountData" not in decoded[0] and "instructions" not in decoded[0]
+    for typed, raw in zip(decoded, full):
+        assert typed["signature"] == raw["signature"]
+        assert repr(decode_swap(typed)) == repr(decode_swap(raw))
+
+
+def test_unexpected_shapes_are_parsed_in_full():
+    assert decode_transactions(b'{"webhookID": "abc"}') == {"webhookID": "abc"}
+    assert decode_transactions(b'[{"signature": 5}]') == [{"signature": 5}]
+
+
+def test_invalid_json_raises_value_error():
+    try:
+        decode_transactions(b"[{")
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError")
+
+
+def test_response_class_renders_with_dumps():
+    assert loads(FastJSONResponse({"status": "ok"}).body) == {"status": "ok"}
+
+
+def test_gmgn_client_imports_without_settings():
+    # gmgn/client.py and stubs/capture.py run without a wallet key or a database
+    env = {key: value for key, value in os.environ.items() if key not in ("WALLET_PRIVATE_KEY", "DATABASE_URL")}
+    result = subprocess.run(
+        [sys.executable, "-c", "import gmgn.client, sys; print(gmgn.client.loads(b'[1]'), 'config.settings' in sys.modules)"],
+        cwd=str(Path(__file__).parent.parent), env=dict(env, JSON_BACKEND="json"), capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["[1]", "False"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Test leader election and the alert handoff - offline, Postgres is a stub"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from textwrap import dedent
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.handoff as handoff
+from bot.utils.leader import LeaderElection
+
+
+class StubPostgres:
+    """Session-level advisory locks, released when the holding connection ends"""
+
+    def __init__(self):
+        self.holder = None
+
+    async def connect(self):
+        return StubConnection(self)
+
+
+class StubConnection:
+    def __init__(self, server: StubPostgres):
+        self.server = server
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def fetchval(self, query, *args, timeout=None):
+        if self.closed:
+            raise ConnectionError("connection was closed")
+        if "pg_try_advisory_lock" in query:
+            if self.server.holder in (None, self):
+                self.server.holder = self
+                return True
+            return False
+        return 1
+
+    def drop(self):
+        """The network or the server ended the session"""
+        self.closed = True
+        if self.server.holder is self:
+            self.server.holder = None
+
+    async def close(self, timeout=None):
+        self.drop()
+
+    def terminate(self):
+        self.drop()
+
+
+def election(server: StubPostgres, events: list, name: str) -> LeaderElection:
+    worker = LeaderElection(enabled=True, lock_id=1, interval=0.01, connect=server.connect)
+
+    async def elected():
+        events.append((name, "elected"))
+
+    async def demoted():
+        events.append((name, "demoted"))
+
+    worker.callbacks = (elected, demoted)
+    return worker
+
+
+def test_one_leader_and_failover():
+    async def scenario():
+        server, events = StubPostgres(), []
+        first, second = election(server, events, "first"), election(server, events, "second")
+        await first.start(*first.callbacks)
+        await second.start(*second.callbacks)
+        roles = (first.is_leader, second.is_leader)
+
+        # The leader's session ends, it steps down and the follower takes over
+        first._conn.drop()
+        await asyncio.sleep(0.1)
+        failover = (first.is_leader, second.is_leader)
+
+        await first.stop()
+        await second.stop()
+        return roles, failover, events, server
+
+    roles, failover, events, server = asyncio.run(scenario())
+    assert roles == (True, False)
+    assert failover == (False, True)
+    assert events == [("first", "elected"), ("first", "demoted"), ("second", "elected"), ("second", "demoted")]
+    assert server.holder is None
+
+
+def test_leader_whose_duties_fail_steps_down():
+    async def scenario():
+        server, events = StubPostgres(), []
+        first, second = election(server, events, "first"), election(server, events, "second")
+
+        async def broken():
+            events.append(("first", "elected"))
+            raise RuntimeError("Telegram is unreachable")
+
+        await first.start(broken, first.callbacks[1])
+        # The partial start was undone and the lock released right away
+        after_failure = (first.is_leader, server.holder)
+        await second.start(*second.callbacks)
+        await asyncio.sleep(0.1)
+        roles = (first.is_leader, second.is_leader)
+        await first.stop()
+        await second.stop()
+        return after_failure, roles, events
+
+    after_failure, roles, events = asyncio.run(scenario())
+    assert after_failure == (False, None)
+    assert roles == (False, True)
+    assert events[:2] == [("first", "elected"), ("first", "demoted")]
+    assert ("second", "elected") in events and ("second", "demoted") not in events[:-1]
+
+
+def test_without_election_the_worker_leads():
+    async def scenario():
+        events = []
+
+        async def connect():
+            raise AssertionError("no lock is taken")
+
+        worker = LeaderElection(enabled=False, connect=connect)
+        before = worker.is_leader
+        await worker.start(lambda: events.append("elected") or asyncio.sleep(0),
+                           lambda: events.append("demoted") or asyncio.sleep(0))
+        await worker.stop()
+        return before, events
+
+    before, events = asyncio.run(scenario())
+    assert before is True
+    assert events == ["elected", "demoted"]
+
+
+class StubSession:
+    """Stands in for pending_alerts: rows taken with DELETE ... RETURNING"""
+    rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        taken, StubSession.rows = StubSession.rows[:params["batch_size"]], StubSession.rows[params["batch_size"]:]
+        return SimpleNamespace(all=lambda: list(reversed(taken)))
+
+    async def commit(self):
+        pass
+
+
+def test_relay_publishes_handed_off_alerts_in_order():
+    now = datetime.now(UTC)
+    StubSession.rows = [
+        SimpleNamespace(id=n, chat_id="-100", mint=f"MINT{n}", is_buy=n % 2 == 0, source="RAYDIUM",
+                        payload=handoff.dumps({"token_info": {"n": n}, "wallet_info": {"name": "w"}}).decode(),
+                        received_at=now - timedelta(seconds=2))
+        for n in range(1, 4)
+    ]
+    published = []
+
+    async def publish(chat_id, mint, is_buy, token_info, wallet_info, source, received_at):
+        published.append((mint, is_buy, token_info["n"], received_at))
+
+    async def scenario():
+        relay = handoff.AlertRelay(batch_size=2)
+        relay._publish = publish
+        return await relay.drain(), await relay.drain(), asyncio.get_running_loop().time()
+
+    original = handoff.AsyncSessionFactory
+    handoff.AsyncSessionFactory = StubSession
+    try:
+        first, second, _ = asyncio.run(scenario())
+    finally:
+        handoff.AsyncSessionFactory = original
+
+    assert (first, second) == (2, 1)
+    assert [(mint, is_buy, n) for mint, is_buy, n, _ in published] == [
+        ("MINT1", False, 1), ("MINT2", True, 2), ("MINT3", False, 3)
+    ]
+
+
+def test_handoff_payload_takes_numpy_counts():
+    import numpy as np
+    payload = handoff.dumps({"common_addresses": {"addr": np.int64(3)}}, default=handoff._plain)
+    assert handoff.loads(payload) == {"common_addresses": {"addr": 3}}
+
+
+WORKER = dedent("""
+    import sys
+    from bot.utils import metrics
+    from bot.utils.leader import IS_LEADER
+    metrics.WEBHOOKS_RECEIVED.inc(int(sys.argv[1]))
+    IS_LEADER.set(sys.argv[1] == "2")
+    metrics.register_cache("signatures", type("Cache", (), {"stats": lambda self: {"hits": 1, "misses": 0, "size": 4}})())
+    metrics.stats_publisher.publish()
+    print("ready", flush=True)
+    sys.stdin.read()
+""")
+RENDER = "from bot.utils.metrics import render_metrics; print(render_metrics()[0].decode())"
+
+
+def test_metrics_merge_all_workers():
+    root = str(Path(__file__).parent.parent)
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        workers = [
+            subprocess.Popen([sys.executable, "-c", WORKER, str(n)], cwd=root, env=env, text=True,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            for n in (1, 2)
+        ]
+        for worker in workers:
+            assert worker.stdout.readline().strip() == "ready"
+        render = lambda: subprocess.run([sys.executable, "-c", RENDER], cwd=root, env=env, text=True,
+                                        capture_output=True, check=True).stdout
+        live = render()
+        for worker in workers:
+            worker.communicate("")
+        exited = render()
+
+    leader_pid = workers[1].pid
+    assert "webhooks_received_total 3.0" in live
+    assert f'worker_is_leader{{pid="{leader_pid}"}} 1.0' in live
+    assert f'worker_is_leader{{pid="{workers[0].pid}"}} 0.0' in live
+    assert "cache_hits_total{cache=\"signatures\"} 2.0" in live
+    assert f'cache_entries{{cache="signatures",pid="{leader_pid}"}} 4.0' in live
+    # Counters outlive their workers, the live gauges of exited workers are dropped
+    assert "webhooks_received_total 3.0" in exited
+    assert "worker_is_leader{" not in exited
+
+
+if __name__ == "__main__":
+    test_one_leader_and_failover()
+    test_leader_whose_duties_fail_steps_down()
+    test_without_election_the_worker_leads()
+    test_relay_publishes_handed_off_alerts_in_order()
+    test_handoff_payload_takes_numpy_counts()
+    test_metrics_merge_all_workers()
+    print("✅ Leader tests passed")
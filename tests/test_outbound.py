@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test the outbound Telegram queue - offline, the client is a stub"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pyrogram.errors import FloodWait
+from bot.utils.outbound import OutboundQueue, PRIORITY_BUY, PRIORITY_ALERT, PRIORITY_NOTICE
+from bot.utils.tracing import span, start_trace
+
+
+class StubClient:
+    def __init__(self, flood_waits=None):
+        self.sent = []
+        # chat_id -> seconds of the FloodWait its first send raises
+        self.flood_waits = dict(flood_waits or {})
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.flood_waits:
+            raise FloodWait(value=self.flood_waits.pop(chat_id))
+        self.sent.append((chat_id, text, time.monotonic()))
+        return SimpleNamespace(id=len(self.sent), chat_id=chat_id, text=text)
+
+
+def test_priorities_and_notice_batching():
+    client = StubClient()
+
+    async def run():
+        queue = OutboundQueue(chat_rate=100, chat_burst=1, global_rate=1000, notice_linger=0)
+        futures = [
+            queue.send(1, "holding a", priority=PRIORITY_NOTICE),
+            queue.send(1, "holding b", priority=PRIORITY_NOTICE),
+            queue.send(1, "sell", priority=PRIORITY_ALERT),
+            queue.send(1, "buy", priority=PRIORITY_BUY),
+        ]
+        await queue.start(client)
+        results = await asyncio.gather(*futures)
+        await queue.stop()
+        return queue, results
+
+    queue, results = asyncio.run(run())
+    assert [text for _, text, _ in client.sent] == ["buy", "sell", "holding a\n\nholding b"]
+    # Both notices resolve to the one message they were sent in
+    assert results[0] is results[1] and results[0].text == "holding a\n\nholding b"
+    assert queue.stats()["batched"] == 1 and len(queue) == 0
+
+
+def test_flood_wait_only_pauses_its_chat():
+    client = StubClient(flood_waits={"busy": 1})
+
+    async def run():
+        queue = OutboundQueue(chat_rate=100, chat_burst=5, global_rate=1000, notice_linger=0)
+        await queue.start(client)
+        started = time.monotonic()
+        busy = queue.send("busy", "first")
+        # The producer is not held up by the FloodWait
+        assert time.monotonic() - started < 0.1
+        await asyncio.sleep(0.05)
+        quiet = await queue.send("quiet", "other chat")
+        assert quiet is not None and not busy.done()
+        message = await busy
+        await queue.stop()
+        return queue, message, started
+
+    queue, message, started = asyncio.run(run())
+    assert message.text == "first"
+    assert [chat for chat, _, _ in client.sent] == ["quiet", "busy"]
+    assert client.sent[1][2] - started >= 1
+    assert queue.stats()["flood_waits"] == 1
+
+
+def test_trace_runs_until_the_alert_is_delivered():
+    client = StubClient(flood_waits={"busy": 1})
+
+    async def run():
+        queue = OutboundQueue(chat_rate=100, chat_burst=5, global_rate=1000, notice_linger=0)
+        await queue.start(client)
+        with start_trace("SIG", "webhook") as trace:
+            with span("deliver_alert"):
+                sent = queue.send("busy", "buy", priority=PRIORITY_BUY)
+        # The webhook is answered, the alert still waits for the FloodWait
+        open_after_block = not trace.finished
+        await sent
+        await queue.stop()
+        return trace, open_after_block
+
+    trace, open_after_block = asyncio.run(run())
+    spans = {}
+    for s in trace.spans:
+        spans.setdefault(s.name, []).append(s)
+    outbound, = spans["outbound"]
+    flooded, delivered = spans["send_message"]
+    assert open_after_block and trace.finished
+    assert outbound.parent_id == spans["deliver_alert"][0].span_id and outbound.error is None
+    assert flooded.parent_id == delivered.parent_id == outbound.span_id
+    assert flooded.error.startswith("FloodWait") and delivered.error is None
+    # Queue wait included, the root span only covers the webhook handler
+    assert outbound.duration >= 1 > spans["webhook"][0].duration
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
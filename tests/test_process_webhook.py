@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Test process_webhook enrichment ordering - offline, GMGN and DB mocked"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.monitor as monitor
+from config.settings import SOL_MINT
+
+WALLET = "WALLET"
+SWAP = [{
+    "source": "RAYDIUM",
+    "feePayer": WALLET,
+    "tokenTransfers": [
+        {"fromUserAccount": WALLET, "toUserAccount": "POOL", "mint": SOL_MINT, "tokenAmount": 1.5},
+        {"fromUserAccount": "POOL", "toUserAccount": WALLET, "mint": "MINT", "tokenAmount": 1000.0},
+    ],
+}]
+
+
+class StubAggregator:
+    def __init__(self, sent, open_alert=None):
+        self.sent = sent
+        self.open_alert = open_alert
+
+    def active(self, chat_id, mint):
+        return self.open_alert
+
+    def publish(self, chat_id, mint, token_info, wallet_info):
+        self.sent.append(dict(wallet_info, aggregated=True, history=token_info.get("history")))
+
+
+def run_with_mocks(known_wallet: bool, open_alert=None, follower: bool = False):
+    events = []
+    sent = []
+
+    async def find_wallet(owner):
+        events.append("lookup")
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(name="w", address=owner) if known_wallet else None
+
+    async def get_token_info(mint):
+        events.append("token_info")
+        await asyncio.sleep(0.05)
+        events.append("token_info done")
+        return {"mint": mint, "profile": {"name": "Tok", "liquidity": 900.0}, "stats": {"holders": 150}}
+
+    async def get_token_metric_deltas(mint, since=None):
+        events.append("deltas")
+        first = {"first": None, "latest": None, "change": None, "change_percent": None}
+        return {"first_ts": datetime.now(UTC) - timedelta(hours=2), "holders": dict(first, first=100),
+                "liquidity": dict(first, first=1000.0), "insiders_percent": first}
+
+    async def get_wallet_stats(address, period="7d"):
+        events.append("wallet_stats")
+        await asyncio.sleep(0.05)
+        return {"pnl": 1}
+
+    async def forward_message(client, message, token_info, chat_id, wallet_info=None, priority=None):
+        sent.append(dict(wallet_info, priority=priority))
+
+    async def hand_off(chat_id, mint, is_buy, token_info, wallet_info, source=None, received_at=None):
+        sent.append(dict(wallet_info, handed_off=True, is_buy=is_buy))
+
+    originals = (monitor.find_wallet, monitor.get_token_info, monitor.get_wallet_stats, monitor.forward_message,
+                 monitor.alert_aggregator, monitor.leader, monitor.hand_off, monitor.get_token_metric_deltas)
+    monitor.find_wallet, monitor.get_token_info = find_wallet, get_token_info
+    monitor.get_token_metric_deltas = get_token_metric_deltas
+    monitor.get_wallet_stats, monitor.forward_message = get_wallet_stats, forward_message
+    monitor.alert_aggregator = StubAggregator(sent, open_alert)
+    monitor.leader, monitor.hand_off = SimpleNamespace(is_leader=not follower), hand_off
+
+    async def run():
+        await monitor.process_webhook(SWAP, None)
+        await asyncio.sleep(0.1)  # let cancelled tasks settle
+
+    try:
+        asyncio.run(run())
+    finally:
+        (monitor.find_wallet, monitor.get_token_info, monitor.get_wallet_stats, monitor.forward_message,
+         monitor.alert_aggregator, monitor.leader, monitor.hand_off, monitor.get_token_metric_deltas) = originals
+    return events, sent
+
+
+def test_enrichment_starts_before_lookup_finishes():
+    events, sent = run_with_mocks(known_wallet=True)
+    assert events[:4] == ["lookup", "token_info", "deltas", "wallet_stats"]
+    assert len(sent) == 1
+    assert sent[0]["description"] == "🟢 Bought 1.50 SOL for 1000.00 **Tok**\n"
+    assert sent[0]["pnl"] == {"pnl": 1}
+    assert sent[0]["aggregated"] is True
+
+
+def test_new_alert_carries_changes_since_first_snapshot():
+    events, sent = run_with_mocks(known_wallet=True)
+    history = sent[0]["history"]
+    assert "deltas" in events
+    assert round(history["age_seconds"]) == 7200
+    assert history["holders"]["change_percent"] == 50.0
+    assert history["liquidity"]["change_percent"] == -10.0
+    assert history["insiders_percent"]["change"] is None
+
+
+def test_unknown_wallet_cancels_enrichment():
+    events, sent = run_with_mocks(known_wallet=False)
+    assert sent == []
+    assert "token_info done" not in events
+
+
+def test_open_alert_reuses_token_info():
+    open_alert = SimpleNamespace(token_info={"mint": "MINT", "profile": {"name": "Cached"}})
+    events, sent = run_with_mocks(known_wallet=True, open_alert=open_alert)
+    assert "token_info" not in events and "deltas" not in events
+    assert sent[0]["description"] == "🟢 Bought 1.50 SOL for 1000.00 **Cached**\n"
+
+
+def test_follower_hands_alert_to_leader():
+    events, sent = run_with_mocks(known_wallet=True, follower=True)
+    assert len(sent) == 1
+    assert sent[0]["handed_off"] is True and sent[0]["is_buy"] is True
+    assert "aggregated" not in sent[0]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Test the local API stubs - offline, every server listens on 127.0.0.1"""
+import aiohttp
+import asyncio
+import importlib
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.jupiter_swap as jupiter_swap
+import config.endpoints as endpoints
+from config.settings import SOL_MINT
+from gmgn.client import gmgn
+from pyrogram.errors import FloodWait
+from solana.rpc.async_api import AsyncClient
+from stubs.gmgn import GMGNStub
+from stubs.jupiter import JupiterStub
+from stubs.rpc import RPCStub
+from stubs.telegram import StubTelegramClient, TelegramStub
+
+MINT = "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump"
+RECORDED_MINT = "5dpN5wMH8j8au29Rp91qn4WfNq6t6xJfcjQNcFeDJ8Ct"
+
+
+def test_gmgn_client_reads_the_stub():
+    async def scenario():
+        stub = GMGNStub()
+        client = gmgn(await stub.start())
+        try:
+            info = await asyncio.to_thread(client.getTokenInfo, MINT)
+            again = await asyncio.to_thread(client.getTokenInfo, MINT)
+            holders = await asyncio.to_thread(client.getTokenHolders, MINT, 20)
+            wallet = await asyncio.to_thread(client.getWalletInfo, "7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU", "7d")
+        finally:
+            await stub.stop()
+        return stub, info, again, holders, wallet
+
+    stub, info, again, holders, wallet = asyncio.run(scenario())
+    assert info["address"] == MINT and info == again
+    assert len(holders) == 20 and "profit" in holders[0]
+    assert "realized_profit" in wallet
+    assert stub.requests == 4
+
+
+def test_injected_errors():
+    async def scenario():
+        stub = GMGNStub(error_rate=1.0)
+        client = gmgn(await stub.start())
+        try:
+            return await asyncio.to_thread(client.getTokenLinks, MINT)
+        finally:
+            await stub.stop()
+
+    assert asyncio.run(scenario()) == {"error": "injected failure"}
+
+
+def test_gmgn_stub_serves_recorded_fixtures():
+    async def scenario():
+        stub = GMGNStub()
+        client = gmgn(await stub.start())
+        try:
+            info = await asyncio.to_thread(client.getTokenInfo, RECORDED_MINT)
+            stats = await asyncio.to_thread(client.getTokenStats, RECORDED_MINT)
+            links = await asyncio.to_thread(client.getTokenLinks, RECORDED_MINT)
+            holders = await asyncio.to_thread(client.getTokenHolders, RECORDED_MINT, 20)
+        finally:
+            await stub.stop()
+        return info, stats, links, holders
+
+    info, stats, links, holders = asyncio.run(scenario())
+    assert (info["symbol"], info["name"], info["liquidity"]) == ("SANA", "Sanafi Onchain", "370169.06")
+    assert stats["holder_count"] == 2061 and stats["bluechip_owner_percentage"] == "0.0393"
+    assert links["twitter_username"] == "sanafionchain"
+    assert len(holders) == 20
+
+
+def test_rate_limit_answers_429_with_retry_after():
+    async def scenario():
+        stub = GMGNStub(rate_limit=2)
+        url = await stub.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                responses = []
+                for _ in range(3):
+                    async with session.get(f"{url}/api/v1/token_stat/sol/{MINT}") as response:
+                        responses.append((response.status, response.headers.get("Retry-After")))
+        finally:
+            await stub.stop()
+        return stub, responses
+
+    stub, responses = asyncio.run(scenario())
+    assert [status for status, _ in responses] == [200, 200, 429]
+    assert responses[2][1] == "1" and stub.stats()["throttled"] == 1
+
+
+def test_swap_sent_and_confirmed_through_jupiter_and_rpc_stubs():
+    async def scenario():
+        jupiter, rpc = JupiterStub(), RPCStub()
+        saved = jupiter_swap.JUP_API, jupiter_swap.SOLANA_RPC_NODE
+        jupiter_swap.JUP_API, jupiter_swap.SOLANA_RPC_NODE = await jupiter.start(), await rpc.start()
+        try:
+            signature = await jupiter_swap.jupiter_swap(SOL_MINT, MINT, 10 ** 8, 1.1)
+            async with AsyncClient(jupiter_swap.SOLANA_RPC_NODE) as client:
+                status = await jupiter_swap.wait_for_confirmation(client, signature.value, max_timeout=5)
+                fee = await jupiter_swap.get_recent_prioritization_fees(client, SOL_MINT)
+        finally:
+            jupiter_swap.JUP_API, jupiter_swap.SOLANA_RPC_NODE = saved
+            await jupiter.stop()
+            await rpc.stop()
+        return rpc, signature, status, fee
+
+    rpc, signature, status, fee = asyncio.run(scenario())
+    assert str(signature.value) in rpc.transactions
+    assert str(status) == "TransactionConfirmationStatus.Finalized"
+    assert fee == 2000
+
+
+def test_use_local_stubs_points_clients_at_fixed_ports():
+    saved = {key: os.environ.pop(key, None) for key in ("USE_LOCAL_STUBS", "GMGN_HOST", "SOLANA_RPC_NODE")}
+    try:
+        os.environ["USE_LOCAL_STUBS"] = "true"
+        os.environ["SOLANA_RPC_NODE"] = "http://127.0.0.1:8899"
+        local = importlib.reload(endpoints)
+        urls = local.GMGN_HOST, local.JUP_API, local.SOLANA_RPC_NODE, local.stub_url("jupiter")
+    finally:
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+        importlib.reload(endpoints)
+
+    gmgn_host, jup_api, rpc_node, jupiter_url = urls
+    assert gmgn_host == f"http://127.0.0.1:{endpoints.STUB_PORTS['gmgn']}"
+    assert jup_api == jupiter_url
+    # A URL set explicitly wins over the switch
+    assert rpc_node == "http://127.0.0.1:8899"
+
+
+def test_telegram_stub_records_deliveries_and_floods():
+    async def scenario():
+        stub = TelegramStub()
+        client = StubTelegramClient(await stub.start())
+        await client.start()
+        try:
+            sent = await client.send_message(-100, "first")
+            await client.edit_message_text(-100, sent.id, "first, edited")
+            stub.flood_rate, stub.flood_wait = 1.0, 7
+            try:
+                await client.send_message(-100, "second")
+                flood = None
+            except FloodWait as e:
+                flood = e.value
+        finally:
+            await client.stop()
+            await stub.stop()
+        return stub, sent, flood
+
+    stub, sent, flood = asyncio.run(scenario())
+    assert sent.id == 1 and sent.chat.id == -100
+    assert [(d["method"], d["text"]) for d in stub.deliveries] == [("send", "first"), ("edit", "first, edited")]
+    assert flood == 7
+
+
+if __name__ == "__main__":
+    test_gmgn_client_reads_the_stub()
+    test_injected_errors()
+    test_gmgn_stub_serves_recorded_fixtures()
+    test_rate_limit_answers_429_with_retry_after()
+    test_swap_sent_and_confirmed_through_jupiter_and_rpc_stubs()
+    test_use_local_stubs_points_clients_at_fixed_ports()
+    test_telegram_stub_records_deliveries_and_floods()
+    print("✅ Stub tests passed")
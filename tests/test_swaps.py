@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test the Helius swap decoder against the sample payloads - offline"""
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.swaps import decode_swap, decode_swaps
+from bot.utils.cost_basis import CostBasisLedger
+from bot.utils.pnl import apply_transaction
+from config.settings import SOL_MINT
+
+PAYLOADS = {txn["signature"]: txn for txn in json.loads((Path(__file__).parent / "fixtures" / "helius_swaps.json").read_text())}
+PUMP = "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump"
+BONK = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+WIF = "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm"
+
+
+def test_pump_fun_buy_counts_native_sol_and_fees():
+    swap = decode_swap(PAYLOADS["4pumpBuy"])
+    assert swap.is_buy and swap.token_mint == PUMP
+    assert (swap.in_mint, round(swap.in_amount, 9)) == (SOL_MINT, 1.01)
+    assert (swap.out_mint, swap.out_amount) == (PUMP, 35000.5)
+    assert swap.slot == 372000001 and swap.source == "PUMP_FUN"
+
+
+def test_sell_for_wrapped_sol_ignores_unwrap():
+    swap = decode_swap(PAYLOADS["5raydiumSell"])
+    assert swap.is_sell and swap.token_mint == BONK
+    assert (swap.in_mint, swap.in_amount, swap.out_mint, swap.out_amount) == (BONK, 5000.0, SOL_MINT, 2.5)
+
+
+def test_multi_hop_route_nets_out_intermediate_sol():
+    swap = decode_swap(PAYLOADS["6jupiterMultiHop"])
+    assert not swap.is_buy and not swap.is_sell
+    assert (swap.in_mint, swap.in_amount, swap.out_mint, swap.out_amount) == (BONK, 100.0, WIF, 42000.0)
+
+
+def test_wrap_is_not_counted_twice():
+    swap = decode_swap(PAYLOADS["7wrapBuy"])
+    assert (swap.in_mint, swap.in_amount, swap.out_mint) == (SOL_MINT, 2.0, WIF)
+
+
+def test_relayed_buy_is_decoded_for_the_receiver():
+    swap = decode_swap(PAYLOADS["8relayedPumpBuy"])
+    assert swap.owner == "GThUX1Atko4tqhN2NaiTazWSeFWMuiUvfFnyJyUghFMJ"
+    assert (swap.in_amount, swap.out_amount) == (0.5, 12000.0)
+
+
+def test_failed_and_non_swaps_are_skipped():
+    assert decode_swap(PAYLOADS["9failedSwap"]) is None
+    assert decode_swap(PAYLOADS["AtransferIn"]) is None
+    assert len(decode_swaps(PAYLOADS.values())) == 5
+
+
+def test_pnl_books_what_the_decoder_reads():
+    owner = PAYLOADS["7wrapBuy"]["feePayer"]
+    ledger = CostBasisLedger()
+    apply_transaction(ledger, PAYLOADS["7wrapBuy"], owner)
+    position = ledger.get(WIF)
+    assert position.amount == 1234.0 and position.invested == 2.0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Test the on-disk mint index - offline, a temporary SQLite file"""
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.token_index import TokenIndex
+
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def test_lookups_do_not_wait_for_a_refresh():
+    with tempfile.TemporaryDirectory() as directory:
+        index = TokenIndex(str(Path(directory) / "index.sqlite3"))
+        index.upsert([(USDC, "USDC", 6)])
+        writing, release = threading.Event(), threading.Event()
+
+        def slow_rows():
+            # executemany pulls rows lazily, the write transaction stays open meanwhile
+            yield USDC, "USDC2", 6
+            writing.set()
+            release.wait(5)
+            yield "NEWMINT", "NEW", 9
+
+        refresh = threading.Thread(target=index.upsert, args=(slow_rows(),))
+        refresh.start()
+        assert writing.wait(5)
+        started = time.perf_counter()
+        during = (index.lookup(USDC), index.symbol("NEWMINT"), len(index))
+        waited = time.perf_counter() - started
+        release.set()
+        refresh.join()
+        after = index.lookup_many([USDC, "NEWMINT"])
+        index.close()
+
+    # The refresh is invisible until it commits
+    assert during == (("USDC", 6), "Unknown Token", 1)
+    assert waited < 1
+    assert after == {USDC: ("USDC2", 6), "NEWMINT": ("NEW", 9)}
+
+
+if __name__ == "__main__":
+    test_lookups_do_not_wait_for_a_refresh()
+    print("✅ Token index tests passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Test token metric deltas - against token_metrics rows seeded in DATABASE_URL, skipped without it"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.messages.messages import format_token_report
+from bot.utils.token_metrics import get_token_metric_deltas, since_first_snapshot
+from database.database import AsyncSessionFactory, TokenMetric, engine
+from sqlalchemy import delete
+
+MINT = "TESTDELTAS1111111111111111111111111111111111"
+SINGLE = "TESTDELTAS2222222222222222222222222222222222"
+T0 = datetime(2026, 1, 1, 12, tzinfo=UTC)
+
+
+def snapshot(mint, hours, holders, liquidity, insiders):
+    return TokenMetric(mint=mint, ts=T0 + timedelta(hours=hours), holders=holders, liquidity=liquidity,
+                       insiders_percent=insiders)
+
+
+def test_metric_deltas_from_seeded_snapshots():
+    async def scenario():
+        async with AsyncSessionFactory() as session:
+            await session.execute(delete(TokenMetric).where(TokenMetric.mint.in_([MINT, SINGLE])))
+            session.add_all([
+                snapshot(MINT, 0, 100, 1000.0, 5.0),
+                snapshot(MINT, 1, 120, 1500.0, 4.0),
+                snapshot(MINT, 2, 150, 500.0, 2.5),
+                snapshot(SINGLE, 0, 10, None, 1.0),
+            ])
+            await session.commit()
+        try:
+            return (
+                await get_token_metric_deltas(MINT),
+                await get_token_metric_deltas(MINT, since=T0 + timedelta(minutes=30)),
+                await get_token_metric_deltas(MINT, since=T0 + timedelta(hours=3)),
+                await get_token_metric_deltas("NOSNAPSHOTS"),
+                await get_token_metric_deltas(SINGLE),
+            )
+        finally:
+            async with AsyncSessionFactory() as session:
+                await session.execute(delete(TokenMetric).where(TokenMetric.mint.in_([MINT, SINGLE])))
+                await session.commit()
+            await engine.dispose()
+
+    try:
+        full, since, after_latest, empty, single = asyncio.run(scenario())
+    except OSError as e:
+        pytest.skip(f"no database: {e}")
+
+    assert full["first_ts"] == T0 and full["snapshots_span_seconds"] == 7200
+    assert full["holders"] == {"first": 100, "latest": 150, "change": 50, "change_percent": 50.0}
+    assert full["liquidity"]["change"] == -500.0
+    assert full["price"] == {"first": None, "latest": None, "change": None, "change_percent": None}
+
+    # The first snapshot at or after `since`
+    assert since["first_ts"] == T0 + timedelta(hours=1)
+    assert since["holders"]["first"] == 120 and since["holders"]["change_percent"] == 25.0
+
+    assert after_latest is None
+    assert empty is None
+
+    # One snapshot is both first and latest
+    assert single["first_ts"] == single["latest_ts"] and single["snapshots_span_seconds"] == 0
+    assert single["holders"] == {"first": 10, "latest": 10, "change": 0, "change_percent": 0.0}
+    assert single["liquidity"]["change"] is None
+
+
+def test_alert_reports_changes_since_first_snapshot():
+    first = {"first": None, "latest": None, "change": None, "change_percent": None}
+    deltas = {"first_ts": T0, "holders": dict(first, first=100), "liquidity": dict(first, first=1000.0),
+              "insiders_percent": dict(first, first=5.0)}
+    token_info = {
+        "mint": MINT,
+        "profile": {"ca": MINT, "name": "Tok", "symbol": "TOK", "liquidity": "1500"},
+        "stats": {"holders": 140, "insiders_percent": 3.5},
+        "holders": {}, "links": {},
+    }
+    token_info["history"] = since_first_snapshot(token_info, deltas, now=T0 + timedelta(hours=3))
+
+    assert "🕰️ Since first seen 3h ago: holders +40.0%, LP +50.0%, insiders -1.50 pts\n📊" in format_token_report(token_info)
+    assert since_first_snapshot(token_info, None) is None
+    assert "Since first seen" not in format_token_report(dict(token_info, history=None))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Test pipeline tracing spans - offline, no API calls"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.tracing import start_trace, span, traced
+
+
+def test_span_is_noop_outside_trace():
+    with span("orphan") as current:
+        assert current is None
+
+
+def test_gather_children_nest_under_parent():
+    async def run():
+        with start_trace("SIG", "webhook") as trace:
+            with span("get_token_info"):
+                await asyncio.gather(traced("gmgn.holders", asyncio.sleep(0)), traced("gmgn.links", asyncio.sleep(0)))
+            try:
+                with span("send_message"):
+                    raise RuntimeError("flood wait")
+            except RuntimeError:
+                pass
+        return trace
+
+    trace = asyncio.run(run())
+    spans = {s.name: s for s in trace.spans}
+    assert trace.trace_id == "SIG"
+    assert spans["get_token_info"].parent_id == spans["webhook"].span_id
+    assert spans["gmgn.holders"].parent_id == spans["get_token_info"].span_id
+    assert spans["gmgn.links"].parent_id == spans["get_token_info"].span_id
+    assert spans["send_message"].error == "RuntimeError: flood wait"
+    assert all(s.duration is not None for s in trace.spans)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Test Helius webhook sync - offline, Helius and the wallet table are stubs"""
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bot.utils.webhook_sync as webhook_sync
+from bot.utils.webhook_sync import WebhookSync, plan_shards
+
+URL = "https://bot.example/webhooks"
+
+
+class StubHelius:
+    """Stands in for the Helius webhooks API, recording every call"""
+
+    def __init__(self, webhooks=None):
+        self.webhooks = {webhook_id: {"url": URL, "addresses": set(addresses)}
+                         for webhook_id, addresses in (webhooks or {}).items()}
+        self.calls = []
+
+    async def get_webhooks(self):
+        self.calls.append(("get",))
+        return [{"id": webhook_id, "url": webhook["url"], "addresses": sorted(webhook["addresses"]), "type": "enhanced"}
+                for webhook_id, webhook in self.webhooks.items()]
+
+    async def update_webhook(self, webhook_id, url, addresses):
+        self.calls.append(("put", webhook_id, len(addresses)))
+        self.webhooks[webhook_id] = {"url": url, "addresses": set(addresses)}
+        return True
+
+    async def delete_webhook(self, webhook_id):
+        self.calls.append(("delete", webhook_id))
+        self.webhooks.pop(webhook_id, None)
+        return True
+
+    async def create_swap_webhook(self, url, addresses, auth_header=None):
+        webhook_id = f"wh{len(self.webhooks) + 1}"
+        self.calls.append(("create", webhook_id, len(addresses)))
+        self.webhooks[webhook_id] = {"url": url, "addresses": set(addresses)}
+        return webhook_id
+
+
+def run(helius, scenario, wallets=()):
+    names = ("get_webhooks", "update_webhook", "delete_webhook", "create_swap_webhook", "load_wallet_addresses",
+             "WEBHOOK_ID")
+    originals = {name: getattr(webhook_sync, name) for name in names}
+
+    async def load_wallet_addresses():
+        return list(wallets)
+
+    webhook_sync.get_webhooks = helius.get_webhooks
+    webhook_sync.update_webhook = helius.update_webhook
+    webhook_sync.delete_webhook = helius.delete_webhook
+    webhook_sync.create_swap_webhook = helius.create_swap_webhook
+    webhook_sync.load_wallet_addresses = load_wallet_addresses
+    webhook_sync.WEBHOOK_ID = "wh1"
+    try:
+        return asyncio.run(scenario())
+    finally:
+        for name, value in originals.items():
+            setattr(webhook_sync, name, value)
+
+
+def test_plan_keeps_addresses_in_place_and_fills_free_room():
+    current = {"a": {"w1", "w2", "w3"}, "b": {"w4"}}
+    shards, new = plan_shards(current, {"w1", "w3", "w4", "w5", "w6", "w7"}, max_addresses=3)
+    assert shards == {"a": {"w1", "w3", "w5"}, "b": {"w4", "w6", "w7"}}
+    assert new == []
+
+
+def test_plan_opens_new_webhooks_when_full():
+    shards, new = plan_shards({"a": {"w1", "w2"}}, {f"w{i}" for i in range(1, 8)}, max_addresses=2)
+    assert shards == {"a": {"w1", "w2"}}
+    assert [len(addresses) for addresses in new] == [2, 2, 1]
+    assert set().union(*new) == {"w3", "w4", "w5", "w6", "w7"}
+
+
+def test_plan_drops_addresses_listed_twice():
+    shards, new = plan_shards({"a": {"w1"}, "b": {"w1", "w2"}}, {"w1", "w2"}, max_addresses=5)
+    assert shards == {"a": {"w1"}, "b": {"w2"}}
+    assert new == []
+
+
+def test_startup_without_changes_skips_helius():
+    with tempfile.TemporaryDirectory() as directory:
+        state_path = f"{directory}/webhook_sync.json"
+        helius = StubHelius({"wh1": ["w1", "w2"]})
+
+        async def first_start():
+            return await WebhookSync(state_path, max_addresses=10).sync(URL)
+
+        async def second_start():
+            return await WebhookSync(state_path, max_addresses=10).sync(URL)
+
+        assert run(helius, first_start, wallets=["w1", "w2"])
+        # First start reads the webhooks once, they already match
+        assert helius.calls == [("get",)]
+
+        helius.calls.clear()
+        assert run(helius, second_start, wallets=["w1", "w2"])
+        assert helius.calls == []
+
+
+def test_only_changed_webhooks_are_updated():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1", "w2"], "wh2": ["w3", "w4"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=2)
+            await sync.sync(URL, ["w1", "w2", "w3", "w4"])
+            helius.calls.clear()
+            # w2 leaves, w5 takes its place on wh1; wh2 is untouched
+            return await sync.sync(URL, ["w1", "w3", "w4", "w5"])
+
+        assert run(helius, scenario)
+        assert helius.calls == [("put", "wh1", 2)]
+        assert helius.webhooks["wh1"]["addresses"] == {"w1", "w5"}
+
+
+def test_url_change_updates_every_webhook():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1"], "wh2": ["w2"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=1)
+            await sync.sync(URL, ["w1", "w2"])
+            helius.calls.clear()
+            return await sync.sync("https://moved.example/webhooks", ["w1", "w2"])
+
+        assert run(helius, scenario)
+        assert sorted(helius.calls) == [("put", "wh1", 1), ("put", "wh2", 1)]
+
+
+def test_full_webhook_overflows_into_a_new_one():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1", "w2"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=2)
+            await sync.sync(URL, ["w1", "w2", "w3"])
+            return sync
+
+        sync = run(helius, scenario)
+        assert ("create", "wh2", 1) in helius.calls
+        assert sync.webhooks == {"wh1": {"w1", "w2"}, "wh2": {"w3"}}
+
+
+def test_burst_of_additions_is_one_update():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=10, debounce=0.05)
+            await sync.sync(URL, ["w1"])
+            helius.calls.clear()
+            for i in range(2, 11):
+                sync.add([f"w{i}"])
+            await asyncio.sleep(0.1)
+            return sync
+
+        sync = run(helius, scenario)
+        assert helius.calls == [("put", "wh1", 10)]
+        assert len(sync.covered()) == 10
+
+
+def test_stop_sends_pending_changes():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1", "w2"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=10, debounce=60)
+            await sync.sync(URL, ["w1", "w2"])
+            helius.calls.clear()
+            sync.remove(["w2"])
+            await sync.stop()
+
+        run(helius, scenario)
+        assert helius.calls == [("put", "wh1", 1)]
+
+
+def test_emptied_webhooks_are_deleted_not_cleared():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1", "w2"], "wh2": ["w3"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=2)
+            await sync.sync(URL, ["w1", "w2", "w3"])
+            helius.calls.clear()
+            # w3's shard empties
+            shrunk = await sync.sync(URL, ["w1", "w2"])
+            calls = list(helius.calls)
+            helius.calls.clear()
+            # Every wallet is removed
+            emptied = await sync.sync(URL, [])
+            return shrunk, calls, emptied, sync
+
+        shrunk, calls, emptied, sync = run(helius, scenario)
+        assert shrunk and calls == [("delete", "wh2")]
+        assert emptied and helius.calls == [("delete", "wh1")]
+        assert not any(call[0] == "put" and call[2] == 0 for call in calls + helius.calls)
+        assert helius.webhooks == {} and sync.webhooks == {}
+
+
+def test_refresh_queues_the_database_diff():
+    with tempfile.TemporaryDirectory() as directory:
+        helius = StubHelius({"wh1": ["w1", "w2"]})
+
+        async def scenario():
+            sync = WebhookSync(f"{directory}/state.json", max_addresses=10, debounce=60)
+            await sync.sync(URL, ["w1", "w2"])
+            # The table has since lost w2 and gained w3
+            await sync.refresh()
+            return set(sync._pending_add), set(sync._pending_remove)
+
+        assert run(helius, scenario, wallets=["w1", "w3"]) == ({"w3"}, {"w2"})
+
+
+if __name__ == "__main__":
+    test_plan_keeps_addresses_in_place_and_fills_free_room()
+    test_plan_opens_new_webhooks_when_full()
+    test_plan_drops_addresses_listed_twice()
+    test_startup_without_changes_skips_helius()
+    test_only_changed_webhooks_are_updated()
+    test_url_change_updates_every_webhook()
+    test_full_webhook_overflows_into_a_new_one()
+    test_burst_of_additions_is_one_update()
+    test_emptied_webhooks_are_deleted_not_cleared()
+    test_stop_sends_pending_changes()
+    test_refresh_queues_the_database_diff()
+    print("✅ Webhook sync tests passed")
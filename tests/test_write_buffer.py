@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test the buffered writer and token metric rows - offline, no database"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.write_buffer import WriteBuffer
+from bot.utils.token_metrics import token_metrics_row
+
+
+def test_flushes_when_full_and_on_stop():
+    batches = []
+
+    async def flush_fn(rows):
+        batches.append(rows)
+
+    async def run():
+        buffer = WriteBuffer("test", flush_fn, max_rows=3, flush_interval=60)
+        await buffer.start()
+        for i in range(3):
+            buffer.add(i)
+        await asyncio.sleep(0)  # let the size-triggered flush run
+        buffer.add(3)
+        assert batches == [[0, 1, 2]] and len(buffer) == 1
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert batches == [[0, 1, 2], [3]]
+
+
+def test_failed_flush_drops_batch():
+    async def flush_fn(rows):
+        raise RuntimeError("db down")
+
+    async def run():
+        buffer = WriteBuffer("test", flush_fn, max_rows=10, flush_interval=60)
+        buffer.add(1)
+        assert await buffer.flush() == 0
+        assert len(buffer) == 0
+        assert buffer.stats()["rows_dropped"] == 1
+
+    asyncio.run(run())
+
+
+def test_keyed_buffer_keeps_latest_row():
+    batches = []
+
+    async def flush_fn(rows):
+        batches.append(rows)
+
+    async def run():
+        buffer = WriteBuffer("test", flush_fn, max_rows=10, flush_interval=60, key=lambda row: row["ca"])
+        for ca, price in (("A", 1), ("B", 2), ("A", 3)):
+            buffer.add({"ca": ca, "price": price})
+        assert len(buffer) == 2
+        assert await buffer.flush() == 2
+
+    asyncio.run(run())
+    assert batches == [[{"ca": "B", "price": 2}, {"ca": "A", "price": 3}]]
+
+
+def test_token_metrics_row():
+    row = token_metrics_row({
+        "mint": "MINT",
+        "stats": {"holders": 120, "insiders_percent": 4.5, "bc_owners_percent": 10.0},
+        "profile": {"price": 0.001, "liquidity": 5000, "top_10_holder_rate": 0.3},
+    })
+    assert row["mint"] == "MINT" and row["holders"] == 120
+    assert row["volume_1h"] is None and row["ts"].tzinfo is not None
+    assert token_metrics_row({"profile": {}, "stats": {}}) is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")